@@ -0,0 +1,95 @@
+# actor_lifecycle.py (batched spawn / autopilot / destroy through command batches)
+#
+# Spawning a vehicle and enabling its autopilot, or destroying a set of
+# actors, goes to the server as one client.apply_batch_sync() call instead of
+# one round-trip per actor. Every command's result is reported back, so
+# failed spawns (usually a collision at the spawn point) are visible.
+#
+# Per-vehicle traffic manager settings (ignore_lights_percentage, speed
+# difference, ...) have no command equivalent in carla.command, so
+# configure_vehicles() applies them after the batch has returned.
+#
+# ensure_map() and clear_actors() let a script reuse the world that is
+# already loaded: the map is only loaded when a different one is running,
+# and actors left over from an earlier run are destroyed in one batch.
+
+from carla_backend import carla
+
+SpawnActor = carla.command.SpawnActor
+SetAutopilot = carla.command.SetAutopilot
+DestroyActor = carla.command.DestroyActor
+FutureActor = carla.command.FutureActor
+
+# Settings the unsafe logger gives every vehicle it spawns
+UNSAFE_TM_SETTINGS = {
+    'ignore_lights_percentage': 0,
+    'ignore_signs_percentage': 100,
+    'vehicle_percentage_speed_difference': -40,  # faster than normal
+    'distance_to_leading_vehicle': 0.5,
+    'auto_lane_change': True,
+}
+
+
+def spawn_vehicles(client, spawns, tm_port, autopilot=True, do_tick=False):
+    """Spawn (blueprint, transform) pairs in one batch; returns (vehicles, errors) in request order
+
+    `errors` lists (index into `spawns`, message) for every spawn that failed.
+    """
+    if not spawns:
+        return [], []
+    commands = []
+    for blueprint, transform in spawns:
+        cmd = SpawnActor(blueprint, transform)
+        if autopilot:
+            cmd = cmd.then(SetAutopilot(FutureActor, True, tm_port))
+        commands.append(cmd)
+    responses = client.apply_batch_sync(commands, do_tick)
+
+    errors = [(i, r.error) for i, r in enumerate(responses) if r.error]
+    spawned_ids = [r.actor_id for r in responses if not r.error]
+    if not spawned_ids:
+        return [], errors
+    by_id = {a.id: a for a in client.get_world().get_actors(spawned_ids)}
+    return [by_id[i] for i in spawned_ids if i in by_id], errors
+
+
+def configure_vehicles(traffic_manager, vehicles, settings):
+    """Apply per-vehicle traffic manager settings, e.g. UNSAFE_TM_SETTINGS"""
+    for vehicle in vehicles:
+        for name, value in settings.items():
+            getattr(traffic_manager, name)(vehicle, value)
+
+
+def destroy_actors(client, actors, do_tick=False):
+    """Destroy actors (or actor ids) in one batch; returns (destroyed count, errors)
+
+    `errors` lists (actor id, message) for every actor the server could not destroy.
+    """
+    ids = [getattr(a, 'id', a) for a in actors]
+    if not ids:
+        return 0, []
+    responses = client.apply_batch_sync([DestroyActor(i) for i in ids], do_tick)
+    errors = [(actor_id, r.error) for actor_id, r in zip(ids, responses) if r.error]
+    return len(ids) - len(errors), errors
+
+
+def report_errors(tag, errors):
+    """Print one line per failed command"""
+    for key, error in errors:
+        print(f"[{tag}] {key}: {error}")
+
+
+def ensure_map(client, map_name):
+    """The server's world, loading `map_name` only when a different map is running"""
+    world = client.get_world()
+    if world.get_map().name.split('/')[-1] == map_name:
+        return world
+    print(f"[SETUP] Loading {map_name}...")
+    return client.load_world(map_name)
+
+
+def clear_actors(client, world, patterns=('vehicle.*', 'sensor.*')):
+    """Destroy every actor matching `patterns` in one batch; returns (destroyed count, errors)"""
+    actors = world.get_actors()
+    leftovers = {a.id: a for pattern in patterns for a in actors.filter(pattern)}
+    return destroy_actors(client, list(leftovers.values()))
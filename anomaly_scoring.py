@@ -0,0 +1,95 @@
+# anomaly_scoring.py (chunked, multi-threaded Isolation Forest scoring)
+#
+# The rows to score are cut into chunks of CHUNK_ROWS and scored by a pool of
+# worker threads with score_samples(), so memory stays bounded by a few
+# chunks no matter how many vehicle windows there are. Tree traversal runs
+# without the GIL (sklearn's Cython trees, or the numpy walk of a
+# model_store.ForestScorer), so the threads score chunks in parallel.
+#
+# Results come back in input order, one chunk at a time, with a continuous
+# anomaly score next to the -1 / 1 label, and write_scores() appends every
+# chunk to a CSV as soon as it is ready.
+#
+#   anomaly_score   -score_samples(): the Isolation Forest paper's s(x, n),
+#                   in (0, 1], higher = more anomalous (around 0.5 = normal)
+#   anomaly         -1 = outlier (reckless), 1 = normal; same as model.predict
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 65536  # rows scored by one task
+MAX_PENDING = 2     # chunks queued per worker, bounds the memory held by finished results
+
+
+def score_offset(model):
+    """offset_ of a sklearn IsolationForest or of a loaded model artifact"""
+    if hasattr(model, 'offset_'):
+        return float(model.offset_)
+    return float(model.meta['model']['offset'])
+
+
+def _rows(X, start, stop):
+    return X.iloc[start:stop] if hasattr(X, 'iloc') else X[start:stop]
+
+
+def _score_chunk(model, chunk, offset):
+    scores = np.asarray(model.score_samples(chunk), dtype=np.float64)
+    labels = np.where(scores - offset < 0, -1, 1)
+    return -scores, labels
+
+
+def iter_scores(model, X, chunk_rows=CHUNK_ROWS, workers=None):
+    """Yield (start row, anomaly scores, labels) per chunk of X, in order
+
+    X is a DataFrame holding the model's features (or an array in the same
+    column order). At most `workers` * MAX_PENDING chunks are in flight.
+    """
+    workers = workers or os.cpu_count() or 1
+    offset = score_offset(model)
+    with ThreadPoolExecutor(workers) as pool:
+        pending = deque()
+        for start in range(0, len(X), chunk_rows):
+            pending.append((start, pool.submit(_score_chunk, model, _rows(X, start, start + chunk_rows), offset)))
+            if len(pending) >= workers * MAX_PENDING:
+                start, future = pending.popleft()
+                yield (start, *future.result())
+        while pending:
+            start, future = pending.popleft()
+            yield (start, *future.result())
+
+
+def score_all(model, X, chunk_rows=CHUNK_ROWS, workers=None):
+    """(anomaly scores, labels) of every row of X"""
+    scores = np.empty(len(X))
+    labels = np.empty(len(X), dtype=np.int64)
+    for start, chunk_scores, chunk_labels in iter_scores(model, X, chunk_rows, workers):
+        scores[start:start + len(chunk_scores)] = chunk_scores
+        labels[start:start + len(chunk_labels)] = chunk_labels
+    return scores, labels
+
+
+def write_scores(model, table, features, path, id_columns=('vehicle_id',), outliers_only=False,
+                 chunk_rows=CHUNK_ROWS, workers=None):
+    """Score table[features] and stream id_columns + anomaly_score + anomaly to a CSV
+
+    Returns (anomaly scores, labels) of all rows. With outliers_only, only
+    rows labelled -1 are written.
+    """
+    scores = np.empty(len(table))
+    labels = np.empty(len(table), dtype=np.int64)
+    ids = table[list(id_columns)]
+    with open(path, 'w', newline='') as f:
+        pd.DataFrame(columns=list(id_columns) + ['anomaly_score', 'anomaly']).to_csv(f, index=False)
+        for start, chunk_scores, chunk_labels in iter_scores(model, table[features], chunk_rows, workers):
+            stop = start + len(chunk_scores)
+            scores[start:stop] = chunk_scores
+            labels[start:stop] = chunk_labels
+            out = ids.iloc[start:stop].assign(anomaly_score=chunk_scores, anomaly=chunk_labels)
+            if outliers_only:
+                out = out[chunk_labels == -1]
+            out.to_csv(f, index=False, header=False)
+    return scores, labels
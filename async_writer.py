@@ -0,0 +1,137 @@
+# async_writer.py (move CSV writes off the CARLA sensor threads)
+
+import queue
+import threading
+
+POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+
+class AsyncRowWriter:
+    """Row writer that hands rows to a background thread through a bounded queue.
+
+    Sensor callbacks only pay for a queue put; the writer thread drains the
+    queue in batches and calls `writerows` on the wrapped writer. When the
+    queue is full, `policy` decides what happens:
+
+    - 'block': the caller waits for space (no data loss)
+    - 'drop_oldest': the oldest queued batch is discarded
+    - 'drop_newest': the incoming batch is discarded
+    """
+
+    def __init__(self, writer, file=None, max_batches=1024, batch_rows=512, policy='block'):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy '{policy}', expected one of {POLICIES}")
+        self.writer = writer
+        self.file = file
+        self.batch_rows = batch_rows
+        self.policy = policy
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_batches)
+        self._lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='AsyncRowWriter', daemon=True)
+        self._thread.start()
+
+    def writerow(self, row):
+        self.writerows([row])
+
+    def writerows(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        if self._closed:
+            self._count_dropped(len(rows))
+            return
+
+        if self.policy == 'block':
+            self._queue.put(rows)
+        elif self.policy == 'drop_newest':
+            try:
+                self._queue.put_nowait(rows)
+            except queue.Full:
+                self._count_dropped(len(rows))
+                return
+        else:
+            while True:
+                try:
+                    self._queue.put_nowait(rows)
+                    break
+                except queue.Full:
+                    try:
+                        oldest = self._queue.get_nowait()
+                    except queue.Empty:
+                        continue
+                    if oldest is None:
+                        # close() is in progress: put its sentinel back, these rows arrived too late
+                        self._queue.put(None)
+                        self._count_dropped(len(rows))
+                        return
+                    self._count_dropped(len(oldest))
+
+        with self._lock:
+            self.enqueued += len(rows)
+
+    def flush(self):
+        """Ask the writer thread to flush the underlying file after its current batch"""
+        self._flush_requested.set()
+
+    def close(self):
+        """Stop accepting rows, write everything still queued and flush the file"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'queue_depth': self._queue.qsize(),
+            }
+
+    def _count_dropped(self, n):
+        with self._lock:
+            self.dropped += n
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                item = []
+
+            batch = []
+            while True:
+                if item is None:
+                    stopping = True
+                else:
+                    batch.extend(item)
+                if not stopping and len(batch) >= self.batch_rows:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self.writer.writerows(batch)
+                    with self._lock:
+                        self.written += len(batch)
+                except Exception as e:
+                    print(f"[ERROR] Writer thread failed to write {len(batch)} rows: {e}")
+                    self._count_dropped(len(batch))
+
+            if self.file is not None and (stopping or self._flush_requested.is_set()):
+                self._flush_requested.clear()
+                self.file.flush()
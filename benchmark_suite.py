@@ -0,0 +1,361 @@
+# benchmark_suite.py (measure the collection and training hot paths on synthetic data)
+#
+# Every case runs in a fresh process so peak RSS is per case. Results are
+# printed as a table and saved as JSON under benchmark_results/ so runs from
+# before and after a change can be compared with --compare.
+#
+# Usage:
+#   python benchmark_suite.py
+#   python benchmark_suite.py --rows 1e4,1e6,1e8 --vehicles 1,50,200
+#   python benchmark_suite.py --only association,motion_features --compare benchmark_results/<old>.json
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import subprocess
+import sys
+import time
+
+# The association benchmark drives the logger callback against the fake backend
+os.environ.setdefault('CARLA_BACKEND', 'fake')
+
+import numpy as np
+import pandas as pd
+
+RESULTS_DIR = 'benchmark_results'
+DEFAULT_ROWS = [10**4, 10**5, 10**6]
+DEFAULT_VEHICLES = [1, 10, 50, 200]
+DETECTIONS_PER_FRAME = 75  # 1500 points/s radar at 20 Hz
+MAX_ASSOCIATION_FRAMES = 2000
+RESULT_POLL_INTERVAL = 1.0  # seconds between checks that a benchmark process is still alive
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def latency_percentiles(samples):
+    ms = np.asarray(samples) * 1000.0
+    return {
+        'p50': float(np.percentile(ms, 50)),
+        'p90': float(np.percentile(ms, 90)),
+        'p99': float(np.percentile(ms, 99)),
+        'max': float(ms.max()),
+    }
+
+
+# === Synthetic inputs ===
+def synthetic_radar_log(n_rows, n_vehicles, seed=0):
+    """Rows shaped like safe_radar_data.csv / unsafe_radar_data.csv"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'timestamp': 1.7e9 + np.sort(rng.uniform(0, max(n_rows / 50.0, 1.0), n_rows)),
+        'x': rng.uniform(0, 30, n_rows),
+        'y': rng.uniform(-15, 15, n_rows),
+        'z': rng.uniform(-0.2, 0.2, n_rows),
+        'velocity': rng.normal(-8, 3, n_rows),
+        'azimuth': rng.uniform(-0.8, 0.8, n_rows),
+        'sensor_id': 'radar_1',
+        'vehicle_id': rng.integers(0, n_vehicles, n_rows) + 100,
+        'label': rng.choice(['safe', 'unsafe'], n_rows),
+    })
+
+
+def synthetic_sensor_log(n_rows, n_vehicles, seed=0):
+    """Rows shaped like safe_driving_data.csv / sensor_data_safe_and_reckless.csv"""
+    rng = np.random.default_rng(seed)
+    vehicle_ids = rng.integers(0, n_vehicles, n_rows) + 100
+    return pd.DataFrame({
+        'Timestamp': 1.7e9 + np.sort(rng.uniform(0, max(n_rows / 50.0, 1.0), n_rows)),
+        'sensor_type': 'RADAR',
+        'x': rng.uniform(0, 30, n_rows),
+        'y': rng.uniform(-0.8, 0.8, n_rows),
+        'z': rng.uniform(-0.2, 0.2, n_rows),
+        'velocity': rng.normal(-8, 3, n_rows),
+        'vehicle_id': vehicle_ids,
+        'sensor_id': rng.choice(['radar_1', 'radar_2', 'radar_3'], n_rows),
+        'reckless_driving': (vehicle_ids % 5 == 0).astype(int),
+    })
+
+
+# === Benchmarks ===
+class _NullWriter:
+    def writerows(self, rows):
+        for _ in rows:
+            pass
+
+
+def bench_association(n_rows, n_vehicles, repeat):
+    """save_radar_data from the radar logger, one call per radar frame"""
+    import fake_carla
+    import safe_radar_logger_v1 as logger
+    from spatial_index import ActorIndex
+
+    world = fake_carla.World(seed=0)
+    world.apply_settings(fake_carla.WorldSettings(synchronous_mode=True, fixed_delta_seconds=0.05))
+    radar_transform = fake_carla.Transform(fake_carla.Location(x=84, y=57, z=3))
+    bp = world.get_blueprint_library().find('vehicle.tesla.model3')
+    vehicles = []
+    columns = int(np.ceil(np.sqrt(n_vehicles)))
+    spacing = min(4.0, 30.0 / columns)  # keep every vehicle inside the radar range, 2 m apart at least
+    for i in range(n_vehicles):
+        location = fake_carla.Location(x=84 + 2 + spacing * (i % columns),
+                                       y=57 - 15 + spacing * (i // columns), z=0.3)
+        vehicles.append(world.spawn_actor(bp, fake_carla.Transform(location)))
+    world.tick()
+    vehicle_index = ActorIndex()
+    vehicle_index.rebuild(world.get_snapshot(), vehicles)
+
+    rng = np.random.default_rng(0)
+    n_frames = max(1, min(n_rows // DETECTIONS_PER_FRAME, MAX_ASSOCIATION_FRAMES))
+    frames = []
+    for frame in range(n_frames):
+        detections = np.column_stack([
+            rng.normal(-8, 3, DETECTIONS_PER_FRAME),
+            rng.uniform(-0.78, 0.78, DETECTIONS_PER_FRAME),
+            rng.uniform(-0.05, 0.05, DETECTIONS_PER_FRAME),
+            rng.uniform(2, 30, DETECTIONS_PER_FRAME),
+        ])
+        frames.append(fake_carla.RadarMeasurement(frame, frame * 0.05, radar_transform, detections))
+
+    writer = _NullWriter()
+    samples = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            for measurement in frames:
+                start = time.perf_counter()
+                logger.save_radar_data(measurement, 'radar_1', radar_transform, vehicle_index, writer)
+                samples.append(time.perf_counter() - start)
+    world._shutdown()
+    return n_frames * DETECTIONS_PER_FRAME, samples
+
+
+def bench_motion_features(n_rows, n_vehicles, repeat):
+    """dt / acceleration / jerk groupby passes from logistic_regression.py"""
+    from logistic_regression import compute_motion_features
+    df = synthetic_radar_log(n_rows, n_vehicles)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compute_motion_features(df)
+        samples.append(time.perf_counter() - start)
+    return n_rows, samples
+
+
+def bench_window_features(n_rows, n_vehicles, repeat):
+    """Sliding-window statistics of window_features.py; processed rows are the windows produced"""
+    from window_features import window_features
+    df = synthetic_radar_log(n_rows, n_vehicles)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        windows = window_features(df)
+        samples.append(time.perf_counter() - start)
+    return len(windows), samples
+
+
+def _if_features(n_rows, n_vehicles):
+    from feature_store import vehicle_features
+    from reckless_driving_IF import FEATURES
+    features = vehicle_features(synthetic_sensor_log(n_rows, n_vehicles))
+    features[FEATURES] = features[FEATURES].fillna(0.0)
+    return features
+
+
+def bench_if_features(n_rows, n_vehicles, repeat):
+    """Per-vehicle trajectory features (feature_store.vehicle_features, uncached)"""
+    from feature_store import vehicle_features
+    df = synthetic_sensor_log(n_rows, n_vehicles)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        vehicle_features(df)
+        samples.append(time.perf_counter() - start)
+    return n_rows, samples
+
+
+def bench_if_fit(n_rows, n_vehicles, repeat):
+    """IsolationForest.fit on the per-vehicle features"""
+    from reckless_driving_IF import train_model
+    features = _if_features(n_rows, n_vehicles)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        train_model(features)
+        samples.append(time.perf_counter() - start)
+    return len(features), samples
+
+
+def bench_if_predict(n_rows, n_vehicles, repeat):
+    """IsolationForest.predict on the per-vehicle features"""
+    from reckless_driving_IF import FEATURES, train_model
+    features = _if_features(n_rows, n_vehicles)
+    model = train_model(features)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict(features[FEATURES])
+        samples.append(time.perf_counter() - start)
+    return len(features), samples
+
+
+def bench_if_score(n_rows, n_vehicles, repeat):
+    """Chunked multi-threaded anomaly scores (anomaly_scoring.score_all)"""
+    from anomaly_scoring import score_all
+    from reckless_driving_IF import FEATURES, train_model
+    features = _if_features(n_rows, n_vehicles)
+    model = train_model(features)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        score_all(model, features[FEATURES])
+        samples.append(time.perf_counter() - start)
+    return len(features), samples
+
+
+BENCHMARKS = {
+    'association': bench_association,
+    'motion_features': bench_motion_features,
+    'window_features': bench_window_features,
+    'if_features': bench_if_features,
+    'if_fit': bench_if_fit,
+    'if_predict': bench_if_predict,
+    'if_score': bench_if_score,
+}
+
+
+# === Runner ===
+def _run_case(name, n_rows, n_vehicles, repeat, result_queue):
+    try:
+        rows, samples = BENCHMARKS[name](n_rows, n_vehicles, repeat)
+        total = sum(samples)
+        result_queue.put({
+            'benchmark': name,
+            'rows': n_rows,
+            'vehicles': n_vehicles,
+            'repeat': repeat,
+            'processed_rows': rows,
+            'throughput_rows_per_s': rows * repeat / total if total else None,
+            'latency_ms': latency_percentiles(samples),
+            'peak_rss_mb': peak_rss_mb(),
+            'note': (f'capped at {MAX_ASSOCIATION_FRAMES} frames, {rows} detections'
+                     if name == 'association' and n_rows // DETECTIONS_PER_FRAME > MAX_ASSOCIATION_FRAMES else None),
+        })
+    except Exception as e:
+        result_queue.put({'benchmark': name, 'rows': n_rows, 'vehicles': n_vehicles, 'error': repr(e)})
+
+
+def run_case(name, n_rows, n_vehicles, repeat):
+    """Run one benchmark case in a fresh process"""
+    ctx = multiprocessing.get_context('spawn')
+    result_queue = ctx.Queue()
+    process = ctx.Process(target=_run_case, args=(name, n_rows, n_vehicles, repeat, result_queue))
+    process.start()
+    while True:
+        try:
+            result = result_queue.get(timeout=RESULT_POLL_INTERVAL)
+            break
+        except queue.Empty:
+            if process.is_alive():
+                continue
+        # The process died before reporting, e.g. killed by the OOM killer on a large case
+        try:
+            result = result_queue.get(timeout=RESULT_POLL_INTERVAL)
+        except queue.Empty:
+            result = {'benchmark': name, 'rows': n_rows, 'vehicles': n_vehicles,
+                      'error': f'exit code {process.exitcode}'}
+        break
+    process.join()
+    return result
+
+
+def environment_info():
+    import sklearn
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def format_result(r):
+    if 'error' in r:
+        return f"{r['benchmark']:<16} rows={r['rows']:<10} vehicles={r['vehicles']:<4} ERROR {r['error']}"
+    lat = r['latency_ms']
+    rss = f"{r['peak_rss_mb']:.0f}MB" if r['peak_rss_mb'] is not None else 'n/a'
+    throughput = f"{r['throughput_rows_per_s']:>14,.0f}" if r['throughput_rows_per_s'] is not None else f"{'n/a':>14}"
+    note = f"  ({r['note']})" if r.get('note') else ''
+    return (f"{r['benchmark']:<16} rows={r['rows']:<10} vehicles={r['vehicles']:<4} "
+            f"{throughput} rows/s  p50={lat['p50']:.3f}ms p99={lat['p99']:.3f}ms "
+            f"max={lat['max']:.3f}ms  rss={rss}{note}")
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r['benchmark'], r['rows'], r['vehicles']): r for r in json.load(f)['results'] if 'error' not in r}
+    print(f"\n=== Compared to {baseline_path} (throughput ratio, >1 is faster) ===")
+    for r in results:
+        old = baseline.get((r['benchmark'], r['rows'], r['vehicles']))
+        if old is None or 'error' in r or not r['throughput_rows_per_s'] or not old['throughput_rows_per_s']:
+            continue
+        ratio = r['throughput_rows_per_s'] / old['throughput_rows_per_s']
+        print(f"{r['benchmark']:<16} rows={r['rows']:<10} vehicles={r['vehicles']:<4} x{ratio:.2f}")
+
+
+def _int_list(text):
+    return [int(float(v)) for v in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the collection and training hot paths')
+    parser.add_argument('--rows', type=_int_list, default=DEFAULT_ROWS, help='comma separated, e.g. 1e4,1e6,1e8')
+    parser.add_argument('--vehicles', type=_int_list, default=DEFAULT_VEHICLES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help='comma separated benchmark names')
+    parser.add_argument('--output', default=None, help='JSON results path')
+    parser.add_argument('--compare', default=None, help='previous JSON results to compare against')
+    args = parser.parse_args()
+
+    names = args.only.split(',')
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks {unknown}, choose from {list(BENCHMARKS)}")
+
+    results = []
+    for name in names:
+        for n_rows in args.rows:
+            for n_vehicles in args.vehicles:
+                result = run_case(name, n_rows, n_vehicles, args.repeat)
+                print(format_result(result))
+                results.append(result)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime('bench-%Y%m%d-%H%M%S.json'))
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'environment': environment_info(), 'results': results}, f, indent=2)
+    print(f"\n[DONE] Results saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+# camera_capture.py (camera frames copied out of the sensor callback and encoded on worker threads)
+#
+# The camera callback only copies the raw BGRA buffer into a preallocated
+# ring of frame slots and queues the slot number; it never encodes or
+# touches the disk, so it cannot hold up the radar callbacks. A small pool
+# of worker threads then converts the frame to RGB, optionally downscales
+# it and writes it out:
+#
+#   'png'   one PNG per kept frame (<dir>/<frame>.png), zlib-encoded here so
+#           no imaging library is needed; zlib releases the GIL
+#   'npz'   chunks of `frames_per_chunk` frames per compressed .npz file
+#           (arrays: frames (n, h, w, 3) uint8 RGB, frame, timestamp)
+#
+# Only every `every`-th frame is kept. When all ring slots are waiting to
+# be encoded, new frames are dropped (and counted) instead of blocking the
+# simulator's sensor thread.
+
+import os
+import queue
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+FORMATS = ('png', 'npz')
+PNG_LEVEL = 3           # zlib level: fast, still about 3x smaller than raw
+RING_SLOTS = 32         # frames buffered between the callback and the workers
+FRAMES_PER_CHUNK = 100
+
+
+# === Encoding ===
+def _png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+def encode_png(rgb, level=PNG_LEVEL):
+    """PNG bytes of an (h, w, 3) RGB or (h, w, 4) RGBA uint8 array"""
+    height, width, channels = rgb.shape
+    rows = np.empty((height, 1 + width * channels), dtype=np.uint8)
+    rows[:, 0] = 0  # filter type None on every scanline
+    rows[:, 1:] = rgb.reshape(height, -1)
+    header = struct.pack('>IIBBBBB', width, height, 8, {3: 2, 4: 6}[channels], 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', header)
+            + _png_chunk(b'IDAT', zlib.compress(rows.tobytes(), level)) + _png_chunk(b'IEND', b''))
+
+
+def bgra_to_rgb(bgra, scale=1):
+    """RGB copy of a BGRA frame, averaged over scale x scale pixel blocks"""
+    rgb = bgra[:, :, 2::-1]
+    if scale == 1:
+        return np.ascontiguousarray(rgb)
+    height, width = (bgra.shape[0] // scale) * scale, (bgra.shape[1] // scale) * scale
+    blocks = rgb[:height, :width].reshape(height // scale, scale, width // scale, scale, 3)
+    return blocks.mean(axis=(1, 3)).round().astype(np.uint8)
+
+
+# === Capture ===
+class CameraCapture:
+    """listen() callback for an RGB camera that stores frames from worker threads"""
+
+    def __init__(self, output_dir, fmt='png', every=1, scale=1, frames_per_chunk=FRAMES_PER_CHUNK,
+                 slots=RING_SLOTS, workers=2):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown camera format '{fmt}', expected one of {FORMATS}")
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.every = max(1, int(every))
+        self.scale = max(1, int(scale))
+        self.frames_per_chunk = frames_per_chunk
+        self.slots = slots
+        self.received = 0
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.files = 0
+        self._ring = None
+        self._free = queue.Queue()
+        self._pending = queue.Queue()
+        self._chunk = []
+        self._chunk_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run, name=f'CameraCapture-{i}', daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def __call__(self, image):
+        """Sensor thread: copy the frame into a free slot and return"""
+        self.received += 1
+        if self._closed or image.frame % self.every:
+            return
+        if self._ring is None:
+            # Sized from the first frame, so the callback never allocates afterwards
+            self._ring = np.empty((self.slots, image.height, image.width, 4), dtype=np.uint8)
+            for slot in range(self.slots):
+                self._free.put(slot)
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return
+        self._ring[slot] = np.frombuffer(image.raw_data, dtype=np.uint8).reshape(image.height, image.width, 4)
+        self.captured += 1
+        self._pending.put((slot, image.frame, image.timestamp))
+
+    def _run(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            slot, frame, timestamp = item
+            try:
+                rgb = bgra_to_rgb(self._ring[slot], self.scale)
+            finally:
+                self._free.put(slot)
+            try:
+                if self.fmt == 'png':
+                    self._write_png(rgb, frame)
+                else:
+                    self._add_to_chunk(rgb, frame, timestamp)
+            except Exception as e:
+                print(f"[CAMERA] Frame {frame} not saved: {e}")
+
+    def _write_png(self, rgb, frame):
+        with open(os.path.join(self.output_dir, f'{frame:06d}.png'), 'wb') as f:
+            f.write(encode_png(rgb))
+        with self._stats_lock:
+            self.written += 1
+            self.files += 1
+
+    def _add_to_chunk(self, rgb, frame, timestamp):
+        with self._chunk_lock:
+            self._chunk.append((frame, timestamp, rgb))
+            if len(self._chunk) < self.frames_per_chunk:
+                return
+            chunk, self._chunk = self._chunk, []
+        self._write_chunk(chunk)
+
+    def _write_chunk(self, chunk):
+        chunk.sort(key=lambda item: item[0])  # workers can finish frames out of order
+        frames = np.array([item[0] for item in chunk], dtype=np.int64)
+        path = os.path.join(self.output_dir, f'frames-{frames[0]:06d}-{frames[-1]:06d}.npz')
+        np.savez_compressed(path, frames=np.stack([item[2] for item in chunk]), frame=frames,
+                            timestamp=np.array([item[1] for item in chunk], dtype=np.float64))
+        with self._stats_lock:
+            self.written += len(chunk)
+            self.files += 1
+
+    def close(self):
+        """Encode every captured frame, write the last partial chunk and stop the workers"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._pending.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self._chunk:
+            chunk, self._chunk = self._chunk, []
+            self._write_chunk(chunk)
+
+    def stats(self):
+        return {
+            'received': self.received,
+            'captured': self.captured,
+            'dropped': self.dropped,
+            'written': self.written,
+            'files': self.files,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"[CAMERA] {s['written']}/{s['captured']} frames written to {s['files']} files in {self.output_dir} "
+              f"({s['received']} received, {s['dropped']} dropped)")
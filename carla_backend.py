@@ -0,0 +1,18 @@
+# carla_backend.py (pick the real CARLA client or the in-process fake)
+#
+# Scripts import carla through this module:
+#
+#     from carla_backend import carla
+#
+# Set CARLA_BACKEND=fake to run against fake_carla.py (no simulator or GPU
+# needed), e.g. for profiling, benchmarks and CI. Anything else, or unset,
+# uses the real carla package.
+
+import os
+
+BACKEND = os.environ.get('CARLA_BACKEND', 'carla').lower()
+
+if BACKEND == 'fake':
+    import fake_carla as carla
+else:
+    import carla
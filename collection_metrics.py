@@ -0,0 +1,305 @@
+# collection_metrics.py (thread-safe counters, gauges and histograms for long collection runs)
+#
+# Sensor callbacks, the writer thread and the main loop all update the same
+# metrics, so every metric keeps its values behind its own lock. Values can
+# carry labels (e.g. sensor='radar_1'), like Prometheus series.
+#
+# MetricsReporter writes a snapshot of the registry every `interval` seconds
+# (and once more when stopped), replacing the file atomically:
+#
+#   *.json   every series, plus per-second rates of the counters since the
+#            previous snapshot (detections per second per sensor, ...)
+#   *.prom   Prometheus text format, e.g. for node_exporter's textfile collector
+#
+# CollectionMetrics bundles what the radar loggers report: callback latency,
+# detections per sensor, sensor frame gaps (dropped frames, from the
+# measurement's frame number), writer queue depth, spawn results and server
+# round-trip (RPC) latency.
+
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+REPORT_INTERVAL = 10.0
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def series(self):
+        """[(labels dict, value)] for every label set seen so far"""
+        with self._lock:
+            return [(dict(key), self._copy(value)) for key, value in self._values.items()]
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Add `amount`; returns the new value of this label set"""
+        key = _key(labels)
+        with self._lock:
+            value = self._values.get(key, 0) + amount
+            self._values[key] = value
+        return value
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_key(labels), 0)
+
+    def total(self):
+        """Sum over all label sets"""
+        with self._lock:
+            return sum(self._values.values())
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_key(labels), math.nan)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = _key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0, 'max': 0.0}
+            state['counts'][index] += 1
+            state['sum'] += value
+            state['count'] += 1
+            state['max'] = max(state['max'], value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _copy(self, state):
+        return dict(state, counts=list(state['counts']))
+
+
+class MetricsRegistry:
+    """Named metrics with JSON and Prometheus text snapshots"""
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help):
+        return self._register(Counter(name, help))
+
+    def gauge(self, name, help):
+        return self._register(Gauge(name, help))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help, buckets))
+
+    def snapshot(self):
+        out = {}
+        for name, metric in self.metrics.items():
+            entry = {'type': metric.kind, 'help': metric.help, 'series': []}
+            for labels, value in metric.series():
+                if metric.kind == 'histogram':
+                    entry['buckets'] = list(metric.buckets)
+                entry['series'].append({'labels': labels, 'value': value})
+            out[name] = entry
+        return out
+
+    def prometheus_text(self):
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for labels, value in metric.series():
+                if metric.kind != 'histogram':
+                    lines.append(f'{name}{_label_text(labels)} {_number(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(metric.buckets) + [math.inf], value['counts']):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f'{name}_bucket{_label_text(dict(labels, le=le))} {cumulative}')
+                lines.append(f'{name}_sum{_label_text(labels)} {_number(value["sum"])}')
+                lines.append(f'{name}_count{_label_text(labels)} {value["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
+
+
+def _number(value):
+    return 'NaN' if isinstance(value, float) and math.isnan(value) else repr(value)
+
+
+class FrameGapTracker:
+    """Counts frames per sensor and the frame numbers skipped between consecutive measurements"""
+
+    def __init__(self, registry):
+        self.frames = registry.counter('sensor_frames_total', 'Sensor measurements received')
+        self.missed = registry.counter('sensor_frames_missed_total', 'Frames skipped between consecutive measurements')
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def update(self, sensor, frame):
+        """Record a measurement; returns the number of frames missed before it"""
+        with self._lock:
+            last = self._last.get(sensor)
+            self._last[sensor] = frame
+        gap = frame - last - 1 if last is not None and frame > last + 1 else 0
+        self.frames.inc(sensor=sensor)
+        if gap:
+            self.missed.inc(gap, sensor=sensor)
+        return gap
+
+
+class CollectionMetrics:
+    """The metrics a radar logger reports"""
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        self.callback_seconds = self.registry.histogram('sensor_callback_seconds', 'Time spent in a sensor callback')
+        self.detections = self.registry.counter('detections_total', 'Detections matched to a vehicle and written')
+        self.frames = FrameGapTracker(self.registry)
+        self.writer_queue = self.registry.gauge('writer_queue_batches', 'Row batches waiting in the writer queue')
+        self.writer_dropped = self.registry.gauge('writer_dropped_rows', 'Rows dropped by the writer backpressure policy')
+        self.spawns = self.registry.counter('spawns_total', 'Vehicle spawn attempts by result (ok / failed)')
+        self.rpc_seconds = self.registry.histogram('rpc_seconds', 'Duration of calls to the simulator server')
+        self.active_vehicles = self.registry.gauge('active_vehicles', 'Vehicles currently managed by the logger')
+
+    def record_spawns(self, spawned, errors):
+        if spawned:
+            self.spawns.inc(len(spawned), result='ok')
+        if errors:
+            self.spawns.inc(len(errors), result='failed')
+
+    def spawn_success_rate(self):
+        ok, failed = self.spawns.value(result='ok'), self.spawns.value(result='failed')
+        return ok / (ok + failed) if ok + failed else math.nan
+
+    def sample_writer(self, writer):
+        stats = writer.stats()
+        self.writer_queue.set(stats['queue_depth'])
+        self.writer_dropped.set(stats['dropped'])
+
+
+class MetricsReporter:
+    """Background thread writing registry snapshots to `path` (.json or .prom) every `interval` seconds
+
+    `collect` callables run before every snapshot, e.g. to sample gauges
+    such as the writer queue depth. Without start(), call write() from your
+    own loop (the loggers schedule it on simulation time).
+    """
+
+    def __init__(self, registry, path, interval=REPORT_INTERVAL, collect=()):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.collect = list(collect)
+        self.started = time.time()
+        self._previous = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='MetricsReporter', daemon=True)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread and write a final snapshot"""
+        if self._thread.is_alive():
+            self._stop.set()
+            self._thread.join()
+        self.write()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                print(f"[METRICS] Could not write {self.path}: {e}")
+
+    def write(self):
+        for fn in self.collect:
+            fn()
+        now = time.time()
+        if self.path.endswith('.prom'):
+            text = self.registry.prometheus_text()
+        else:
+            snapshot = self.registry.snapshot()
+            text = json.dumps({
+                'time': now,
+                'uptime_seconds': now - self.started,
+                'rates': self._rates(snapshot, now),
+                'metrics': snapshot,
+            }, indent=2)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
+
+    def _rates(self, snapshot, now):
+        """Per-second increase of every counter series since the previous snapshot"""
+        counters = {
+            (name, _key(s['labels'])): s['value']
+            for name, entry in snapshot.items() if entry['type'] == 'counter' for s in entry['series']
+        }
+        rates = {}
+        if self._previous is not None:
+            previous_time, previous = self._previous
+            elapsed = now - previous_time
+            for (name, key), value in counters.items():
+                if elapsed > 0:
+                    label = ','.join(f'{k}={v}' for k, v in key)
+                    rates.setdefault(name, {})[label or 'all'] = (value - previous.get((name, key), 0)) / elapsed
+        self._previous = (now, counters)
+        return rates
@@ -0,0 +1,290 @@
+# collection_orchestrator.py (run many radar loggers in parallel, one simulator server each)
+#
+# Every worker is a separate process running safe_radar_logger_v1.py or
+# unsafe_radar_logger_v2.py against its own server host / port, with its own
+# traffic manager port and output directory. Workers that exit with an error
+# (the loggers return a failure status when collection did not finish) are
+# restarted up to --restarts times; every attempt is a separate run with its
+# own run id, so a crash never overwrites data that was already written.
+#
+# When all workers are done, the runs are merged into one dataset per label
+# under <root>/merged/, with a run_id column. Actor ids are only unique per
+# server, so vehicle_id is renumbered across runs and the logger's id is kept
+# as source_vehicle_id. runs.json in the root records every attempt.
+#
+# Usage:
+#   python collection_orchestrator.py safe@localhost:2000 unsafe@localhost:2002
+#   python collection_orchestrator.py safe@node1:2000 unsafe@node2:2000:8001 --runtime 600 --restarts 5
+#   python collection_orchestrator.py --merge collection_runs/<a> collection_runs/<b> --output merged_data
+#   (worker spec: label@host:port[:tm_port], --set NAME=VALUE overrides any logger config constant;
+#   the output file names derived from LABEL / OUTPUT_FORMAT follow the overrides)
+
+import argparse
+import ast
+import glob
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import is_columnar, iter_row_groups
+
+LOGGERS = {'safe': 'safe_radar_logger_v1', 'unsafe': 'unsafe_radar_logger_v2'}
+RUNS_DIR = 'collection_runs'
+MANIFEST_FILE = 'runs.json'
+BASE_TM_PORT = 8000
+MAX_RESTARTS = 3
+RESTART_DELAY = 5.0   # seconds before a failed worker is started again
+POLL_INTERVAL = 1.0
+MERGE_CHUNK_ROWS = 65536
+
+# Logger constants derived from LABEL / OUTPUT_FORMAT at import time (same
+# expressions as the loggers' config blocks), recomputed after --set overrides
+DERIVED_SETTINGS = {
+    'OUTPUT_FILE': lambda m: f'{m.LABEL}_radar_data.csv' if m.OUTPUT_FORMAT == 'csv' else f'{m.LABEL}_radar_data.columnar',
+    'METRICS_FILE': lambda m: f'{m.LABEL}_metrics.json',
+    'GROUND_TRUTH_FILE': lambda m: f'{m.LABEL}_ground_truth.columnar',
+}
+
+
+# === Workers ===
+def parse_worker(text, index):
+    """'label@host:port[:tm_port]' -> worker settings; tm_port defaults to BASE_TM_PORT + index"""
+    label, _, address = text.partition('@')
+    parts = address.split(':')
+    if label not in LOGGERS or len(parts) not in (2, 3):
+        raise ValueError(f"Bad worker '{text}', expected label@host:port[:tm_port] with label in {sorted(LOGGERS)}")
+    return {
+        'name': f'{label}-{index:02d}',
+        'label': label,
+        'host': parts[0],
+        'port': int(parts[1]),
+        'tm_port': int(parts[2]) if len(parts) == 3 else BASE_TM_PORT + index,
+    }
+
+
+def _run_logger(module_name, overrides, log_path):
+    # Worker process: logger output goes to the run's log file, config comes from the overrides
+    log = open(log_path, 'w')
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+    sys.stdout.reconfigure(line_buffering=True)
+    logger = importlib.import_module(module_name)
+    apply_overrides(logger, overrides)
+    sys.exit(0 if logger.main() else 1)
+
+
+def apply_overrides(logger, overrides):
+    """Set the logger's config constants, then recompute the names derived from them"""
+    # Only names that still hold their derived value follow; an explicit override or edit
+    # (e.g. GROUND_TRUTH_FILE = None) is kept
+    derived = [name for name, fn in DERIVED_SETTINGS.items()
+               if name not in overrides and getattr(logger, name, None) == fn(logger)]
+    for name, value in overrides.items():
+        setattr(logger, name, value)
+    for name in derived:
+        setattr(logger, name, DERIVED_SETTINGS[name](logger))
+
+
+class Worker:
+    """One logger slot; every (re)start is a new run with its own output directory"""
+
+    def __init__(self, spec, root, overrides):
+        self.spec = spec
+        self.root = root
+        self.overrides = overrides
+        self.process = None
+        self.attempt = 0
+        self.runs = []
+        self.restart_at = None
+
+    @property
+    def run(self):
+        return self.runs[-1]
+
+    def start(self, ctx):
+        self.attempt += 1
+        run_id = f"{self.spec['name']}-a{self.attempt}"
+        run_dir = os.path.join(self.root, run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        overrides = dict(self.overrides, CARLA_HOST=self.spec['host'], CARLA_PORT=self.spec['port'],
+                         TM_PORT=self.spec['tm_port'], OUTPUT_DIR=run_dir)
+        self.process = ctx.Process(target=_run_logger, name=run_id,
+                                   args=(LOGGERS[self.spec['label']], overrides, os.path.join(run_dir, 'worker.log')))
+        self.process.start()
+        self.restart_at = None
+        self.runs.append(dict(self.spec, run_id=run_id, attempt=self.attempt, dir=run_dir,
+                              started=time.strftime('%Y-%m-%dT%H:%M:%S'), finished=None, exitcode=None))
+        print(f"[ORCH] Started {run_id} ({self.spec['host']}:{self.spec['port']}, tm {self.spec['tm_port']}, pid {self.process.pid})")
+
+    def poll(self):
+        """Exit code of the current run once it has finished, else None"""
+        if self.process is None or self.process.is_alive():
+            return None
+        self.process.join()
+        exitcode = self.process.exitcode
+        self.process = None
+        self.run.update(finished=time.strftime('%Y-%m-%dT%H:%M:%S'), exitcode=exitcode)
+        return exitcode
+
+    def stop(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(10)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+            self.run.update(finished=time.strftime('%Y-%m-%dT%H:%M:%S'), exitcode=self.process.exitcode)
+        self.process = None
+
+
+def supervise(specs, root, overrides=None, max_restarts=MAX_RESTARTS, restart_delay=RESTART_DELAY):
+    """Run every worker to completion, restarting failed ones; returns the list of runs"""
+    ctx = multiprocessing.get_context('spawn')
+    workers = [Worker(spec, root, overrides or {}) for spec in specs]
+    active = list(workers)
+    try:
+        for worker in workers:
+            worker.start(ctx)
+        _write_manifest(root, workers)
+        while active:
+            time.sleep(POLL_INTERVAL)
+            now = time.monotonic()
+            for worker in list(active):
+                if worker.restart_at is not None:
+                    if now >= worker.restart_at:
+                        worker.start(ctx)
+                        _write_manifest(root, workers)
+                    continue
+                exitcode = worker.poll()
+                if exitcode is None:
+                    continue
+                _write_manifest(root, workers)
+                if exitcode == 0:
+                    print(f"[ORCH] {worker.run['run_id']} finished")
+                    active.remove(worker)
+                elif worker.attempt <= max_restarts:
+                    print(f"[ORCH] {worker.run['run_id']} failed (exit code {exitcode}), "
+                          f"restarting in {restart_delay:.0f}s (see {worker.run['dir']}/worker.log)")
+                    worker.restart_at = now + restart_delay
+                else:
+                    print(f"[ORCH] {worker.run['run_id']} failed (exit code {exitcode}), no restarts left")
+                    active.remove(worker)
+    except KeyboardInterrupt:
+        print("\n[ORCH] Interrupted, stopping workers")
+    finally:
+        for worker in workers:
+            worker.stop()
+        _write_manifest(root, workers)
+    return [run for worker in workers for run in worker.runs]
+
+
+def _write_manifest(root, workers):
+    tmp_path = os.path.join(root, MANIFEST_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump([run for worker in workers for run in worker.runs], f, indent=2)
+    os.replace(tmp_path, os.path.join(root, MANIFEST_FILE))
+
+
+# === Merge ===
+def _run_output(run):
+    paths = glob.glob(os.path.join(run['dir'], '*_radar_data.csv')) + glob.glob(os.path.join(run['dir'], '*_radar_data.columnar'))
+    return paths[0] if paths else None
+
+
+def _iter_chunks(path):
+    if is_columnar(path):
+        yield from iter_row_groups(path)
+    else:
+        # A worker killed mid-write can leave a truncated last line
+        yield from pd.read_csv(path, chunksize=MERGE_CHUNK_ROWS, on_bad_lines='skip')
+
+
+def merge_runs(roots, out_dir):
+    """Stream the outputs of every run under `roots` into out_dir/<label>_radar_data.csv"""
+    runs = []
+    for root in roots:
+        with open(os.path.join(root, MANIFEST_FILE)) as f:
+            runs.extend(json.load(f))
+    os.makedirs(out_dir, exist_ok=True)
+    next_id = 0
+    summary = {}
+    for label in sorted({run['label'] for run in runs}):
+        path = os.path.join(out_dir, f'{label}_radar_data.csv')
+        rows = 0
+        with open(path, 'w', newline='') as f:
+            header = True
+            for run in (r for r in runs if r['label'] == label):
+                source = _run_output(run)
+                if source is None:
+                    continue
+                ids = {}
+                for chunk in _iter_chunks(source):
+                    chunk = chunk[chunk['vehicle_id'].notna()]
+                    source_ids = chunk['vehicle_id'].to_numpy(np.int64)
+                    uniques, inverse = np.unique(source_ids, return_inverse=True)
+                    for vehicle_id in uniques.tolist():
+                        if vehicle_id not in ids:
+                            ids[vehicle_id] = next_id
+                            next_id += 1
+                    merged_ids = np.array([ids[v] for v in uniques.tolist()], dtype=np.int64)[inverse]
+                    chunk = chunk.assign(vehicle_id=merged_ids, run_id=run['run_id'], source_vehicle_id=source_ids)
+                    chunk.to_csv(f, index=False, header=header)
+                    header = False
+                    rows += len(chunk)
+        summary[label] = (path, rows)
+        print(f"[MERGE] {label}: {rows} rows from {sum(r['label'] == label for r in runs)} runs -> {path}")
+    return summary
+
+
+def _parse_override(text):
+    name, _, value = text.partition('=')
+    try:
+        return name, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run radar loggers in parallel against several simulator servers')
+    parser.add_argument('workers', nargs='*', help='label@host:port[:tm_port], e.g. safe@localhost:2000')
+    parser.add_argument('--runtime', type=float, default=None, help='TOTAL_RUNTIME of every logger')
+    parser.add_argument('--restarts', type=int, default=MAX_RESTARTS, help='restarts per worker after a failure')
+    parser.add_argument('--restart-delay', type=float, default=RESTART_DELAY)
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help='override a logger config constant (Python literal), e.g. SYNCHRONOUS_MODE=False')
+    parser.add_argument('--root', default=None, help=f'run directory (default: {RUNS_DIR}/<timestamp>)')
+    parser.add_argument('--merge', nargs='+', metavar='ROOT', help='only merge existing run directories')
+    parser.add_argument('--output', default=None, help='merged dataset directory (default: <root>/merged)')
+    args = parser.parse_args()
+
+    if args.merge:
+        merge_runs(args.merge, args.output or os.path.join(args.merge[0], 'merged'))
+        return
+    if not args.workers:
+        parser.error('give at least one worker, or --merge')
+
+    specs = [parse_worker(text, i) for i, text in enumerate(args.workers)]
+    endpoints = [(s['host'], s['port']) for s in specs]
+    if len(set(endpoints)) != len(endpoints):
+        parser.error('every worker needs its own simulator server (host:port)')
+    overrides = dict(_parse_override(text) for text in args.set)
+    if args.runtime is not None:
+        overrides['TOTAL_RUNTIME'] = args.runtime
+
+    root = args.root or os.path.join(RUNS_DIR, time.strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(root, exist_ok=True)
+    print(f"[ORCH] {len(specs)} workers, runs under {root}")
+    runs = supervise(specs, root, overrides, args.restarts, args.restart_delay)
+    failed = [run['run_id'] for run in runs if run['exitcode'] != 0]
+    print(f"[ORCH] {len(runs)} runs, {len(failed)} failed{': ' + ', '.join(failed) if failed else ''}")
+    merge_runs([root], args.output or os.path.join(root, 'merged'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+# columnar_store.py (chunked columnar storage for collected sensor data)
+#
+# A dataset is a directory holding one compressed .npz file per row group
+# plus a schema.json describing the columns. String columns are dictionary
+# encoded (int32 codes + one shared dictionary per column), measurements are
+# stored as float32 and timestamps keep float64 precision.
+#
+# Usage:  python columnar_store.py safe_radar_data.csv [output_dir]
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = 'schema.json'
+KINDS = ('float32', 'float64', 'int32', 'int64', 'category')
+ROWS_PER_GROUP = 65536
+
+
+def infer_kind(name, dtype):
+    """Storage kind for a column, based on its name and pandas dtype"""
+    if name.lower() == 'timestamp':
+        return 'float64'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'int32'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'float32'
+    return 'category'
+
+
+class ColumnarWriter:
+    """Row-oriented writer (same writerow/writerows interface as csv.writer) that stores row groups"""
+
+    def __init__(self, path, columns, kinds, rows_per_group=ROWS_PER_GROUP, compress=True):
+        for name in columns:
+            if kinds.get(name) not in KINDS:
+                raise ValueError(f"Column '{name}' needs a storage kind from {KINDS}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.columns = list(columns)
+        self.kinds = {name: kinds[name] for name in self.columns}
+        self.rows_per_group = rows_per_group
+        self.compress = compress
+        self.categories = {name: {} for name in self.columns if self.kinds[name] == 'category'}
+        self.row_groups = []
+        self._pending = []
+
+    def writerow(self, row):
+        self.writerows([row])
+
+    def writerows(self, rows):
+        self._pending.extend(rows)
+        if len(self._pending) >= self.rows_per_group:
+            self._write_group()
+
+    def write_frame(self, df):
+        """Append a whole DataFrame as one row group"""
+        self._write_arrays({name: df[name].to_numpy() for name in self.columns}, len(df))
+
+    def flush(self):
+        if self._pending:
+            self._write_group()
+
+    def close(self):
+        self.flush()
+        self._write_schema()
+
+    def _write_group(self):
+        rows, self._pending = self._pending, []
+        values = list(zip(*rows))
+        self._write_arrays({name: values[i] for i, name in enumerate(self.columns)}, len(rows))
+
+    def _write_arrays(self, data, n_rows):
+        if n_rows == 0:
+            return
+        arrays = {}
+        for name in self.columns:
+            kind = self.kinds[name]
+            if kind == 'category':
+                arrays[name] = self._encode(name, data[name])
+            else:
+                arrays[name] = np.asarray(data[name], dtype=kind)
+
+        file_name = f'part-{len(self.row_groups):05d}.npz'
+        save = np.savez_compressed if self.compress else np.savez
+        save(os.path.join(self.path, file_name), **arrays)
+        self.row_groups.append({'file': file_name, 'rows': n_rows})
+        self._write_schema()
+
+    def _encode(self, name, values):
+        lookup = self.categories[name]
+        if isinstance(values, pd.Categorical):
+            values = values.astype(object)
+        uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        codes = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            codes[i] = lookup.setdefault(str(value), len(lookup))
+        return codes[inverse]
+
+    def _write_schema(self):
+        schema = {
+            'columns': self.columns,
+            'kinds': self.kinds,
+            'categories': {name: list(lookup) for name, lookup in self.categories.items()},
+            'row_groups': self.row_groups,
+        }
+        tmp_path = os.path.join(self.path, SCHEMA_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(schema, f)
+        os.replace(tmp_path, os.path.join(self.path, SCHEMA_FILE))
+
+
+def read_schema(path):
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        return json.load(f)
+
+
+def is_columnar(path):
+    return os.path.isfile(os.path.join(path, SCHEMA_FILE))
+
+
+def iter_row_groups(path, columns=None):
+    """Yield one DataFrame per stored row group"""
+    schema = read_schema(path)
+    columns = columns or schema['columns']
+    for group in schema['row_groups']:
+        with np.load(os.path.join(path, group['file'])) as arrays:
+            data = {}
+            for name in columns:
+                if schema['kinds'][name] == 'category':
+                    data[name] = pd.Categorical.from_codes(arrays[name], schema['categories'][name])
+                else:
+                    data[name] = arrays[name]
+        yield pd.DataFrame(data, columns=columns)
+
+
+def read_columnar(path, columns=None):
+    groups = list(iter_row_groups(path, columns))
+    if not groups:
+        schema = read_schema(path)
+        return pd.DataFrame(columns=columns or schema['columns'])
+    return pd.concat(groups, ignore_index=True)
+
+
+def read_table(path, **read_csv_kwargs):
+    """Load a dataset written either as CSV or as a columnar directory"""
+    if is_columnar(path):
+        return read_columnar(path)
+    return pd.read_csv(path, **read_csv_kwargs)
+
+
+def convert_csv(csv_path, out_path=None, chunksize=ROWS_PER_GROUP):
+    """Convert an existing CSV log into a columnar dataset, one row group per chunk"""
+    if out_path is None:
+        out_path = os.path.splitext(csv_path)[0] + '.columnar'
+    writer = None
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        if writer is None:
+            kinds = {name: infer_kind(name, dtype) for name, dtype in chunk.dtypes.items()}
+            writer = ColumnarWriter(out_path, list(chunk.columns), kinds, rows_per_group=chunksize)
+        writer.write_frame(chunk)
+    if writer is None:
+        raise ValueError(f"{csv_path} has no rows to convert")
+    writer.close()
+    return out_path
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python columnar_store.py <input.csv> [output_dir]")
+        sys.exit(1)
+    out = convert_csv(sys.argv[1], sys.argv[2] if len(sys.argv) == 3 else None)
+    print(f"[DONE] Columnar dataset written to {out}")
@@ -5,7 +5,11 @@ import csv
 import time
 
 #Improting Carla for simulation and data collection of vehicles.
-import carla
+from carla_backend import carla
+
+from actor_lifecycle import configure_vehicles, destroy_actors, report_errors, spawn_vehicles
+from lidar_ingest import LidarIngest
+from radar_association import ALTITUDE, AZIMUTH, DEPTH, VELOCITY, detections_to_array
 
 
 #Creating the client and world to connect to Carla 
@@ -15,11 +19,16 @@ client.set_timeout(10.0)
 world = client.load_world('Town01')
 blueprint_library = world.get_blueprint_library()
 
-#Creating CSV file for data collection from LIDAR AND RADAR sensors
+#Creating CSV file for data collection from the RADAR sensor
 csv_file = open('sensor_data.csv', 'w', newline='')
 csv_writer = csv.writer(csv_file)
 csv_writer.writerow(['Timestamp', 'sensor_type', 'x', 'y', 'z', 'velocity'])
 
+#LIDAR sweeps go to compressed binary chunks instead of one CSV row per point (lidar_ingest.py)
+LIDAR_DIR = 'lidar_data'
+LIDAR_VOXEL = 0.2  # voxel edge in meters (None keeps every point)
+lidar_ingest = LidarIngest(LIDAR_DIR, voxel_size=LIDAR_VOXEL)
+
 
 #Confirming that the world and client has connected to Carla successfully
 print(f"Connected to CARLA. Map: {world.get_map().name}")
@@ -42,20 +51,17 @@ for spawn_point in spawn_points:
 # Adding traffic to the simulation 
 traffic_manager = client.get_trafficmanager()
 spawn_points = world.get_map().get_spawn_points()
+traffic_manager.set_hybrid_physics_mode(True)
 vehicles_list = []
-for i in range(15):
-    vehicle_bp = random.choice(blueprint_library.filter('vehicle.*'))
-    for spawn_point in spawn_points:
-        try: 
-            vehicle = world.spawn_actor(vehicle_bp, spawn_point)
-            vehicle.set_autopilot(True, traffic_manager.get_port())
-            traffic_manager.auto_lane_change(vehicle, True)
-            traffic_manager.set_hybrid_physics_mode(True)
-            traffic_manager.vehicle_percentage_speed_difference(vehicle, 50)
-            vehicles_list.append(vehicle)
-            break
-        except RuntimeError:
-            continue
+vehicle_bps = blueprint_library.filter('vehicle.*')
+#Spawning (with autopilot) in batches on the free spawn points until there are 15 vehicles
+remaining_points = list(spawn_points)
+while len(vehicles_list) < 15 and remaining_points:
+    batch = remaining_points[:15 - len(vehicles_list)]
+    remaining_points = remaining_points[len(batch):]
+    spawned, _ = spawn_vehicles(client, [(random.choice(vehicle_bps), sp) for sp in batch], traffic_manager.get_port())
+    configure_vehicles(traffic_manager, spawned, {'auto_lane_change': True, 'vehicle_percentage_speed_difference': 50})
+    vehicles_list.extend(spawned)
 
 #Ensuring that there are actually vehicles running in the simulation
 print("The vehicles are: ", vehicles_list)
@@ -64,19 +70,19 @@ print("The vehicles are: ", vehicles_list)
 
 # Saving data function
 def save_data(sensor_type, sensor_data):
-    #Filter if the data is not an actual dirver in the simulation (for example, just a tree). 
-    for data in sensor_data:
-        if sensor_type == 'RADAR':
-            csv_writer.writerow([time.time(), sensor_type, data.depth, data.azimuth, data.altitude, data.velocity])
-        elif sensor_type == 'LIDAR':
-            csv_writer.writerow([time.time(), sensor_type, data.point.x, data.point.y, data.point.z, None])
+    #The whole measurement is read from its raw buffer at once and stamped with its simulation time
+    detections = detections_to_array(sensor_data)
+    csv_writer.writerows(
+        [sensor_data.timestamp, sensor_type, d[DEPTH], d[AZIMUTH], d[ALTITUDE], d[VELOCITY]]
+        for d in detections
+    )
 
 
 # Create the LIDAR sensors and start data collecting
 lidar_blueprint = blueprint_library.find('sensor.lidar.ray_cast')
 lidar_transform = carla.Transform(carla.Location(z=2.5))
 lidar_sensor = world.spawn_actor(lidar_blueprint, lidar_transform, attach_to=test_vehicle)
-lidar_sensor.listen(lambda data: save_data('LIDAR', data))
+lidar_sensor.listen(lidar_ingest)
 
 #Create the RADAR sensors and start collecting data
 radar_blueprint = blueprint_library.find('sensor.other.radar')
@@ -99,10 +105,11 @@ finally:
     # Stop the sensors and vehicles
     lidar_sensor.stop()
     radar_sensor.stop()
-    test_vehicle.destroy()
-    for vehicle in vehicles_list:
-        vehicle.destroy()
+    destroyed, errors = destroy_actors(client, [test_vehicle] + vehicles_list)
+    report_errors('DESTROY', errors)
     
+    lidar_ingest.close()
+    lidar_ingest.print_stats()
     csv_file.close()
 
 
@@ -0,0 +1,188 @@
+# dataset_cache.py (parse each raw log once, keep a compact binary copy keyed by its content)
+#
+# load_log() reads a sensor / radar log (CSV or columnar directory) with
+# compact types and caches the result under dataset_cache/ as an
+# uncompressed columnar dataset, keyed by a sha256 of the file contents:
+#
+#   measurements      float32
+#   vehicle_id        int32
+#   string columns    categorical (sensor_id, sensor_type, label, ...)
+#   timestamps        int64 nanoseconds
+#
+# Later loads of the same file skip the CSV parser entirely. Content hashes
+# are remembered per (path, size, mtime), so an unchanged file is not even
+# re-read to find its cache entry. By default the timestamp columns are
+# handed back as float64 seconds, which is what the feature code expects.
+#
+# Usage:  python dataset_cache.py safe_radar_data.csv [more logs ...]
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import ColumnarWriter, is_columnar, read_columnar, read_table
+
+CACHE_VERSION = 1  # bump when the compact layout changes so cached logs are re-parsed
+CACHE_DIR = 'dataset_cache'
+DIGEST_FILE = 'digests.json'
+NS_PER_SECOND = 1_000_000_000
+
+
+# === Timestamps ===
+def is_timestamp(name):
+    return name.lower() == 'timestamp'
+
+
+def seconds_to_ns(seconds):
+    """float seconds -> int64 nanoseconds, splitting off the whole seconds to keep full precision"""
+    seconds = np.asarray(seconds, dtype=np.float64)
+    if not np.isfinite(seconds).all():
+        raise ValueError("Timestamps must be finite to be stored as nanoseconds")
+    whole = np.floor(seconds)
+    return whole.astype(np.int64) * NS_PER_SECOND + np.rint((seconds - whole) * NS_PER_SECOND).astype(np.int64)
+
+
+def ns_to_seconds(ns):
+    ns = np.asarray(ns, dtype=np.int64)
+    whole = ns // NS_PER_SECOND
+    return whole.astype(np.float64) + (ns - whole * NS_PER_SECOND) / NS_PER_SECOND
+
+
+# === Compact types ===
+def compact_kind(name, series):
+    """Columnar storage kind of a log column"""
+    if is_timestamp(name):
+        return 'int64'
+    if name == 'vehicle_id':
+        # Ids are small integers; a log with unmatched rows keeps them as float (NaN)
+        return 'int32' if series.notna().all() else 'float32'
+    if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+        return 'category'
+    if pd.api.types.is_integer_dtype(series):
+        return 'int32'
+    return 'float32'
+
+
+def compact_frame(df):
+    """(frame, kinds) with every column converted to its compact type"""
+    kinds = {name: compact_kind(name, df[name]) for name in df.columns}
+    data = {}
+    for name, kind in kinds.items():
+        if is_timestamp(name):
+            data[name] = seconds_to_ns(df[name].to_numpy(np.float64))
+        elif kind == 'category':
+            data[name] = df[name].astype('category')
+        else:
+            data[name] = df[name].to_numpy(kind)
+    return pd.DataFrame(data, columns=df.columns), kinds
+
+
+# === Content hashes ===
+def file_digest(path, block_size=1 << 20):
+    """sha256 of a file's contents, or of every file of a columnar dataset directory"""
+    h = hashlib.sha256()
+    paths = [os.path.join(path, name) for name in sorted(os.listdir(path))] if os.path.isdir(path) else [path]
+    for p in paths:
+        h.update(os.path.basename(p).encode())
+        with open(p, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                h.update(block)
+    return h.hexdigest()
+
+
+def _signature(path):
+    paths = [os.path.join(path, name) for name in sorted(os.listdir(path))] if os.path.isdir(path) else [path]
+    return [[os.path.basename(p), os.stat(p).st_size, os.stat(p).st_mtime_ns] for p in paths]
+
+
+# === Cache ===
+class DatasetCache:
+    """Compact parsed copies of raw logs under `root`, keyed by content hash"""
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self._digests = None
+
+    def digest(self, path):
+        """Content hash of `path`; recomputed only when its size or modification time changed"""
+        digests = self._load_digests()
+        key = os.path.abspath(path)
+        signature = _signature(path)
+        entry = digests.get(key)
+        if entry is not None and entry['signature'] == signature:
+            return entry['digest']
+        digest = file_digest(path)
+        digests[key] = {'signature': signature, 'digest': digest}
+        self._save_digests()
+        return digest
+
+    def path_for(self, path):
+        return os.path.join(self.root, f'{self.digest(path)[:24]}-v{CACHE_VERSION}')
+
+    def load(self, path, seconds=True):
+        """Compact DataFrame of a log; timestamps as float seconds, or int64 ns with seconds=False"""
+        cached = self.path_for(path)
+        if is_columnar(cached):
+            df = read_columnar(cached)
+        else:
+            df, kinds = compact_frame(read_table(path))
+            self._save(df, kinds, cached)
+        if seconds:
+            for name in df.columns:
+                if is_timestamp(name):
+                    df[name] = ns_to_seconds(df[name].to_numpy())
+        return df
+
+    def _save(self, df, kinds, path):
+        # Written next to its final place and renamed, so readers never see a partial copy
+        tmp_path = path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        writer = ColumnarWriter(tmp_path, list(df.columns), kinds, compress=False)
+        writer.write_frame(df)
+        writer.close()
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+    def _load_digests(self):
+        if self._digests is None:
+            try:
+                with open(os.path.join(self.root, DIGEST_FILE)) as f:
+                    self._digests = json.load(f)
+            except (OSError, ValueError):
+                self._digests = {}
+        return self._digests
+
+    def _save_digests(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, DIGEST_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self._digests, f)
+        os.replace(tmp_path, os.path.join(self.root, DIGEST_FILE))
+
+
+_default_cache = DatasetCache()
+
+
+def load_log(path, seconds=True):
+    """Load a raw log through the default cache under dataset_cache/"""
+    return _default_cache.load(path, seconds)
+
+
+def log_digest(path):
+    """Content hash of a raw log, remembered by the default cache"""
+    return _default_cache.digest(path)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python dataset_cache.py <log> [more logs ...]")
+        sys.exit(1)
+    for log in sys.argv[1:]:
+        df = load_log(log)
+        mb = df.memory_usage(deep=True).sum() / 1e6
+        print(f"[CACHE] {log}: {len(df)} rows, {mb:.1f} MB in memory -> {_default_cache.path_for(log)}")
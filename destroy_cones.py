@@ -1,4 +1,6 @@
-import carla
+from carla_backend import carla
+
+from actor_lifecycle import destroy_actors, report_errors
 
 # === Connect to CARLA ===
 client = carla.Client('localhost', 2000)
@@ -11,9 +13,10 @@ all_actors = world.get_actors()
 # === Filter only traffic cones ===
 cones = [actor for actor in all_actors if 'trafficcone' in actor.type_id]
 
-# === Destroy each cone ===
+# === Destroy all cones in one batch ===
 for cone in cones:
     print(f"[-] Destroying cone at {cone.get_location()}")
-    cone.destroy()
+destroyed, errors = destroy_actors(client, cones)
+report_errors('!', errors)
 
-print(f"[✓] Cleared {len(cones)} traffic cones.")
+print(f"[✓] Cleared {destroyed} traffic cones.")
@@ -1,4 +1,6 @@
-import carla
+from carla_backend import carla
+
+from actor_lifecycle import destroy_actors, report_errors
 
 client = carla.Client("localhost", 2000)
 client.set_timeout(10.0)
@@ -6,13 +8,16 @@ world = client.get_world()
 
 # Get all vehicles and destroy those that aren't moving
 vehicles = world.get_actors().filter("vehicle.*")
-destroyed = 0
+stuck = []
 
 for vehicle in vehicles:
     velocity = vehicle.get_velocity()
     speed = (velocity.x**2 + velocity.y**2 + velocity.z**2) ** 0.5  # Calculate speed
     if speed < 0.1:  # Considered "stuck"
-        vehicle.destroy()
-        destroyed += 1
+        stuck.append(vehicle)
+
+# Destroy them all in one batch
+destroyed, errors = destroy_actors(client, stuck)
+report_errors('DESTROY', errors)
 
 print(f"Destroyed {destroyed} non-moving NPC vehicles.")
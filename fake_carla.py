@@ -0,0 +1,952 @@
+# fake_carla.py (in-process stand-in for the subset of the CARLA API this project uses)
+#
+# Selected with CARLA_BACKEND=fake (see carla_backend.py). Vehicles under
+# autopilot drive straight along the road heading with a simple kinematic
+# model, radars report detections for every vehicle inside their field of
+# view, lidars return the road surface plus a box of points per vehicle in
+# range, and every call that is a round-trip in the real client can be given
+# an artificial latency. Tunables live in DEFAULTS and can be changed with
+# configure() before a world is created, or per world with World.configure().
+
+import fnmatch
+import itertools
+import math
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+DEFAULTS = {
+    'async_step_seconds': 0.05,   # step of the background simulation thread in asynchronous mode
+    'vehicle_speed': 8.0,         # autopilot cruise speed (m/s) at 0% speed difference
+    'max_acceleration': 3.0,      # m/s^2 used to approach the target speed
+    'speed_noise': 0.3,           # std of random acceleration added every step (m/s^2)
+    'detections_per_vehicle': 4,  # radar hits per visible vehicle per frame
+    'clutter_detections': 2,      # radar hits on static scenery per frame
+    'lidar_points_per_vehicle': 200,  # lidar returns per vehicle in range per frame
+    'rpc_latency': 0.0,           # seconds slept by calls that are round-trips in the real client
+    'load_world_seconds': 0.0,    # simulated map load time
+    'road_yaw': 180.0,            # heading of waypoints returned by Map.get_waypoint
+    'seed': 0,
+}
+
+
+def configure(**settings):
+    """Change the defaults used by worlds created from now on"""
+    unknown = set(settings) - set(DEFAULTS)
+    if unknown:
+        raise KeyError(f"Unknown fake_carla settings: {sorted(unknown)}")
+    DEFAULTS.update(settings)
+
+
+# === Geometry ===
+class Vector3D:
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    def __add__(self, other):
+        return type(self)(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return type(self)(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, k):
+        return type(self)(self.x * k, self.y * k, self.z * k)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        return (self.x, self.y, self.z) == (other.x, other.y, other.z)
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(x={self.x:.6f}, y={self.y:.6f}, z={self.z:.6f})"
+
+
+class Location(Vector3D):
+    def distance(self, other):
+        return (self - other).length()
+
+
+class Rotation:
+    def __init__(self, pitch=0.0, yaw=0.0, roll=0.0):
+        self.pitch = float(pitch)
+        self.yaw = float(yaw)
+        self.roll = float(roll)
+
+    def get_forward_vector(self):
+        cp, sp = math.cos(math.radians(self.pitch)), math.sin(math.radians(self.pitch))
+        cy, sy = math.cos(math.radians(self.yaw)), math.sin(math.radians(self.yaw))
+        return Vector3D(cp * cy, cp * sy, sp)
+
+    def __repr__(self):
+        return f"Rotation(pitch={self.pitch:.6f}, yaw={self.yaw:.6f}, roll={self.roll:.6f})"
+
+
+class Transform:
+    def __init__(self, location=None, rotation=None):
+        self.location = location if location is not None else Location()
+        self.rotation = rotation if rotation is not None else Rotation()
+
+    def get_forward_vector(self):
+        return self.rotation.get_forward_vector()
+
+    def __repr__(self):
+        return f"Transform({self.location}, {self.rotation})"
+
+
+class LaneType:
+    Driving = 2
+    Any = -2
+
+
+class ColorConverter:
+    Raw = 0
+
+
+class WorldSettings:
+    def __init__(self, synchronous_mode=False, fixed_delta_seconds=None, no_rendering_mode=False):
+        self.synchronous_mode = synchronous_mode
+        self.fixed_delta_seconds = fixed_delta_seconds
+        self.no_rendering_mode = no_rendering_mode
+
+    def _copy(self):
+        return WorldSettings(self.synchronous_mode, self.fixed_delta_seconds, self.no_rendering_mode)
+
+
+# === Blueprints ===
+class ActorAttribute:
+    def __init__(self, id, value):
+        self.id = id
+        self.value = str(value)
+
+    def as_float(self):
+        return float(self.value)
+
+    def as_int(self):
+        return int(self.value)
+
+    def as_str(self):
+        return self.value
+
+    def __str__(self):
+        return self.value
+
+
+class ActorBlueprint:
+    def __init__(self, id, attributes=None):
+        self.id = id
+        self.tags = id.split('.')[1:]
+        self._attributes = {k: str(v) for k, v in (attributes or {}).items()}
+
+    def has_attribute(self, id):
+        return id in self._attributes
+
+    def get_attribute(self, id):
+        if id not in self._attributes:
+            raise IndexError(f"Blueprint '{self.id}' has no attribute '{id}'")
+        return ActorAttribute(id, self._attributes[id])
+
+    def set_attribute(self, id, value):
+        if id not in self._attributes:
+            raise IndexError(f"Blueprint '{self.id}' has no attribute '{id}'")
+        self._attributes[id] = str(value)
+
+    def __repr__(self):
+        return f"ActorBlueprint(id={self.id}, tags={self.tags})"
+
+
+VEHICLE_IDS = [
+    'vehicle.audi.tt', 'vehicle.carlamotors.carlacola', 'vehicle.lincoln.mkz_2017',
+    'vehicle.mini.cooper_s', 'vehicle.nissan.micra', 'vehicle.tesla.model3', 'vehicle.toyota.prius',
+]
+SENSOR_ATTRIBUTES = {
+    'sensor.other.radar': {
+        'horizontal_fov': 30, 'vertical_fov': 30, 'range': 100, 'points_per_second': 1500, 'sensor_tick': 0.0,
+    },
+    'sensor.camera.rgb': {'image_size_x': 800, 'image_size_y': 600, 'fov': 90, 'sensor_tick': 0.0},
+    'sensor.lidar.ray_cast': {
+        'channels': 32, 'range': 10, 'points_per_second': 56000, 'rotation_frequency': 10,
+        'upper_fov': 10, 'lower_fov': -30, 'sensor_tick': 0.0,
+    },
+}
+PROP_IDS = ['static.prop.trafficcone01']
+
+
+class BlueprintLibrary:
+    def __init__(self, blueprints):
+        self._blueprints = list(blueprints)
+
+    def find(self, id):
+        for bp in self._blueprints:
+            if bp.id == id:
+                # Each lookup hands out a fresh copy, like the real library
+                return ActorBlueprint(bp.id, bp._attributes)
+        raise IndexError(f"Blueprint '{id}' not found")
+
+    def filter(self, wildcard_pattern):
+        return BlueprintLibrary(
+            bp for bp in self._blueprints
+            if fnmatch.fnmatch(bp.id, wildcard_pattern) or any(fnmatch.fnmatch(t, wildcard_pattern) for t in bp.tags)
+        )
+
+    def __len__(self):
+        return len(self._blueprints)
+
+    def __getitem__(self, index):
+        return self._blueprints[index]
+
+    def __iter__(self):
+        return iter(self._blueprints)
+
+
+def _default_blueprints():
+    blueprints = [ActorBlueprint(id, {'role_name': 'autopilot'}) for id in VEHICLE_IDS]
+    blueprints += [ActorBlueprint(id, attrs) for id, attrs in SENSOR_ATTRIBUTES.items()]
+    blueprints += [ActorBlueprint(id) for id in PROP_IDS]
+    return BlueprintLibrary(blueprints)
+
+
+# === Sensor data ===
+class SensorData:
+    def __init__(self, frame, timestamp, transform):
+        self.frame = frame
+        self.timestamp = timestamp
+        self.transform = transform
+
+
+class RadarDetection:
+    def __init__(self, velocity, azimuth, altitude, depth):
+        self.velocity = velocity
+        self.azimuth = azimuth
+        self.altitude = altitude
+        self.depth = depth
+
+    def __repr__(self):
+        return (f"RadarDetection(velocity={self.velocity:.6f}, azimuth={self.azimuth:.6f}, "
+                f"altitude={self.altitude:.6f}, depth={self.depth:.6f})")
+
+
+class RadarMeasurement(SensorData):
+    """Detections stored as packed float32 (velocity, azimuth, altitude, depth), like the real buffer"""
+
+    def __init__(self, frame, timestamp, transform, detections):
+        super().__init__(frame, timestamp, transform)
+        self._detections = np.ascontiguousarray(detections, dtype=np.float32).reshape(-1, 4)
+        self.raw_data = memoryview(self._detections.tobytes())
+
+    def get_detection_count(self):
+        return len(self._detections)
+
+    def __len__(self):
+        return len(self._detections)
+
+    def __getitem__(self, index):
+        return RadarDetection(*(float(v) for v in self._detections[index]))
+
+    def __iter__(self):
+        for row in self._detections.tolist():
+            yield RadarDetection(*row)
+
+
+class LidarDetection:
+    def __init__(self, x, y, z, intensity):
+        self.point = Location(x, y, z)
+        self.intensity = intensity
+
+    def __repr__(self):
+        return f"LidarDetection(point={self.point!r}, intensity={self.intensity:.6f})"
+
+
+class LidarMeasurement(SensorData):
+    """Points stored as packed float32 (x, y, z, intensity) in the sensor frame, like the real buffer"""
+
+    def __init__(self, frame, timestamp, transform, points, channels, horizontal_angle):
+        super().__init__(frame, timestamp, transform)
+        self._points = np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 4)
+        self.raw_data = memoryview(self._points.tobytes())
+        self.channels = channels
+        self.horizontal_angle = horizontal_angle
+
+    def get_point_count(self, channel):
+        per_channel, rest = divmod(len(self._points), self.channels)
+        return per_channel + (channel < rest)
+
+    def __len__(self):
+        return len(self._points)
+
+    def __getitem__(self, index):
+        return LidarDetection(*(float(v) for v in self._points[index]))
+
+    def __iter__(self):
+        for row in self._points.tolist():
+            yield LidarDetection(*row)
+
+
+class Image(SensorData):
+    """BGRA frame; save_to_disk writes the raw buffer since the fake has no image encoder"""
+
+    def __init__(self, frame, timestamp, transform, width, height, fov, raw_data):
+        super().__init__(frame, timestamp, transform)
+        self.width = width
+        self.height = height
+        self.fov = fov
+        self.raw_data = raw_data
+
+    def save_to_disk(self, path, color_converter=ColorConverter.Raw):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(self.raw_data)
+
+
+# === Actors ===
+class Actor:
+    def __init__(self, world, id, blueprint, transform, parent=None):
+        self._world = world
+        self.id = id
+        self.type_id = blueprint.id if blueprint else 'spectator'
+        self.attributes = dict(blueprint._attributes) if blueprint else {}
+        self.parent = parent
+        self._transform = Transform(
+            Location(transform.location.x, transform.location.y, transform.location.z),
+            Rotation(transform.rotation.pitch, transform.rotation.yaw, transform.rotation.roll),
+        )
+        self._velocity = Vector3D()
+        self._acceleration = Vector3D()
+        self._angular_velocity = Vector3D()
+        self._alive = True
+
+    @property
+    def is_alive(self):
+        return self._alive
+
+    def _check_alive(self):
+        if not self._alive:
+            raise RuntimeError(f"trying to operate on a destroyed actor; an actor's function was called, "
+                               f"but the actor is already destroyed. (actor id {self.id})")
+
+    def _world_transform(self):
+        if self.parent is None:
+            return self._transform
+        parent = self.parent._transform
+        yaw = math.radians(parent.rotation.yaw)
+        local = self._transform.location
+        return Transform(
+            Location(parent.location.x + local.x * math.cos(yaw) - local.y * math.sin(yaw),
+                     parent.location.y + local.x * math.sin(yaw) + local.y * math.cos(yaw),
+                     parent.location.z + local.z),
+            Rotation(parent.rotation.pitch + self._transform.rotation.pitch,
+                     parent.rotation.yaw + self._transform.rotation.yaw,
+                     parent.rotation.roll + self._transform.rotation.roll),
+        )
+
+    def get_transform(self):
+        self._world._rpc()
+        self._check_alive()
+        t = self._world_transform()
+        return Transform(Location(t.location.x, t.location.y, t.location.z),
+                         Rotation(t.rotation.pitch, t.rotation.yaw, t.rotation.roll))
+
+    def get_location(self):
+        return self.get_transform().location
+
+    def get_velocity(self):
+        self._world._rpc()
+        self._check_alive()
+        return Vector3D(self._velocity.x, self._velocity.y, self._velocity.z)
+
+    def get_acceleration(self):
+        self._world._rpc()
+        self._check_alive()
+        return Vector3D(self._acceleration.x, self._acceleration.y, self._acceleration.z)
+
+    def get_angular_velocity(self):
+        self._world._rpc()
+        self._check_alive()
+        return Vector3D(self._angular_velocity.x, self._angular_velocity.y, self._angular_velocity.z)
+
+    def set_transform(self, transform):
+        self._world._rpc()
+        self._check_alive()
+        self._transform = Transform(
+            Location(transform.location.x, transform.location.y, transform.location.z),
+            Rotation(transform.rotation.pitch, transform.rotation.yaw, transform.rotation.roll),
+        )
+
+    def destroy(self):
+        self._world._rpc()
+        return self._world._remove_actor(self)
+
+    def _step(self, dt, rng):
+        pass
+
+    def __repr__(self):
+        return f"Actor(id={self.id}, type={self.type_id})"
+
+
+class Vehicle(Actor):
+    def __init__(self, world, id, blueprint, transform, parent=None):
+        super().__init__(world, id, blueprint, transform, parent)
+        self.autopilot = False
+        self.speed_difference = 0.0
+        self.tm_settings = {}
+        self._speed = 0.0
+
+    def set_autopilot(self, enabled=True, port=8000):
+        self._world._rpc()
+        self._check_alive()
+        self.autopilot = bool(enabled)
+
+    def _step(self, dt, rng):
+        config = self._world.config
+        target = config['vehicle_speed'] * (1.0 - self.speed_difference / 100.0) if self.autopilot else 0.0
+        accel = max(-2 * config['max_acceleration'], min(config['max_acceleration'], (target - self._speed) / dt))
+        accel += rng.gauss(0.0, config['speed_noise']) if self.autopilot else 0.0
+        self._speed = max(0.0, self._speed + accel * dt)
+
+        forward = self._transform.rotation.get_forward_vector()
+        self._acceleration = forward * accel
+        self._velocity = forward * self._speed
+        self._transform.location = self._transform.location + Location(
+            forward.x * self._speed * dt, forward.y * self._speed * dt, 0.0)
+
+
+class Sensor(Actor):
+    def __init__(self, world, id, blueprint, transform, parent=None):
+        super().__init__(world, id, blueprint, transform, parent)
+        self._callback = None
+
+    @property
+    def is_listening(self):
+        return self._callback is not None
+
+    def listen(self, callback):
+        self._world._rpc()
+        self._check_alive()
+        self._callback = callback
+
+    def stop(self):
+        self._world._rpc()
+        self._callback = None
+
+    def _measure(self, frame, timestamp, vehicles, rng):
+        raise NotImplementedError
+
+
+class RadarSensor(Sensor):
+    def _measure(self, frame, timestamp, vehicles, rng):
+        config = self._world.config
+        transform = self._world_transform()
+        origin = transform.location
+        yaw = math.radians(transform.rotation.yaw)
+        pitch = math.radians(transform.rotation.pitch)
+        max_range = float(self.attributes['range'])
+        half_hfov = math.radians(float(self.attributes['horizontal_fov'])) / 2
+        half_vfov = math.radians(float(self.attributes['vertical_fov'])) / 2
+
+        rows = []
+        for vehicle in vehicles:
+            rel = vehicle._transform.location - origin
+            depth = rel.length()
+            if depth == 0.0 or depth > max_range:
+                continue
+            azimuth = math.atan2(rel.y, rel.x) - yaw
+            azimuth = math.atan2(math.sin(azimuth), math.cos(azimuth))
+            altitude = math.atan2(rel.z, math.hypot(rel.x, rel.y)) - pitch
+            if abs(azimuth) > half_hfov or abs(altitude) > half_vfov:
+                continue
+            radial = (vehicle._velocity.x * rel.x + vehicle._velocity.y * rel.y + vehicle._velocity.z * rel.z) / depth
+            for _ in range(config['detections_per_vehicle']):
+                rows.append((
+                    radial + rng.gauss(0.0, 0.05),
+                    azimuth + rng.uniform(-0.02, 0.02),
+                    altitude + rng.uniform(-0.01, 0.01),
+                    max(0.0, depth + rng.uniform(-1.0, 1.0)),
+                ))
+        for _ in range(config['clutter_detections']):
+            rows.append((0.0, rng.uniform(-half_hfov, half_hfov), rng.uniform(-half_vfov, half_vfov),
+                         rng.uniform(1.0, max_range)))
+        return RadarMeasurement(frame, timestamp, transform, rows)
+
+
+class LidarSensor(Sensor):
+    def _measure(self, frame, timestamp, vehicles, rng):
+        transform = self._world_transform()
+        origin = transform.location
+        yaw = math.radians(transform.rotation.yaw)
+        max_range = float(self.attributes['range'])
+        dt = self._world._settings.fixed_delta_seconds or self._world.config['async_step_seconds']
+        np_rng = np.random.default_rng(rng.getrandbits(32))
+
+        # Road surface (world z = 0) at random ranges and azimuths around the sensor
+        n = int(float(self.attributes['points_per_second']) * dt)
+        distance = np_rng.uniform(1.0, max_range, n)
+        azimuth = np_rng.uniform(-math.pi, math.pi, n)
+        blocks = [np.column_stack([distance * np.cos(azimuth), distance * np.sin(azimuth),
+                                   np.full(n, -origin.z), np_rng.uniform(0.1, 0.3, n)])]
+
+        # A 4.5 x 1.8 x 1.5 m box of returns per vehicle in range
+        k = self._world.config['lidar_points_per_vehicle']
+        for vehicle in vehicles:
+            rel = vehicle._transform.location - origin
+            if rel.length() > max_range:
+                continue
+            x = rel.x * math.cos(yaw) + rel.y * math.sin(yaw)
+            y = -rel.x * math.sin(yaw) + rel.y * math.cos(yaw)
+            box = np_rng.uniform((-2.25, -0.9, 0.0), (2.25, 0.9, 1.5), (k, 3)) + (x, y, rel.z)
+            blocks.append(np.column_stack([box, np_rng.uniform(0.5, 1.0, k)]))
+        angle = (360.0 * float(self.attributes['rotation_frequency']) * timestamp) % 360.0
+        return LidarMeasurement(frame, timestamp, transform, np.concatenate(blocks),
+                                int(self.attributes['channels']), angle)
+
+
+class CameraSensor(Sensor):
+    def _measure(self, frame, timestamp, vehicles, rng):
+        width = int(self.attributes['image_size_x'])
+        height = int(self.attributes['image_size_y'])
+        raw = bytes([frame % 256]) * (width * height * 4)
+        return Image(frame, timestamp, self._world_transform(), width, height,
+                     float(self.attributes['fov']), raw)
+
+
+# === Snapshots ===
+class Timestamp:
+    def __init__(self, frame, elapsed_seconds, delta_seconds):
+        self.frame = frame
+        self.elapsed_seconds = elapsed_seconds
+        self.delta_seconds = delta_seconds
+        self.platform_timestamp = time.time()
+
+
+class ActorSnapshot:
+    """State of one actor at a frame; reading it is local, no round-trip"""
+
+    def __init__(self, actor):
+        t = actor._world_transform()
+        self.id = actor.id
+        self._transform = Transform(Location(t.location.x, t.location.y, t.location.z),
+                                    Rotation(t.rotation.pitch, t.rotation.yaw, t.rotation.roll))
+        self._velocity = Vector3D(actor._velocity.x, actor._velocity.y, actor._velocity.z)
+        self._acceleration = Vector3D(actor._acceleration.x, actor._acceleration.y, actor._acceleration.z)
+        self._angular_velocity = Vector3D(actor._angular_velocity.x, actor._angular_velocity.y, actor._angular_velocity.z)
+
+    def get_transform(self):
+        return self._transform
+
+    def get_velocity(self):
+        return self._velocity
+
+    def get_acceleration(self):
+        return self._acceleration
+
+    def get_angular_velocity(self):
+        return self._angular_velocity
+
+
+class WorldSnapshot:
+    def __init__(self, world_id, timestamp, actors):
+        self.id = world_id
+        self.frame = timestamp.frame
+        self.timestamp = timestamp
+        self._actors = {a.id: ActorSnapshot(a) for a in actors}
+
+    def find(self, actor_id):
+        return self._actors.get(actor_id)
+
+    def has_actor(self, actor_id):
+        return actor_id in self._actors
+
+    def __len__(self):
+        return len(self._actors)
+
+    def __iter__(self):
+        return iter(self._actors.values())
+
+
+# === Map ===
+class Waypoint:
+    def __init__(self, transform, lane_type=LaneType.Driving):
+        self.transform = transform
+        self.lane_type = lane_type
+
+
+class Map:
+    def __init__(self, name, road_yaw):
+        self.name = f'Carla/Maps/{name}'
+        self._road_yaw = road_yaw
+
+    def get_waypoint(self, location, project_to_road=True, lane_type=LaneType.Driving):
+        return Waypoint(Transform(Location(location.x, location.y, 0.3), Rotation(yaw=self._road_yaw)), lane_type)
+
+    def get_spawn_points(self):
+        return [Transform(Location(150.0 - 12.0 * i, 57.0, 0.3), Rotation(yaw=self._road_yaw)) for i in range(20)]
+
+
+# === World ===
+class ActorList(list):
+    def filter(self, wildcard_pattern):
+        return ActorList(a for a in self if fnmatch.fnmatch(a.type_id, wildcard_pattern))
+
+    def find(self, actor_id):
+        for actor in self:
+            if actor.id == actor_id:
+                return actor
+        return None
+
+
+class World:
+    def __init__(self, map_name='Town01', **config):
+        self.config = dict(DEFAULTS)
+        self.configure(**config)
+        self.id = next(_world_ids)
+        self.map_name = map_name
+        self.frame = 0
+        self.elapsed_seconds = 0.0
+        self.rpc_calls = 0
+        self._settings = WorldSettings()
+        self._actors = {}
+        self._actor_ids = itertools.count(100)
+        self._lock = threading.RLock()
+        self._rng = random.Random(self.config['seed'])
+        self._map = Map(map_name, self.config['road_yaw'])
+        self._blueprints = _default_blueprints()
+        self._spectator = Actor(self, 0, None, Transform())
+        self._tick_callbacks = {}
+        self._tick_callback_ids = itertools.count(1)
+        self._snapshot = WorldSnapshot(self.id, Timestamp(0, 0.0, 0.0), [])
+        self._tick_event = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run_async, name='FakeCarlaWorld', daemon=True)
+        self._thread.start()
+
+    def configure(self, **settings):
+        unknown = set(settings) - set(DEFAULTS)
+        if unknown:
+            raise KeyError(f"Unknown fake_carla settings: {sorted(unknown)}")
+        self.config.update(settings)
+
+    def _rpc(self):
+        self.rpc_calls += 1
+        if self.config['rpc_latency']:
+            time.sleep(self.config['rpc_latency'])
+
+    # --- API ---
+    def get_blueprint_library(self):
+        self._rpc()
+        return self._blueprints
+
+    def get_map(self):
+        self._rpc()
+        return self._map
+
+    def get_spectator(self):
+        return self._spectator
+
+    def get_settings(self):
+        self._rpc()
+        return self._settings._copy()
+
+    def apply_settings(self, settings):
+        self._rpc()
+        with self._lock:
+            self._settings = settings._copy()
+        return self.frame
+
+    def get_actors(self, actor_ids=None):
+        self._rpc()
+        with self._lock:
+            actors = list(self._actors.values())
+        if actor_ids is not None:
+            wanted = set(actor_ids)
+            actors = [a for a in actors if a.id in wanted]
+        return ActorList(actors)
+
+    def spawn_actor(self, blueprint, transform, attach_to=None):
+        actor = self.try_spawn_actor(blueprint, transform, attach_to)
+        if actor is None:
+            raise RuntimeError("Spawn failed because of collision at spawn position")
+        return actor
+
+    def try_spawn_actor(self, blueprint, transform, attach_to=None):
+        self._rpc()
+        return self._spawn(blueprint, transform, attach_to)
+
+    def _spawn(self, blueprint, transform, attach_to=None):
+        if blueprint.id.startswith('vehicle.'):
+            cls = Vehicle
+        elif blueprint.id == 'sensor.other.radar':
+            cls = RadarSensor
+        elif blueprint.id.startswith('sensor.camera.'):
+            cls = CameraSensor
+        elif blueprint.id.startswith('sensor.lidar.'):
+            cls = LidarSensor
+        else:
+            cls = Actor
+        with self._lock:
+            if cls is Vehicle and self._blocked(transform.location):
+                return None
+            actor = cls(self, next(self._actor_ids), blueprint, transform, parent=attach_to)
+            self._actors[actor.id] = actor
+        return actor
+
+    def get_snapshot(self):
+        self._rpc()
+        return self._snapshot
+
+    def on_tick(self, callback):
+        callback_id = next(self._tick_callback_ids)
+        self._tick_callbacks[callback_id] = callback
+        return callback_id
+
+    def remove_on_tick(self, callback_id):
+        self._tick_callbacks.pop(callback_id, None)
+
+    def wait_for_tick(self, seconds=10.0):
+        with self._tick_event:
+            frame = self.frame
+            if not self._tick_event.wait_for(lambda: self.frame > frame, timeout=seconds):
+                raise RuntimeError("time-out while waiting for the simulator")
+            return self._snapshot
+
+    def tick(self, seconds=10.0):
+        if not self._settings.synchronous_mode:
+            raise RuntimeError("tick() called while the world is in asynchronous mode")
+        self._rpc()
+        self._step(self._settings.fixed_delta_seconds or self.config['async_step_seconds'])
+        return self.frame
+
+    # --- Commands (applied server side, no round-trip per command) ---
+    def _apply_command(self, cmd, future_actor_id=0):
+        actor_id = getattr(cmd, 'actor_id', None)
+        if actor_id == command.FutureActor:
+            actor_id = future_actor_id
+        if isinstance(cmd, command.SpawnActor):
+            parent = self._actors.get(cmd.parent_id) if cmd.parent_id else None
+            actor = self._spawn(cmd.blueprint, cmd.transform, parent)
+            if actor is None:
+                return command.Response(0, "Spawn failed because of collision at spawn position")
+            for then in cmd.then_commands:
+                response = self._apply_command(then, actor.id)
+                if response.has_error():
+                    return command.Response(actor.id, response.error)
+            return command.Response(actor.id)
+        actor = self._actors.get(actor_id)
+        if actor is None:
+            return command.Response(actor_id, f"actor {actor_id} not found")
+        if isinstance(cmd, command.DestroyActor):
+            self._remove_actor(actor)
+        elif isinstance(cmd, command.SetAutopilot):
+            if not isinstance(actor, Vehicle):
+                return command.Response(actor_id, f"actor {actor_id} is not a vehicle")
+            actor.autopilot = bool(cmd.enabled)
+        else:
+            return command.Response(actor_id, f"unsupported command {type(cmd).__name__}")
+        return command.Response(actor_id)
+
+    def _apply_batch(self, commands, do_tick):
+        self._rpc()
+        responses = [self._apply_command(cmd) for cmd in commands]
+        if do_tick and self._settings.synchronous_mode:
+            self._step(self._settings.fixed_delta_seconds or self.config['async_step_seconds'])
+        return responses
+
+    # --- Simulation ---
+    def _blocked(self, location, min_distance=2.0):
+        return any(
+            isinstance(a, Vehicle) and a._transform.location.distance(location) < min_distance
+            for a in self._actors.values()
+        )
+
+    def _remove_actor(self, actor):
+        with self._lock:
+            if not actor._alive:
+                return False
+            actor._alive = False
+            if isinstance(actor, Sensor):
+                actor._callback = None
+            self._actors.pop(actor.id, None)
+        return True
+
+    def _step(self, dt):
+        with self._lock:
+            self.frame += 1
+            self.elapsed_seconds += dt
+            actors = list(self._actors.values())
+            for actor in actors:
+                actor._step(dt, self._rng)
+            vehicles = [a for a in actors if isinstance(a, Vehicle)]
+            measurements = [
+                (s._callback, s._measure(self.frame, self.elapsed_seconds, vehicles, self._rng))
+                for s in actors if isinstance(s, Sensor) and s._callback is not None
+            ]
+            self._snapshot = WorldSnapshot(self.id, Timestamp(self.frame, self.elapsed_seconds, dt), actors)
+        with self._tick_event:
+            self._tick_event.notify_all()
+        # Callbacks run outside the lock so they can call back into the world
+        snapshot = self._snapshot
+        for callback in list(self._tick_callbacks.values()):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"[FAKE CARLA] on_tick callback raised: {e}")
+        for callback, data in measurements:
+            try:
+                callback(data)
+            except Exception as e:
+                print(f"[FAKE CARLA] Sensor callback raised: {e}")
+
+    def _run_async(self):
+        while self._running:
+            step = self.config['async_step_seconds']
+            if not self._settings.synchronous_mode:
+                self._step(step)
+            time.sleep(step)
+
+    def _shutdown(self):
+        self._running = False
+        with self._lock:
+            for actor in self._actors.values():
+                actor._alive = False
+            self._actors.clear()
+
+
+_world_ids = itertools.count(1)
+
+
+# === Commands ===
+class command:
+    """Subset of carla.command used for batched spawn / autopilot / destroy"""
+
+    FutureActor = 0  # stands for the actor spawned by the enclosing SpawnActor
+
+    class Response:
+        def __init__(self, actor_id, error=''):
+            self.actor_id = actor_id
+            self.error = error
+
+        def has_error(self):
+            return bool(self.error)
+
+        def __repr__(self):
+            return f"Response(actor_id={self.actor_id}, error={self.error!r})"
+
+    class SpawnActor:
+        def __init__(self, blueprint, transform, parent=None):
+            self.blueprint = blueprint
+            self.transform = transform
+            self.parent_id = getattr(parent, 'id', parent)
+            self.then_commands = []
+
+        def then(self, command):
+            self.then_commands.append(command)
+            return self
+
+    class DestroyActor:
+        def __init__(self, actor):
+            self.actor_id = getattr(actor, 'id', actor)
+
+    class SetAutopilot:
+        def __init__(self, actor, enabled, tm_port=8000):
+            self.actor_id = getattr(actor, 'id', actor)
+            self.enabled = enabled
+            self.tm_port = tm_port
+
+
+# === Client / Traffic manager ===
+class TrafficManager:
+    def __init__(self, client, port):
+        self._client = client
+        self._port = port
+        self.synchronous_mode = False
+        self.global_distance_to_leading_vehicle = 2.0
+        self.hybrid_physics_mode = False
+
+    def get_port(self):
+        return self._port
+
+    def set_synchronous_mode(self, mode=True):
+        self.synchronous_mode = bool(mode)
+
+    def set_global_distance_to_leading_vehicle(self, distance):
+        self.global_distance_to_leading_vehicle = distance
+
+    def set_hybrid_physics_mode(self, enabled=True):
+        self.hybrid_physics_mode = enabled
+
+    def vehicle_percentage_speed_difference(self, actor, percentage):
+        actor.speed_difference = float(percentage)
+
+    def ignore_lights_percentage(self, actor, percentage):
+        actor.tm_settings['ignore_lights_percentage'] = percentage
+
+    def ignore_signs_percentage(self, actor, percentage):
+        actor.tm_settings['ignore_signs_percentage'] = percentage
+
+    def distance_to_leading_vehicle(self, actor, distance):
+        actor.tm_settings['distance_to_leading_vehicle'] = distance
+
+    def auto_lane_change(self, actor, enable):
+        actor.tm_settings['auto_lane_change'] = enable
+
+
+class Client:
+    def __init__(self, host='localhost', port=2000, worker_threads=0):
+        self.host = host
+        self.port = port
+        self.timeout = 5.0
+        _get_server(host, port)
+        self._traffic_managers = {}
+
+    def set_timeout(self, seconds):
+        self.timeout = seconds
+
+    def get_client_version(self):
+        return '0.9.13-fake'
+
+    def get_server_version(self):
+        return '0.9.13-fake'
+
+    def get_world(self):
+        return _servers[(self.host, self.port)]
+
+    def load_world(self, map_name, reset_settings=True):
+        old = _servers[(self.host, self.port)]
+        old._rpc()
+        time.sleep(old.config['load_world_seconds'])
+        old._shutdown()
+        world = World(map_name)
+        if not reset_settings:
+            world._settings = old._settings._copy()
+        _servers[(self.host, self.port)] = world
+        return world
+
+    def apply_batch(self, commands, do_tick=False):
+        self.get_world()._apply_batch(commands, do_tick)
+
+    def apply_batch_sync(self, commands, do_tick=False):
+        return self.get_world()._apply_batch(commands, do_tick)
+
+    def get_trafficmanager(self, client_connection=8000):
+        if client_connection not in self._traffic_managers:
+            self._traffic_managers[client_connection] = TrafficManager(self, client_connection)
+        return self._traffic_managers[client_connection]
+
+
+# One simulated server per (host, port), shared by every Client connected to it
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def _get_server(host, port):
+    with _servers_lock:
+        if (host, port) not in _servers:
+            _servers[(host, port)] = World()
+        return _servers[(host, port)]
@@ -0,0 +1,213 @@
+# feature_store.py (per-vehicle trajectory features, computed once and cached by input hash)
+#
+# vehicle_features() sorts a sensor log by (vehicle, sensor, time) once and
+# derives acceleration, jerk and azimuth rate inside each vehicle's run of
+# rows from one sensor (velocity and azimuth are relative to the radar that
+# measured them, so rows of different radars are never differenced; rows
+# that share the previous row's timestamp are skipped, like the dt > 0
+# filter of logistic_regression.py). Every statistic is then a segmented
+# NumPy reduction over the rows of all sensors of a vehicle (np.add.reduceat, plus index lookups
+# into values sorted within each run for min / max / percentiles), so there
+# is no per-vehicle Python loop and no groupby.
+#
+# FeatureStore keeps the resulting tables as columnar datasets under
+# feature_store/, keyed by a hash of the input data and FEATURE_VERSION, so
+# repeated experiments on the same logs skip the computation. Raw logs are
+# read through dataset_cache.py, so the CSV is parsed only once as well.
+#
+# Usage:  python feature_store.py sensor_data_safe_and_reckless.csv [keep_column ...]
+
+import hashlib
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import ColumnarWriter, is_columnar, read_columnar
+from dataset_cache import load_log, log_digest
+
+FEATURE_VERSION = 3  # bump when the features change so cached tables are recomputed
+STORE_DIR = 'feature_store'
+SIGNALS = ['velocity', 'acceleration', 'jerk', 'azimuth_rate']
+STATS = ['mean', 'std', 'min', 'max', 'p10', 'p50', 'p90']
+QUANTILES = {'p10': 0.10, 'p50': 0.50, 'p90': 0.90}
+TRAJECTORY_FEATURES = (
+    ['x_mean', 'y_mean', 'z_mean']
+    + [f'{signal}_{stat}' for signal in SIGNALS for stat in STATS]
+    + ['dwell_time', 'detection_count']
+)
+
+
+# === Segmented reductions ===
+def _diff_in_segments(values, segment):
+    """values[i] - values[i - 1] when both rows belong to the same segment, NaN at segment starts"""
+    out = np.full(len(values), np.nan)
+    same = segment[1:] == segment[:-1]
+    out[1:][same] = values[1:][same] - values[:-1][same]
+    return out
+
+
+def _segment_stats(values, segment, n_segments):
+    """STATS of the finite values of every segment; segments without values get NaN"""
+    out = {stat: np.full(n_segments, np.nan) for stat in STATS}
+    finite = np.isfinite(values)
+    values, segment = values[finite], segment[finite]
+    if len(values) == 0:
+        return out
+
+    # Sorted by segment, then by value inside each segment
+    order = np.lexsort((values, segment))
+    v = values[order]
+    counts = np.bincount(segment, minlength=n_segments)
+    present = np.flatnonzero(counts)
+    count = counts[present]
+    start = (np.cumsum(counts) - counts)[present]
+
+    mean = np.add.reduceat(v, start) / count
+    centered = v - np.repeat(mean, count)
+    out['mean'][present] = mean
+    out['std'][present] = np.sqrt(np.add.reduceat(centered * centered, start) / count)
+    out['min'][present] = v[start]
+    out['max'][present] = v[start + count - 1]
+    for stat, q in QUANTILES.items():
+        # Linear interpolation between closest ranks, as np.percentile does
+        position = (count - 1) * q
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, count - 1)
+        frac = position - lower
+        out[stat][present] = v[start + lower] + (v[start + upper] - v[start + lower]) * frac
+    return out
+
+
+def _segment_mean(values, segment, n_segments):
+    finite = np.isfinite(values)
+    sums = np.bincount(segment[finite], weights=values[finite], minlength=n_segments)
+    counts = np.bincount(segment[finite], minlength=n_segments)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts
+
+
+# === Features ===
+def _column(df, *names):
+    for name in names:
+        if name in df.columns:
+            return name
+    raise KeyError(f"None of the columns {names} are in the data")
+
+
+def vehicle_features(df, keep=()):
+    """One row per vehicle_id with TRAJECTORY_FEATURES, plus the first value of every `keep` column
+
+    Works on both log layouts: radar logs (timestamp, azimuth columns) and the
+    multi-radar sensor logs (Timestamp, with the azimuth stored in y).
+    Derivatives are taken per (vehicle_id, sensor_id) track and their stats
+    pooled over the vehicle's tracks; a log without a sensor_id column is
+    assumed to come from a single sensor.
+    """
+    df = df[df['vehicle_id'].notna()]
+    t = df[_column(df, 'timestamp', 'Timestamp')].to_numpy(np.float64)
+    azimuth = df[_column(df, 'azimuth', 'y')].to_numpy(np.float64)
+    ids, segment = np.unique(df['vehicle_id'].to_numpy(), return_inverse=True)
+    n = len(ids)
+    if 'sensor_id' in df.columns:
+        sensor = pd.factorize(df['sensor_id'])[0] + 1  # missing sensor_id (-1) becomes its own track
+    else:
+        sensor = np.zeros(len(df), dtype=np.int64)
+
+    order = np.lexsort((t, segment))
+    velocity = df['velocity'].to_numpy(np.float64)
+
+    # Derivatives over the rows that advance in time, within each sensor's track of a vehicle
+    track_order = np.lexsort((t, sensor, segment))
+    track = segment[track_order] * (sensor.max(initial=0) + 1) + sensor[track_order]
+    dt = _diff_in_segments(t[track_order], track)
+    kept = np.flatnonzero(dt > 0)
+    k_track = track[kept]
+    k_segment = segment[track_order][kept]
+    k_dt = dt[kept]
+    acceleration = _diff_in_segments(velocity[track_order][kept], k_track) / k_dt
+    jerk = _diff_in_segments(acceleration, k_track) / k_dt
+    azimuth_rate = _diff_in_segments(azimuth[track_order][kept], k_track) / k_dt
+
+    segment = segment[order]
+    t = t[order]
+    velocity = velocity[order]
+
+    table = {'vehicle_id': ids}
+    for axis in ('x', 'y', 'z'):
+        table[f'{axis}_mean'] = _segment_mean(df[axis].to_numpy(np.float64)[order], segment, n)
+    signals = {
+        'velocity': (velocity, segment),
+        'acceleration': (acceleration, k_segment),
+        'jerk': (jerk, k_segment),
+        'azimuth_rate': (azimuth_rate, k_segment),
+    }
+    for signal, (values, seg) in signals.items():
+        for stat, column in _segment_stats(values, seg, n).items():
+            table[f'{signal}_{stat}'] = column
+
+    counts = np.bincount(segment, minlength=n)
+    first = np.cumsum(counts) - counts
+    last = first + counts - 1
+    table['dwell_time'] = t[last] - t[first]
+    table['detection_count'] = counts
+    for name in keep:
+        table[name] = df[name].to_numpy()[order][first]
+    return pd.DataFrame(table, columns=['vehicle_id'] + TRAJECTORY_FEATURES + list(keep))
+
+
+# === Cache ===
+def frame_digest(df):
+    """sha256 of a DataFrame's column names and values"""
+    h = hashlib.sha256('\0'.join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class FeatureStore:
+    """Per-vehicle feature tables cached on disk under `root`, keyed by the input data"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def key(self, source, keep=()):
+        digest = log_digest(source) if isinstance(source, str) else frame_digest(source)
+        extra = hashlib.sha256(repr((FEATURE_VERSION, tuple(keep))).encode()).hexdigest()
+        return f'{digest[:24]}-{extra[:8]}'
+
+    def get(self, source, keep=()):
+        """Feature table for a log path or DataFrame, computed on the first request only"""
+        path = os.path.join(self.root, self.key(source, keep))
+        if is_columnar(path):
+            return read_columnar(path)
+        df = load_log(source) if isinstance(source, str) else source
+        table = vehicle_features(df, keep)
+        self._save(table, path)
+        return table
+
+    def _save(self, table, path):
+        # Written next to its final place and renamed, so readers never see a partial table
+        tmp_path = path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        kinds = {name: 'float64' for name in table.columns}
+        kinds['vehicle_id'] = 'int64'
+        kinds['detection_count'] = 'int64'
+        for name in table.columns[len(TRAJECTORY_FEATURES) + 1:]:
+            kinds[name] = 'int64' if pd.api.types.is_integer_dtype(table[name]) else 'category'
+        writer = ColumnarWriter(tmp_path, list(table.columns), kinds)
+        writer.write_frame(table)
+        writer.close()
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python feature_store.py <sensor log> [keep_column ...]")
+        sys.exit(1)
+    store = FeatureStore()
+    features = store.get(sys.argv[1], keep=sys.argv[2:])
+    print(f"[DONE] {len(features)} vehicles, {len(TRAJECTORY_FEATURES)} features "
+          f"(cached under {os.path.join(store.root, store.key(sys.argv[1], sys.argv[2:]))})")
@@ -1,12 +1,14 @@
-import carla
+from carla_backend import carla
 import time
 
+from actor_lifecycle import ensure_map
+
 # Connect to CARLA
 client = carla.Client('localhost', 2000)
 client.set_timeout(10.0)
 
-# Load Town01 explicitly
-world = client.load_world('Town01')
+# Town01 is only loaded if the server is running another map
+world = ensure_map(client, 'Town01')
 blueprint_library = world.get_blueprint_library()
 
 # === Move spectator to the desired location ===
@@ -15,7 +17,7 @@ sensor_location = carla.Location(x=100, y=50, z=10)
 sensor_rotation = carla.Rotation(pitch=-15, yaw=180, roll=0)
 spectator.set_transform(carla.Transform(sensor_location, sensor_rotation))
 
-print("Loaded Town01. Spectator moved to x=100, y=50, z=10 and now tracking...")
+print("Town01 ready. Spectator moved to x=100, y=50, z=10 and now tracking...")
 
 try:
     while True:
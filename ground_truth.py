@@ -0,0 +1,105 @@
+# ground_truth.py (per-tick vehicle state recorded from world snapshots)
+#
+# The WorldSnapshot that world.on_tick() delivers already holds the
+# transform, velocity, acceleration and angular velocity of every actor at
+# that frame, so reading them costs no RPCs. GroundTruthRecorder extracts
+# them for the tracked actors in one pass per tick and stores one row per
+# (frame, actor) in a columnar dataset (columnar_store.py); the writes
+# happen on a background thread (async_writer.py), never on the tick thread.
+#
+# Columns: frame, timestamp (simulation seconds, the same clock as the
+# radar measurements), actor_id, x, y, z, pitch, yaw, roll (degrees),
+# vx, vy, vz (m/s), ax, ay, az (m/s^2), wx, wy, wz (deg/s).
+#
+# join_ground_truth() attaches the true state of each detected vehicle to a
+# table of radar rows (timestamp, vehicle_id), e.g. to evaluate how well the
+# models reconstruct speed and acceleration from radar.
+
+import numpy as np
+import pandas as pd
+
+from async_writer import AsyncRowWriter
+from columnar_store import ROWS_PER_GROUP, ColumnarWriter, read_columnar
+
+STATE_COLUMNS = ['x', 'y', 'z', 'pitch', 'yaw', 'roll', 'vx', 'vy', 'vz', 'ax', 'ay', 'az', 'wx', 'wy', 'wz']
+COLUMNS = ['frame', 'timestamp', 'actor_id'] + STATE_COLUMNS
+COLUMN_KINDS = dict({'frame': 'int64', 'timestamp': 'float64', 'actor_id': 'int32'},
+                    **{name: 'float32' for name in STATE_COLUMNS})
+
+
+def snapshot_rows(world_snapshot, actors=None):
+    """One state row per actor in `actors` found in the snapshot (every actor when None)"""
+    frame = world_snapshot.frame
+    timestamp = world_snapshot.timestamp.elapsed_seconds
+    if actors is None:
+        states = list(world_snapshot)
+    else:
+        states = [s for s in (world_snapshot.find(a.id) for a in list(actors)) if s is not None]
+    rows = []
+    for state in states:
+        t = state.get_transform()
+        v, a, w = state.get_velocity(), state.get_acceleration(), state.get_angular_velocity()
+        rows.append((frame, timestamp, state.id, t.location.x, t.location.y, t.location.z,
+                     t.rotation.pitch, t.rotation.yaw, t.rotation.roll,
+                     v.x, v.y, v.z, a.x, a.y, a.z, w.x, w.y, w.z))
+    return rows
+
+
+class GroundTruthRecorder:
+    """world.on_tick() listener writing the state of `actors` (a list kept up to date by the caller) every tick"""
+
+    def __init__(self, path, actors=None, rows_per_group=ROWS_PER_GROUP):
+        self.path = path
+        self.actors = actors
+        self.ticks = 0
+        self.rows = 0
+        self._file = ColumnarWriter(path, COLUMNS, COLUMN_KINDS, rows_per_group)
+        self._writer = AsyncRowWriter(self._file, self._file)
+        self._world = None
+        self._listener = None
+
+    def record(self, world_snapshot):
+        rows = snapshot_rows(world_snapshot, self.actors)
+        self.ticks += 1
+        self.rows += len(rows)
+        self._writer.writerows(rows)
+
+    def attach(self, world):
+        self._world = world
+        self._listener = world.on_tick(self.record)
+        return self
+
+    def close(self):
+        """Stop listening and write the remaining rows"""
+        if self._listener is not None:
+            self._world.remove_on_tick(self._listener)
+            self._listener = None
+        self._writer.close()
+        self._file.close()
+        print(f"[GROUND TRUTH] {self.rows} actor states over {self.ticks} ticks saved to {self.path}")
+
+
+# === Reading ===
+def read_ground_truth(path):
+    """The recorded states as a DataFrame ordered by frame and actor id"""
+    return read_columnar(path).sort_values(['frame', 'actor_id'], kind='stable', ignore_index=True)
+
+
+def join_ground_truth(detections, truth, tolerance=0.05, id_column='vehicle_id'):
+    """Detection rows with the true state (vx, vy, speed, ax, ...) of their vehicle at the nearest tick
+
+    Rows whose vehicle has no recorded state within `tolerance` seconds get NaN.
+    """
+    truth = truth.assign(speed=np.sqrt(truth['vx'] ** 2 + truth['vy'] ** 2 + truth['vz'] ** 2))
+    truth = truth.rename(columns={'actor_id': id_column, 'timestamp': '_truth_timestamp',
+                                  'x': 'true_x', 'y': 'true_y', 'z': 'true_z'})
+    truth[id_column] = truth[id_column].astype(np.int64)
+    detections = detections.assign(**{id_column: detections[id_column].astype(np.int64)})
+    order = np.argsort(detections['timestamp'].to_numpy(), kind='stable')
+    merged = pd.merge_asof(
+        detections.iloc[order], truth.sort_values('_truth_timestamp'),
+        left_on='timestamp', right_on='_truth_timestamp', by=id_column,
+        direction='nearest', tolerance=tolerance,
+    )
+    merged.index = detections.index[order]
+    return merged.drop(columns=['_truth_timestamp']).sort_index()
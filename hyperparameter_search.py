@@ -0,0 +1,216 @@
+# hyperparameter_search.py (parallel grid search with vehicle-grouped cross-validation)
+#
+# The featurized matrix, labels and vehicle groups are copied into shared
+# memory once; every worker process attaches to those blocks instead of
+# receiving a pickled copy per task. One task is one (parameters, fold)
+# pair, so a sweep spreads over all cores. Folds are grouped by vehicle
+# (StratifiedGroupKFold), so rows of one vehicle never appear on both sides
+# of a split, while every fold keeps both classes.
+#
+# Results are ranked by the mean validation score and saved as CSV under
+# tuning_results/.
+#
+# Usage:
+#   python hyperparameter_search.py lr [featurized dataset]   (logistic_regression.py data)
+#   python hyperparameter_search.py if                          (reckless_driving_IF.py data)
+#   python hyperparameter_search.py lr --jobs 32 --folds 5
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+RESULTS_DIR = 'tuning_results'
+DEFAULT_FOLDS = 5
+
+GRIDS = {
+    'lr': {
+        'C': [0.01, 0.1, 1.0, 10.0, 100.0],
+        'class_weight': [None, 'balanced'],
+        'max_iter': [1000],
+    },
+    'if': {
+        'n_estimators': [50, 100, 200, 400],
+        'contamination': [0.05, 0.1, 0.2, 'auto'],
+        'max_samples': ['auto', 128, 512],
+        'random_state': [42],
+    },
+}
+
+
+def expand_grid(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+# === Datasets ===
+def lr_dataset(features_path=None):
+    """Per-row motion features; vehicles of the safe and unsafe logs are separate groups"""
+    from columnar_store import read_table
+    from logistic_regression import FEATURES, compute_motion_features, load_labeled_data
+    df = read_table(features_path) if features_path else compute_motion_features(load_labeled_data())
+    groups = df.groupby(['label', 'vehicle_id']).ngroup()
+    return df[FEATURES].to_numpy(np.float64), df['label'].to_numpy(np.int64), groups.to_numpy(np.int64)
+
+
+def if_dataset(path='sensor_data_safe_and_reckless.csv'):
+    """One row of trajectory features per vehicle, labelled with reckless_driving"""
+    from reckless_driving_IF import FEATURES, vehicle_table
+    table = vehicle_table(path, keep=['reckless_driving'])
+    return (table[FEATURES].to_numpy(np.float64), table['reckless_driving'].to_numpy(np.int64),
+            table['vehicle_id'].to_numpy(np.int64))
+
+
+# === Shared memory ===
+class SharedArrays:
+    """Named arrays copied once into shared memory blocks; `specs` lets workers map them"""
+
+    def __init__(self, **arrays):
+        self.blocks = []
+        self.specs = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+_worker = {}
+
+
+def _attach(specs, kind, n_folds):
+    # Workers only read the blocks; the parent owns them and unlinks them at the end
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)  # one BLAS thread per process, the pool provides the parallelism
+    blocks = {name: shared_memory.SharedMemory(name=block) for name, (block, _, _) in specs.items()}
+    arrays = {name: np.ndarray(shape, np.dtype(dtype), buffer=blocks[name].buf)
+              for name, (_, shape, dtype) in specs.items()}
+    _worker.update(blocks=blocks, kind=kind, folds=_folds(arrays, n_folds), **arrays)
+
+
+def _folds(arrays, n_folds):
+    from sklearn.model_selection import StratifiedGroupKFold
+    splitter = StratifiedGroupKFold(n_splits=n_folds, shuffle=True, random_state=0)
+    return list(splitter.split(arrays['X'], arrays['y'], arrays['groups']))
+
+
+# === Tasks ===
+def _fit_score(params, fold):
+    X, y = _worker['X'], _worker['y']
+    train, test = _worker['folds'][fold]
+    start = time.perf_counter()
+    if _worker['kind'] == 'lr':
+        from sklearn.linear_model import LogisticRegression
+        model = LogisticRegression(**params).fit(X[train], y[train])
+        fit_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        scores = model.decision_function(X[test])
+        predicted = model.predict(X[test])
+    else:
+        from sklearn.ensemble import IsolationForest
+        model = IsolationForest(**params).fit(X[train])
+        fit_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        scores = -model.score_samples(X[test])  # higher = more anomalous = reckless
+        predicted = (model.predict(X[test]) == -1).astype(np.int64)
+    score_seconds = time.perf_counter() - start
+    return {
+        'fold': fold,
+        'roc_auc': _roc_auc(y[test], scores),
+        'f1': _f1(y[test], predicted),
+        'fit_seconds': fit_seconds,
+        'score_seconds': score_seconds,
+    }
+
+
+def _roc_auc(y_true, scores):
+    from sklearn.metrics import roc_auc_score
+    if len(np.unique(y_true)) < 2:
+        return np.nan
+    return roc_auc_score(y_true, scores)
+
+
+def _f1(y_true, predicted):
+    from sklearn.metrics import f1_score
+    return f1_score(y_true, predicted, zero_division=0)
+
+
+# === Search ===
+def run_search(kind, X, y, groups, grid=None, n_folds=DEFAULT_FOLDS, jobs=None):
+    """Evaluate every parameter combination on every fold in a process pool; returns the ranked table"""
+    candidates = expand_grid(grid or GRIDS[kind])
+    n_folds = min(n_folds, len(np.unique(groups)))
+    shared = SharedArrays(X=X, y=y, groups=groups)
+    started = time.perf_counter()
+    try:
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(jobs or os.cpu_count(), mp_context=ctx, initializer=_attach,
+                                 initargs=(shared.specs, kind, n_folds)) as pool:
+            futures = {
+                (i, fold): pool.submit(_fit_score, params, fold)
+                for i, params in enumerate(candidates) for fold in range(n_folds)
+            }
+            rows = [dict(candidate=i, **future.result()) for (i, _), future in futures.items()]
+    finally:
+        shared.close()
+    elapsed = time.perf_counter() - started
+
+    folds = pd.DataFrame(rows)
+    table = folds.groupby('candidate').agg(
+        mean_roc_auc=('roc_auc', 'mean'),
+        std_roc_auc=('roc_auc', 'std'),
+        mean_f1=('f1', 'mean'),
+        mean_fit_seconds=('fit_seconds', 'mean'),
+        mean_score_seconds=('score_seconds', 'mean'),
+    ).reset_index()
+    table['params'] = [json.dumps(candidates[i]) for i in table['candidate']]
+    table = table.sort_values(['mean_roc_auc', 'mean_f1'], ascending=False, na_position='last')
+    table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    table = table.drop(columns='candidate').reset_index(drop=True)
+    print(f"[TUNE] {len(candidates)} candidates x {n_folds} folds in {elapsed:.1f}s")
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Grid search with vehicle-grouped cross-validation')
+    parser.add_argument('model', choices=sorted(GRIDS))
+    parser.add_argument('data', nargs='?', default=None,
+                        help='lr: featurized dataset (default: compute from the radar CSVs); '
+                             'if: labelled sensor log (default: sensor_data_safe_and_reckless.csv)')
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS)
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--output', default=None, help='CSV results path')
+    args = parser.parse_args()
+
+    if args.model == 'lr':
+        X, y, groups = lr_dataset(args.data)
+    else:
+        X, y, groups = if_dataset(args.data) if args.data else if_dataset()
+    print(f"[TUNE] {len(X)} rows, {len(np.unique(groups))} vehicles, {X.shape[1]} features")
+
+    table = run_search(args.model, X, y, groups, n_folds=args.folds, jobs=args.jobs)
+    with pd.option_context('display.max_colwidth', None, 'display.width', 200):
+        print(table.head(10).to_string(index=False))
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime(f'tune-{args.model}-%Y%m%d-%H%M%S.csv'))
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    table.to_csv(output, index=False)
+    print(f"\n[DONE] Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
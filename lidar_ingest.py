@@ -0,0 +1,176 @@
+# lidar_ingest.py (LiDAR sweeps decoded zero-copy, downsampled and stored as compressed binary chunks)
+#
+# A LiDAR measurement's raw_data is a packed float32 buffer of
+# (x, y, z, intensity) per point in the sensor frame. The sensor callback
+# views it with np.frombuffer, crops it to the region of interest and queues
+# a copy of the kept points; a worker thread voxel-downsamples each sweep
+# and writes chunks of `frames_per_chunk` sweeps per compressed .npz file
+# (<dir>/lidar-<first frame>-<last frame>.npz):
+#
+#   points      (total, 4) float32  x, y, z, intensity of every kept point (sensor frame)
+#   frame       (n,) int64          simulation frame of each sweep
+#   timestamp   (n,) float64        simulation time of each sweep
+#   offsets     (n + 1,) int64      points[offsets[i]:offsets[i + 1]] belong to sweep i
+#   pose        (n, 6) float64      sensor x, y, z, pitch, yaw, roll in the world at each sweep
+#
+# No Python code runs per point. When `max_pending` sweeps are waiting for
+# the worker, new sweeps are dropped (and counted) instead of blocking the
+# simulator's sensor thread. iter_sweeps() reads a directory back.
+
+import glob
+import os
+import queue
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from radar_association import rotation_matrix
+
+FRAMES_PER_CHUNK = 20
+MAX_PENDING = 8  # sweeps queued between the callback and the worker
+
+
+# === Point clouds ===
+def lidar_to_array(lidar_data):
+    """Read-only (N, 4) float32 view of a LiDAR measurement's raw buffer (no copy)"""
+    return np.frombuffer(lidar_data.raw_data, dtype=np.float32).reshape(-1, 4)
+
+
+def crop_points(points, roi):
+    """Points inside the box roi = ((xmin, xmax), (ymin, ymax), (zmin, zmax)), as a new array"""
+    (xmin, xmax), (ymin, ymax), (zmin, zmax) = roi
+    x, y, z = points[:, 0], points[:, 1], points[:, 2]
+    return points[(x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax) & (z >= zmin) & (z <= zmax)]
+
+
+def voxel_downsample(points, voxel_size):
+    """One point per occupied voxel of edge `voxel_size`: the mean position and intensity of its points"""
+    if len(points) == 0:
+        return points
+    cells = np.floor(points[:, :3] / voxel_size).astype(np.int64)
+    cells -= cells.min(axis=0)
+    keys = np.ravel_multi_index(cells.T, cells.max(axis=0) + 1)
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    out = np.empty((len(counts), 4), dtype=np.float32)
+    for column in range(4):
+        out[:, column] = np.bincount(inverse, weights=points[:, column], minlength=len(counts)) / counts
+    return out
+
+
+def sensor_to_world(points, pose):
+    """(N, 3) world positions of sensor-frame points, with pose = (x, y, z, pitch, yaw, roll)"""
+    x, y, z, pitch, yaw, roll = pose
+    rotation = SimpleNamespace(pitch=pitch, yaw=yaw, roll=roll)
+    return points[:, :3].astype(np.float64) @ rotation_matrix(rotation).T + (x, y, z)
+
+
+def _pose(transform):
+    loc, rot = transform.location, transform.rotation
+    return (loc.x, loc.y, loc.z, rot.pitch, rot.yaw, rot.roll)
+
+
+# === Ingest ===
+class LidarIngest:
+    """listen() callback for a LiDAR that crops, downsamples and stores sweeps from a worker thread"""
+
+    def __init__(self, output_dir, voxel_size=None, roi=None, frames_per_chunk=FRAMES_PER_CHUNK,
+                 max_pending=MAX_PENDING):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.voxel_size = voxel_size
+        self.roi = roi
+        self.frames_per_chunk = frames_per_chunk
+        self.received = 0
+        self.dropped = 0
+        self.written = 0
+        self.points_in = 0
+        self.points_out = 0
+        self.files = 0
+        self._pending = queue.Queue(max_pending)
+        self._chunk = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='LidarIngest', daemon=True)
+        self._thread.start()
+
+    def __call__(self, lidar_data):
+        """Sensor thread: crop the raw view, queue a copy and return"""
+        self.received += 1
+        if self._closed:
+            return
+        points = lidar_to_array(lidar_data)
+        self.points_in += len(points)
+        points = crop_points(points, self.roi) if self.roi is not None else points.copy()
+        try:
+            self._pending.put_nowait((lidar_data.frame, lidar_data.timestamp, _pose(lidar_data.transform), points))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            frame, timestamp, pose, points = item
+            try:
+                if self.voxel_size:
+                    points = voxel_downsample(points, self.voxel_size)
+                self._chunk.append((frame, timestamp, pose, points))
+                if len(self._chunk) >= self.frames_per_chunk:
+                    self._write_chunk()
+            except Exception as e:
+                print(f"[LIDAR] Sweep {frame} not saved: {e}")
+
+    def _write_chunk(self):
+        chunk, self._chunk = self._chunk, []
+        counts = [len(item[3]) for item in chunk]
+        path = os.path.join(self.output_dir, f'lidar-{chunk[0][0]:06d}-{chunk[-1][0]:06d}.npz')
+        np.savez_compressed(
+            path,
+            points=np.concatenate([item[3] for item in chunk]).astype(np.float32, copy=False),
+            frame=np.array([item[0] for item in chunk], dtype=np.int64),
+            timestamp=np.array([item[1] for item in chunk], dtype=np.float64),
+            offsets=np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            pose=np.array([item[2] for item in chunk], dtype=np.float64).reshape(-1, 6),
+        )
+        self.written += len(chunk)
+        self.points_out += sum(counts)
+        self.files += 1
+
+    def close(self):
+        """Store every queued sweep, write the last partial chunk and stop the worker"""
+        if self._closed:
+            return
+        self._closed = True
+        self._pending.put(None)
+        self._thread.join()
+        if self._chunk:
+            self._write_chunk()
+
+    def stats(self):
+        return {
+            'received': self.received,
+            'dropped': self.dropped,
+            'written': self.written,
+            'points_in': self.points_in,
+            'points_out': self.points_out,
+            'files': self.files,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"[LIDAR] {s['written']}/{s['received']} sweeps written to {s['files']} files in {self.output_dir} "
+              f"({s['points_out']}/{s['points_in']} points kept, {s['dropped']} sweeps dropped)")
+
+
+# === Reading ===
+def iter_sweeps(output_dir):
+    """Yield (frame, timestamp, pose, points) for every stored sweep, in frame order"""
+    # By the first frame as a number: the zero padding stops working past frame 999999
+    paths = glob.glob(os.path.join(output_dir, 'lidar-*.npz'))
+    for path in sorted(paths, key=lambda p: int(os.path.basename(p).split('-')[1])):
+        with np.load(path) as chunk:
+            points, offsets, poses = chunk['points'], chunk['offsets'], chunk['pose']
+            frames, timestamps = chunk['frame'].tolist(), chunk['timestamp'].tolist()
+        for i, frame in enumerate(frames):
+            yield frame, timestamps[i], poses[i], points[offsets[i]:offsets[i + 1]]
@@ -1,51 +1,136 @@
+import sys
+
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import GroupShuffleSplit, train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report
 from sklearn.preprocessing import LabelEncoder
 
+from columnar_store import read_table
+from dataset_cache import load_log
+from model_store import save_model
+from window_features import STRIDE, WINDOW_FEATURES, WINDOW_LENGTHS, window_features
+
+FEATURES = ['x', 'y', 'z', 'velocity', 'azimuth', 'acceleration', 'jerk']
+MODEL_PATH = 'models/logistic_regression'
+WINDOW_MODEL_PATH = 'models/logistic_regression_windows'
+
 # === Load the CSV files ===
-safe_df = pd.read_csv('safe_radar_data.csv')
-unsafe_df = pd.read_csv('unsafe_radar_data.csv')
+def load_labeled_data(safe_path='safe_radar_data.csv', unsafe_path='unsafe_radar_data.csv'):
+    # Parsed once into compact dtypes and cached by content (dataset_cache.py)
+    safe_df = load_log(safe_path)
+    unsafe_df = load_log(unsafe_path)
 
-# Label Encoding 
-# Convert labels to numeric: 'safe' -> 0, 'unsafe' -> 1
-safe_df['label'] = 'safe'
-unsafe_df['label'] = 'unsafe'
+    # Label Encoding 
+    # Convert labels to numeric: 'safe' -> 0, 'unsafe' -> 1
+    safe_df['label'] = 'safe'
+    unsafe_df['label'] = 'unsafe'
 
-df = pd.concat([safe_df, unsafe_df], ignore_index=True)
-df['label'] = LabelEncoder().fit_transform(df['label'])     # safe = 0 , unsafe = 1
+    df = pd.concat([safe_df, unsafe_df], ignore_index=True)
+    df['label'] = LabelEncoder().fit_transform(df['label'])     # safe = 0 , unsafe = 1
+    return df
 
 # === Sort and Compute Features ===
-df_sorted = df.sort_values(by=['vehicle_id', 'timestamp']).copy()
-df_sorted['dt'] = df_sorted.groupby('vehicle_id')['timestamp'].diff()
+def compute_motion_features(df):
+    df_sorted = df.sort_values(by=['vehicle_id', 'timestamp']).copy()
+    df_sorted['dt'] = df_sorted.groupby('vehicle_id')['timestamp'].diff()
+
+    # Filter out invalid dt values
+    df_sorted = df_sorted[df_sorted['dt'] > 0]
+
+    # Compute acceleration and jerk
+    df_sorted['acceleration'] = df_sorted.groupby('vehicle_id')['velocity'].diff() / df_sorted['dt']
+    df_sorted['jerk'] = df_sorted.groupby('vehicle_id')['acceleration'].diff() / df_sorted['dt']
+
+    # Drop rows with NaNs or infinite values
+    df_clean = df_sorted.dropna(subset=['acceleration', 'jerk'])
+    df_clean = df_clean[np.isfinite(df_clean['acceleration']) & np.isfinite(df_clean['jerk'])]
+    return df_clean
+
+# === Train ===
+def train_model(X, y):
+    model = LogisticRegression(max_iter=1000)
+    model.fit(X, y)
+    return model
+
+def train_standardized_model(X, y):
+    """train_model on standardized columns, with the scaling folded back into the coefficients
+
+    Window statistics span many orders of magnitude (jerk variance vs. mean
+    position), which stalls the solver on raw values. The saved model still
+    takes the raw features, so model_store and its scorers need no scaler.
+    """
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    model = train_model((X - mean) / scale, y)
+    model.coef_ = model.coef_ / scale
+    model.intercept_ = model.intercept_ - model.coef_ @ mean
+    return model
+
+def main(features_path=None):
+    if features_path:
+        # Rows already featurized out-of-core by streaming_features.py
+        df_clean = read_table(features_path)
+    else:
+        df_clean = compute_motion_features(load_labeled_data())
+
+    # Feature Selection 
+    X = df_clean[FEATURES]
+    y = df_clean['label']
+
+
+    # Train/Test Split 
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# Filter out invalid dt values
-df_sorted = df_sorted[df_sorted['dt'] > 0]
+    # Train the Model
+    model = train_model(X_train, y_train)
 
-# Compute acceleration and jerk
-df_sorted['acceleration'] = df_sorted.groupby('vehicle_id')['velocity'].diff() / df_sorted['dt']
-df_sorted['jerk'] = df_sorted.groupby('vehicle_id')['acceleration'].diff() / df_sorted['dt']
+    # Evaluation
+    y_pred = model.predict(X_test)
+    report = classification_report(y_test, y_pred)
+    print("=== Logistic Regression Classification Report ===")
+    print(report)
 
-# Drop rows with NaNs or infinite values
-df_clean = df_sorted.dropna(subset=['acceleration', 'jerk'])
-df_clean = df_clean[np.isfinite(df_clean['acceleration']) & np.isfinite(df_clean['jerk'])]
+    # Save the model for scoring processes (see model_store.load_model)
+    save_model(model, MODEL_PATH, FEATURES, {
+        'labels': {'0': 'safe', '1': 'unsafe'},
+        'preprocessing': 'rows sorted by vehicle_id, timestamp; dt > 0; acceleration = dv/dt; jerk = da/dt',
+        'training_rows': len(X_train),
+    })
+    print(f"Model saved to {MODEL_PATH}")
 
-# Feature Selection 
-X = df_clean[['x', 'y', 'z', 'velocity', 'azimuth', 'acceleration', 'jerk']]
-y = df_clean['label']
+def main_windows(windows_path=None):
+    if windows_path:
+        # Windows already computed by window_features.py
+        windows = read_table(windows_path)
+    else:
+        windows = window_features(load_labeled_data(), by=['label', 'vehicle_id'])
 
+    # Overlapping windows of one vehicle stay on the same side of the split
+    groups = windows.groupby(['label', 'vehicle_id']).ngroup()
+    train, test = next(GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=42).split(windows, groups=groups))
+    X = windows[WINDOW_FEATURES].to_numpy(np.float64)
+    y = windows['label'].to_numpy(np.int64)
+    X_train, X_test, y_train, y_test = X[train], X[test], y[train], y[test]
 
-# Train/Test Split 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    model = train_standardized_model(X_train, y_train)
+    y_pred = model.predict(X_test)
+    print("=== Logistic Regression (sliding windows) Classification Report ===")
+    print(classification_report(y_test, y_pred))
 
-# Train the Model
-model = LogisticRegression(max_iter=1000)
-model.fit(X_train, y_train)
+    save_model(model, WINDOW_MODEL_PATH, WINDOW_FEATURES, {
+        'labels': {'0': 'safe', '1': 'unsafe'},
+        'preprocessing': (f'rows sorted by vehicle_id, timestamp; dt > 0; windows of {list(WINDOW_LENGTHS)} rows '
+                          f'every {STRIDE} rows per vehicle (window_features.py)'),
+        'training_rows': len(X_train),
+    })
+    print(f"Model saved to {WINDOW_MODEL_PATH}")
 
-# Evaluation
-y_pred = model.predict(X_test)
-report = classification_report(y_test, y_pred)
-print("=== Logistic Regression Classification Report ===")
-print(report)
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args and args[0] == '--windows':
+        main_windows(args[1] if len(args) > 1 else None)
+    else:
+        main(args[0] if args else None)
@@ -0,0 +1,201 @@
+# model_store.py (model artifacts that load without scikit-learn)
+#
+# A fitted LogisticRegression or IsolationForest is saved as a directory:
+#
+#   meta.json   kind, feature names, hyperparameters, preprocessing metadata
+#   *.npy       one file per array (weights, or the flattened tree nodes)
+#
+# load_model() memory-maps the .npy files and returns a small numpy scorer
+# with the same predict / decision_function / score_samples results as the
+# sklearn model, so scoring processes start in milliseconds and never import
+# the training stack. The trees of an IsolationForest are stored as flat
+# node arrays shared by all trees, and every sample walks all trees at once.
+
+import json
+import os
+import time
+
+import numpy as np
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+SCORE_CHUNK_ROWS = 4096  # samples walked through the forest at a time
+
+
+def _average_path_length(n):
+    """Expected isolation depth of a node holding n samples (c(n) of the Isolation Forest paper)"""
+    n = np.asarray(n, dtype=np.float64)
+    out = np.zeros_like(n)
+    out[n == 2] = 1.0
+    big = n > 2
+    out[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return out
+
+
+def _json_safe(params):
+    return {k: v for k, v in params.items() if isinstance(v, (str, int, float, bool, type(None)))}
+
+
+# === Save ===
+def _linear_arrays(model):
+    if len(model.classes_) != 2:
+        raise ValueError("Only binary logistic regression models can be saved")
+    return {
+        'coef': np.asarray(model.coef_, dtype=np.float64).reshape(-1),
+        'intercept': np.asarray(model.intercept_, dtype=np.float64).reshape(-1),
+        'classes': np.asarray(model.classes_),
+    }, {}
+
+
+def _forest_arrays(model):
+    left, right, feature, threshold, path_length = [], [], [], [], []
+    roots = []
+    offset = 0
+    max_depth = 0
+    for estimator, features in zip(model.estimators_, model.estimators_features_):
+        tree = estimator.tree_
+        n = tree.node_count
+        is_leaf = tree.children_left < 0
+        # Depth of every node; children always come after their parent in sklearn trees
+        depth = np.zeros(n, dtype=np.int64)
+        for node in range(n):
+            if not is_leaf[node]:
+                depth[tree.children_left[node]] = depth[node] + 1
+                depth[tree.children_right[node]] = depth[node] + 1
+        own = np.arange(n) + offset
+        left.append(np.where(is_leaf, own, tree.children_left + offset))
+        right.append(np.where(is_leaf, own, tree.children_right + offset))
+        feature.append(np.where(is_leaf, 0, np.asarray(features)[np.maximum(tree.feature, 0)]))
+        threshold.append(tree.threshold)
+        path_length.append(depth + _average_path_length(tree.n_node_samples))
+        roots.append(offset)
+        max_depth = max(max_depth, int(depth.max()))
+        offset += n
+    arrays = {
+        # children[2 * node] is the left child, children[2 * node + 1] the right one
+        'children': np.column_stack([np.concatenate(left), np.concatenate(right)]).astype(np.int64).reshape(-1),
+        'feature': np.concatenate(feature).astype(np.int64),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'path_length': np.concatenate(path_length).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int64),
+    }
+    meta = {
+        'max_depth': max_depth,
+        'max_samples': int(model.max_samples_),
+        'offset': float(model.offset_),
+    }
+    return arrays, meta
+
+
+def save_model(model, path, features, metadata=None):
+    """Write a fitted LogisticRegression or IsolationForest trained on `features` to the directory `path`"""
+    kind = type(model).__name__
+    if kind == 'LogisticRegression':
+        arrays, model_meta = _linear_arrays(model)
+    elif kind == 'IsolationForest':
+        arrays, model_meta = _forest_arrays(model)
+    else:
+        raise ValueError(f"Unsupported model type {kind}")
+
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), array)
+    meta = {
+        'format': FORMAT_VERSION,
+        'kind': kind,
+        'features': list(features),
+        'params': _json_safe(model.get_params()),
+        'model': model_meta,
+        'metadata': metadata or {},
+        'arrays': sorted(arrays),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    with open(os.path.join(path, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+
+# === Load ===
+def read_meta(path):
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get('format') != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported model artifact format {meta.get('format')}")
+    return meta
+
+
+class _Scorer:
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.kind = meta['kind']
+        self.features = meta['features']
+        self.metadata = meta['metadata']
+        self.arrays = arrays
+
+    def _matrix(self, X):
+        """(n_samples, n_features) float array from a DataFrame (columns picked by name) or array"""
+        if hasattr(X, 'columns'):
+            X = X[self.features].to_numpy()
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.features):
+            raise ValueError(f"Expected {len(self.features)} features {self.features}, got shape {X.shape}")
+        return X
+
+
+class LinearScorer(_Scorer):
+    """Binary logistic regression; same outputs as LogisticRegression"""
+
+    def decision_function(self, X):
+        return self._matrix(X) @ self.arrays['coef'] + self.arrays['intercept'][0]
+
+    def predict_proba(self, X):
+        p = np.exp(-np.logaddexp(0.0, -self.decision_function(X)))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return self.arrays['classes'][(self.decision_function(X) > 0).astype(np.intp)]
+
+
+class ForestScorer(_Scorer):
+    """Isolation forest; same outputs as IsolationForest"""
+
+    def score_samples(self, X, chunk_rows=SCORE_CHUNK_ROWS):
+        # The trees split on float32 values, like sklearn's validated input
+        X = self._matrix(X).astype(np.float32)
+        a = self.arrays
+        roots = np.asarray(a['roots'])
+        n_features = X.shape[1]
+        denominator = len(roots) * float(_average_path_length([self.meta['model']['max_samples']])[0])
+        scores = np.empty(len(X))
+        for start in range(0, len(X), chunk_rows):
+            chunk = X[start:start + chunk_rows]
+            values = chunk.ravel()
+            row_base = (np.arange(len(chunk)) * n_features)[:, None]
+            nodes = np.broadcast_to(roots, (len(chunk), len(roots))).copy()
+            # Leaves point to themselves, so max_depth steps land every sample in a leaf of every tree
+            for _ in range(self.meta['model']['max_depth']):
+                go_right = values.take(row_base + a['feature'].take(nodes)) > a['threshold'].take(nodes)
+                nodes = a['children'].take(2 * nodes + go_right)
+            depths = a['path_length'].take(nodes).sum(axis=1)
+            if denominator == 0:
+                scores[start:start + len(chunk)] = 1.0
+            else:
+                scores[start:start + len(chunk)] = 2.0 ** (-depths / denominator)
+        return -scores
+
+    def decision_function(self, X):
+        return self.score_samples(X) - self.meta['model']['offset']
+
+    def predict(self, X):
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+SCORERS = {'LogisticRegression': LinearScorer, 'IsolationForest': ForestScorer}
+
+
+def load_model(path, mmap=True):
+    """Load a model artifact as a numpy scorer; arrays are memory-mapped unless mmap=False"""
+    meta = read_meta(path)
+    mode = 'r' if mmap else None
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode) for name in meta['arrays']}
+    return SCORERS[meta['kind']](meta, arrays)
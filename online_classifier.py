@@ -0,0 +1,148 @@
+# online_classifier.py (score drivers with the logistic regression model while the radar is running)
+#
+# Keeps, per vehicle, only what the next detection needs to extend the
+# motion features of logistic_regression.compute_motion_features: the last
+# timestamp, the last velocity and the last acceleration. Every detection is
+# therefore an O(1) update, and a vehicle's unsafe probability is an
+# exponentially weighted average of the model's per-row probabilities.
+#
+# Vehicles that produce no detection for `idle_timeout` seconds (they left
+# the radar field of view) are evicted; evict() drops vehicles explicitly.
+#
+# The weights come from a model artifact written by logistic_regression.py
+# (see model_store.py), so scoring does not import scikit-learn.
+
+import math
+
+import numpy as np
+
+from model_store import load_model
+
+# Order of the values in every scored row, same names as logistic_regression.FEATURES
+FEATURES = ['x', 'y', 'z', 'velocity', 'azimuth', 'acceleration', 'jerk']
+
+IDLE_TIMEOUT = 2.0     # seconds without a detection before a vehicle's state is dropped
+SMOOTHING = 0.2        # weight of the newest row in the per-vehicle probability average
+FLAG_THRESHOLD = 0.5   # averaged unsafe probability at which a vehicle is flagged
+MIN_UPDATES = 3        # scored rows needed before a vehicle can be flagged
+
+
+class _VehicleState:
+    __slots__ = ('last_timestamp', 'last_velocity', 'last_acceleration', 'last_seen',
+                 'updates', 'probability', 'flagged')
+
+    def __init__(self, timestamp):
+        self.last_timestamp = timestamp
+        self.last_velocity = math.nan
+        self.last_acceleration = math.nan
+        self.last_seen = timestamp
+        self.updates = 0
+        self.probability = math.nan
+        self.flagged = False
+
+
+def print_flag(vehicle_id, probability, timestamp):
+    print(f"[ALERT] Vehicle {vehicle_id} flagged unsafe (p={probability:.2f}) at t={timestamp:.2f}")
+
+
+class OnlineDriverScorer:
+    """Incremental per-vehicle scoring with a fitted binary logistic regression (label 1 = unsafe)"""
+
+    def __init__(self, coef, intercept, threshold=FLAG_THRESHOLD, smoothing=SMOOTHING,
+                 min_updates=MIN_UPDATES, idle_timeout=IDLE_TIMEOUT, on_flag=print_flag):
+        self.coef = np.asarray(coef, dtype=np.float64).reshape(len(FEATURES))
+        self.intercept = float(np.ravel(intercept)[0])
+        self.threshold = threshold
+        self.smoothing = smoothing
+        self.min_updates = min_updates
+        self.idle_timeout = idle_timeout
+        self.on_flag = on_flag
+        self.vehicles = {}
+        self.evicted = 0
+        self._last_expiry = -math.inf
+
+    @classmethod
+    def from_model(cls, model, **kwargs):
+        """Build a scorer from a fitted sklearn LogisticRegression trained on FEATURES"""
+        return cls(model.coef_[0], model.intercept_, **kwargs)
+
+    @classmethod
+    def from_artifact(cls, path, **kwargs):
+        """Build a scorer from a saved logistic regression artifact, whatever its feature order"""
+        model = load_model(path)
+        if model.kind != 'LogisticRegression' or sorted(model.features) != sorted(FEATURES):
+            raise ValueError(f"{path} is not a logistic regression over {FEATURES}")
+        weights = dict(zip(model.features, model.arrays['coef']))
+        return cls([weights[name] for name in FEATURES], model.arrays['intercept'], **kwargs)
+
+    def update(self, timestamp, vehicle_ids, x, y, z, velocity, azimuth):
+        """Feed one frame of matched detections (aligned arrays); returns the vehicles flagged by it"""
+        rows = []
+        scored = []
+        vehicles = self.vehicles
+        for i, vehicle_id in enumerate(vehicle_ids):
+            state = vehicles.get(vehicle_id)
+            if state is None:
+                vehicles[vehicle_id] = _VehicleState(timestamp)
+                continue
+            state.last_seen = timestamp
+            dt = timestamp - state.last_timestamp
+            state.last_timestamp = timestamp
+            if dt <= 0:
+                # Same filter as the offline dt > 0: one row per vehicle and frame counts
+                continue
+            v = float(velocity[i])
+            acceleration = (v - state.last_velocity) / dt
+            jerk = (acceleration - state.last_acceleration) / dt
+            state.last_velocity = v
+            state.last_acceleration = acceleration
+            if math.isfinite(acceleration) and math.isfinite(jerk):
+                rows.append((x[i], y[i], z[i], v, azimuth[i], acceleration, jerk))
+                scored.append((vehicle_id, state))
+
+        flagged_ids = []
+        if rows:
+            logits = np.asarray(rows, dtype=np.float64) @ self.coef + self.intercept
+            probabilities = np.exp(-np.logaddexp(0.0, -logits))  # sigmoid without overflow
+            for (vehicle_id, state), p in zip(scored, probabilities.tolist()):
+                if state.updates == 0:
+                    state.probability = p
+                else:
+                    state.probability += self.smoothing * (p - state.probability)
+                state.updates += 1
+                if (not state.flagged and state.updates >= self.min_updates
+                        and state.probability >= self.threshold):
+                    state.flagged = True
+                    flagged_ids.append(vehicle_id)
+                    if self.on_flag is not None:
+                        self.on_flag(vehicle_id, state.probability, timestamp)
+
+        if timestamp - self._last_expiry >= self.idle_timeout / 2:
+            self.expire(timestamp)
+        return flagged_ids
+
+    def expire(self, now):
+        """Evict every vehicle without a detection in the last `idle_timeout` seconds"""
+        self._last_expiry = now
+        stale = [vid for vid, s in self.vehicles.items() if now - s.last_seen > self.idle_timeout]
+        self.evict(stale)
+        return stale
+
+    def evict(self, vehicle_ids):
+        for vehicle_id in vehicle_ids:
+            if self.vehicles.pop(vehicle_id, None) is not None:
+                self.evicted += 1
+
+    def probability(self, vehicle_id):
+        state = self.vehicles.get(vehicle_id)
+        return state.probability if state is not None else math.nan
+
+    def flagged(self):
+        return [vid for vid, s in self.vehicles.items() if s.flagged]
+
+    def stats(self):
+        return {
+            'tracked': len(self.vehicles),
+            'flagged': len(self.flagged()),
+            'evicted': self.evicted,
+        }
@@ -1,4 +1,4 @@
-import carla
+from carla_backend import carla
 import random
 
 # === Connect to CARLA ===
@@ -1,6 +1,6 @@
 # print_camera_location.py
 
-import carla
+from carla_backend import carla
 import glob
 import os
 import sys
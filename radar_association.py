@@ -0,0 +1,81 @@
+# radar_association.py (radar detection batches and their projection around the sensor)
+#
+# A radar measurement's raw_data is a packed float32 buffer of
+# (velocity, azimuth, altitude, depth) per detection. detections_to_array
+# views it as an (N, 4) array without copying or creating a Python object
+# per detection, and project_detections turns the whole batch into world
+# coordinates at once, using the sensor's full rotation (yaw, pitch, roll)
+# and each detection's altitude.
+#
+# Matching projected detections to vehicles is done by spatial_index.ActorIndex.
+
+import math
+
+import numpy as np
+
+# Column layout of a detection batch, same order as CARLA's RadarDetection
+VELOCITY, AZIMUTH, ALTITUDE, DEPTH = range(4)
+
+
+def detections_to_array(radar_data):
+    """Read-only (N, 4) float32 view of a radar measurement's raw buffer (no copy)"""
+    return np.frombuffer(radar_data.raw_data, dtype=np.float32).reshape(-1, 4)
+
+
+def rotation_matrix(rotation):
+    """3x3 sensor-to-world rotation of a carla.Rotation (degrees), as carla.Transform.get_matrix()"""
+    cy, sy = math.cos(math.radians(rotation.yaw)), math.sin(math.radians(rotation.yaw))
+    cp, sp = math.cos(math.radians(rotation.pitch)), math.sin(math.radians(rotation.pitch))
+    cr, sr = math.cos(math.radians(rotation.roll)), math.sin(math.radians(rotation.roll))
+    return np.array([
+        [cp * cy, cy * sp * sr - sy * cr, -cy * sp * cr - sy * sr],
+        [cp * sy, sy * sp * sr + cy * cr, -sy * sp * cr + cy * sr],
+        [sp, -cp * sr, cp * cr],
+    ])
+
+
+def sensor_points(detections):
+    """(N, 3) detection positions in the sensor frame (x forward, y right, z up)"""
+    depth = detections[:, DEPTH].astype(np.float64)
+    azimuth = detections[:, AZIMUTH]
+    altitude = detections[:, ALTITUDE]
+    horizontal = depth * np.cos(altitude)
+    return np.column_stack([horizontal * np.cos(azimuth), horizontal * np.sin(azimuth), depth * np.sin(altitude)])
+
+
+def project_detections(detections, transform):
+    """(N, 3) world positions of a detection batch seen by a sensor at `transform`"""
+    loc = transform.location
+    return sensor_points(detections) @ rotation_matrix(transform.rotation).T + (loc.x, loc.y, loc.z)
+
+
+class RadarBatch:
+    """One decoded radar measurement: detections, their world positions and offsets from the sensor
+
+    `frame` and `timestamp` are the measurement's own simulation frame and
+    time, so every row of the batch is tagged with when it was measured.
+    `points` are float64 world positions, `offsets` the float32 world-axis
+    offsets from the sensor that the loggers write as x / y.
+    """
+
+    __slots__ = ('frame', 'timestamp', 'detections', 'points', 'offsets')
+
+    def __init__(self, frame, timestamp, detections, points, offsets):
+        self.frame = frame
+        self.timestamp = timestamp
+        self.detections = detections
+        self.points = points
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.detections)
+
+
+def decode_measurement(radar_data, transform=None):
+    """Decode a radar measurement in one pass; `transform` defaults to the measurement's own sensor transform"""
+    transform = radar_data.transform if transform is None else transform
+    detections = detections_to_array(radar_data)
+    points = project_detections(detections, transform)
+    loc = transform.location
+    offsets = (points - (loc.x, loc.y, loc.z)).astype(np.float32)
+    return RadarBatch(radar_data.frame, radar_data.timestamp, detections, points, offsets)
@@ -1,47 +1,70 @@
 # Reckless driving predicition using Isolation Forest algorithm
 
-import pandas as pd 
+import sys
+
 import sklearn
 from sklearn.ensemble import IsolationForest
 from sklearn.metrics import classification_report, confusion_matrix
 
-#Loading the CSV data from CARLA simulation of good drivers
+from anomaly_scoring import write_scores
+from feature_store import TRAJECTORY_FEATURES, FeatureStore
+from model_store import load_model, save_model
 
-safe_data = pd.read_csv('safe_driving_data.csv')
-safe_data = safe_data.dropna(subset=['x', 'y', 'z', 'velocity'])
+FEATURES = TRAJECTORY_FEATURES
+MODEL_PATH = 'models/isolation_forest'
+STORE = FeatureStore()
+RESULTS_PATH = 'reckless_drivers.csv'
+TOP_DRIVERS = 20  # highest-scoring reckless drivers printed to the terminal
 
-# Reduce noise in the data
-cleaned_features = safe_data.groupby('vehicle_id')[['x', 'y', 'z', 'velocity']].mean().reset_index()
+# One row of trajectory features per vehicle (cached in feature_store/)
+def vehicle_table(source, keep=()):
+    features = STORE.get(source, keep)
+    # Vehicles seen in fewer than three frames have no acceleration / jerk statistics
+    features[FEATURES] = features[FEATURES].fillna(0.0)
+    return features
 
 #Train the Isolation Forest model
-model = IsolationForest(n_estimators=100, contamination=0.1, random_state=42)
-model.fit(cleaned_features[['x', 'y', 'z', 'velocity']])
+def train_model(cleaned_features):
+    model = IsolationForest(n_estimators=100, contamination=0.1, random_state=42)
+    model.fit(cleaned_features[FEATURES])
+    return model
 
-# Predict the reckless driving (using outliers) from the safe and reckless driving data
-safe_reckless = pd.read_csv('sensor_data_safe_and_reckless.csv')
-safe_reckless = safe_reckless.dropna(subset=['x', 'y', 'z', 'velocity'])
-safe_reckless_cleaned = safe_reckless.groupby('vehicle_id')[['x', 'y', 'z', 'velocity']].mean().reset_index()
+def main(model_path=None):
+    if model_path:
+        # Score with a saved model instead of retraining
+        model = load_model(model_path)
+    else:
+        #Loading the CSV data from CARLA simulation of good drivers
+        model = train_model(vehicle_table('safe_driving_data.csv'))
+        save_model(model, MODEL_PATH, FEATURES, {
+            'preprocessing': 'per-vehicle trajectory features (feature_store.vehicle_features) of safe_driving_data.csv, '
+                             'missing statistics filled with 0',
+            'prediction': '-1 = reckless, 1 = normal',
+        })
+        print(f"Model saved to {MODEL_PATH}")
 
-# Ammend labels for the reckless driving
-driving_behavior = safe_reckless[['vehicle_id', 'reckless_driving']].drop_duplicates()
-safe_reckless_cleaned = safe_reckless_cleaned.merge(driving_behavior, on='vehicle_id', how='left')
+    # Predict the reckless driving (using outliers) from the safe and reckless driving data,
+    # keeping each vehicle's reckless_driving label next to its features
+    safe_reckless_cleaned = vehicle_table('sensor_data_safe_and_reckless.csv', keep=['reckless_driving'])
 
-# Predict the reckless drivers  
-safe_reckless_cleaned['anomaly'] = model.predict(safe_reckless_cleaned[['x', 'y', 'z', 'velocity']])
+    # Score the drivers in chunks on worker threads; flagged drivers are streamed to the CSV as they are scored
+    scores, labels = write_scores(model, safe_reckless_cleaned, FEATURES, RESULTS_PATH, outliers_only=True)
+    safe_reckless_cleaned['anomaly_score'] = scores
+    safe_reckless_cleaned['anomaly'] = labels
 
-#convert the IF labels from -1 and 1 to 0 and 1 for ease of running metrics
-safe_reckless_cleaned['predicted_label'] = safe_reckless_cleaned['anomaly'].apply(lambda x: 1 if x == -1 else 0)
+    #convert the IF labels from -1 and 1 to 0 and 1 for ease of running metrics
+    safe_reckless_cleaned['predicted_label'] = (labels == -1).astype(int)
 
-#Run model metrics
-print(classification_report(safe_reckless_cleaned['reckless_driving'], safe_reckless_cleaned['predicted_label'], target_names=['Safe', 'Reckless']))
-print(confusion_matrix(safe_reckless_cleaned['reckless_driving'], safe_reckless_cleaned['predicted_label']))
+    #Run model metrics
+    print(classification_report(safe_reckless_cleaned['reckless_driving'], safe_reckless_cleaned['predicted_label'], target_names=['Safe', 'Reckless']))
+    print(confusion_matrix(safe_reckless_cleaned['reckless_driving'], safe_reckless_cleaned['predicted_label']))
 
 
-# Get and print the reckless drivers
-reckless_drivers = safe_reckless_cleaned[safe_reckless_cleaned['anomaly'] == -1]
-print("Reckless drivers detected:")
-for index, row in reckless_drivers.iterrows():
-    print(f"Driver ID: {row['vehicle_id']}, Anomaly Score: {row['anomaly']}")
+    # Print the reckless drivers, most anomalous first
+    reckless_drivers = safe_reckless_cleaned[labels == -1].sort_values('anomaly_score', ascending=False)
+    print(f"Reckless drivers detected: {len(reckless_drivers)} (top {min(TOP_DRIVERS, len(reckless_drivers))} by anomaly score)")
+    print(reckless_drivers[['vehicle_id', 'anomaly_score']].head(TOP_DRIVERS).to_string(index=False))
+    print(f"Results saved to {RESULTS_PATH}")
 
-# Save the results to a CSV file
-reckless_drivers[['vehicle_id', 'anomaly']].to_csv('reckless_drivers.csv', index=False)
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
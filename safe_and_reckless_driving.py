@@ -1,17 +1,19 @@
-import numpy as np
 import pandas as pd
 import random 
 import csv
 import time
-import os
 
 #Improting Carla for simulation and data collection of vehicles.
-import carla
+from carla_backend import carla
 
+from actor_lifecycle import destroy_actors, report_errors
+from async_writer import AsyncRowWriter
+from camera_capture import CameraCapture
+from lidar_ingest import LidarIngest
+from radar_association import ALTITUDE, AZIMUTH, DEPTH, VELOCITY
+from sensor_hub import SensorHub
+from spatial_index import ActorIndex, track_actors
 
-#Creating the directory to store camera pictures
-if not os.path.exists('camera_images'):
-    os.makedirs('camera_images')
 
 #Creating the client and world to connect to Carla 
 client = carla.Client('localhost', 2000)
@@ -28,73 +30,70 @@ sensor_location = carla.Location(x=100, y=50, z=10)
 sensor_rotation = carla.Rotation(pitch=-15, yaw=180, roll=0)
 spectator.set_transform(carla.Transform(sensor_location, sensor_rotation))
 
-#Creating a picture image of the passing vehicles with timestamp and frame
-def save_image(image):
-    image.save_to_disk('camera_reckless_and_safe/%06d.png' % image.frame, carla.ColorConverter.Raw)
-    print(f"Image saved: {image.frame}")
+#Camera frames are copied out of the callback and encoded on worker threads (camera_capture.py),
+#so saving pictures never slows down the radar callbacks. The directory is created by CameraCapture.
+CAMERA_DIR = 'camera_reckless_and_safe'
+CAMERA_FORMAT = 'png'  # 'png' (one picture per frame) or 'npz' (chunks of frames per file)
+CAMERA_EVERY = 1       # keep every Nth frame
+CAMERA_SCALE = 1       # downscale factor (2 = 400x300)
+camera_capture = CameraCapture(CAMERA_DIR, CAMERA_FORMAT, every=CAMERA_EVERY, scale=CAMERA_SCALE)
+
+#LIDAR sweeps are decoded from the raw buffer, cropped, voxel-downsampled and written as compressed
+#binary chunks (lidar_ingest.py) instead of one CSV row per point
+LIDAR_DIR = 'lidar_reckless_and_safe'
+LIDAR_RANGE = 50
+LIDAR_VOXEL = 0.2      # voxel edge in meters (None keeps every point)
+LIDAR_ROI = ((-40, 40), (-40, 40), (-2.8, 2.0))  # sensor frame box; the sensor is 3 m up, so the road surface is cut
+lidar_ingest = LidarIngest(LIDAR_DIR, voxel_size=LIDAR_VOXEL, roi=LIDAR_ROI)
 
 #Creating CSV file for data collection from LIDAR AND RADAR sensors
 csv_file = open('sensor_data_safe_and_reckless.csv', 'w', newline='')
 csv_writer = csv.writer(csv_file)
 csv_writer.writerow(['Timestamp', 'sensor_type', 'x', 'y', 'z', 'velocity', 'vehicle_id', 'sensor_id', 'reckless_driving'])
+#All three radar callbacks share this writer, so rows go through one queue and writer thread
+csv_writer = AsyncRowWriter(csv_writer, csv_file)
 
 
-# Saving data function
-def save_data(sensor_type, sensor_transform, sensor_data, sensor_id):
-    #Filter if the data is not an actual dirver in the simulation (for example, just a tree). 
-    if sensor_type == 'RADAR':
-        for data in sensor_data:
-            #get the radar location
-            x = data.depth * np.cos(data.azimuth)
-            y = data.depth * np.sin(data.azimuth)
-            radar_location = carla.Location(x=sensor_transform.location.x + x, y=sensor_transform.location.y +y, z=sensor_transform.location.z)
-            #check if the vehicle is near the detection location
-            for vehicle in vehicles_list:
-                vehicle_location = vehicle.get_transform().location
-                if radar_location.distance(vehicle_location) < 8:
-                    if vehicle.id in reckless_vehicles:
-                        reckless = 1
-                    elif vehicle.id not in reckless_vehicles:
-                        reckless = 0
-                    csv_writer.writerow([time.time(), sensor_type, data.depth, data.azimuth, data.altitude, data.velocity, vehicle.id, sensor_id, reckless])
-                    break
-
-
-    elif sensor_type == 'LIDAR':
-        for data in sensor_data:
-            #get the lidar location
-            #lidar_location = lidar_transform.transform(data.point)
-            #check if the vehicle is near the detection location
-            #for vehicle in vehicle_positions:
-                #if lidar_location.distance(vehicle) < 2:
-                #    csv_writer.writerow([time.time(), sensor_type, data.point.x, data.point.y, data.point.z, None])
-                    break
-            
-
-
-# Create the LIDAR sensors and start data collecting
-#lidar_blueprint = blueprint_library.find('sensor.lidar.ray_cast')
-#lidar_transform = carla.Transform(carla.Location(x=100, y=50, z=3))
-#lidar_sensor = world.spawn_actor(lidar_blueprint, lidar_transform)
-#lidar_sensor.listen(lambda data: save_data('LIDAR', data))
+#Building the CSV rows for radar detections the hub matched to a vehicle
+def radar_rows(times, sensor_ids, detections, vehicles):
+    return [
+        [times[i], 'RADAR', detections[i, DEPTH], detections[i, AZIMUTH], detections[i, ALTITUDE], detections[i, VELOCITY], vehicles[i].id, sensor_ids[i], int(vehicles[i].id in reckless_vehicles)]
+        for i in range(len(vehicles))
+    ]
+
+#Every radar registers with the hub, which matches detections to vehicles once per cycle for all sensors
+#Vehicle positions are indexed once per tick from the world snapshot and shared by the hub
+vehicle_index = ActorIndex()
+tick_listener = track_actors(world, vehicle_index, vehicles_list)
+radar_hub = SensorHub(vehicle_index, csv_writer, radar_rows, gate=8)
+
+
+# Create the LIDAR sensor and start data collecting
+lidar_blueprint = blueprint_library.find('sensor.lidar.ray_cast')
+lidar_blueprint.set_attribute('range', str(LIDAR_RANGE))
+lidar_transform = carla.Transform(carla.Location(x=100, y=50, z=3))
+lidar_sensor = world.spawn_actor(lidar_blueprint, lidar_transform)
+lidar_sensor.listen(lidar_ingest)
 
 #Create the RADAR sensors and start collecting data
 radar_blueprint = blueprint_library.find('sensor.other.radar')
 radar_transform = carla.Transform(carla.Location(x=100, y=50, z=3))
 radar_sensor = world.spawn_actor(radar_blueprint, radar_transform)
-radar_sensor.listen(lambda data: save_data('RADAR', radar_transform, data, 'radar_1'))
+radar_hub.register('radar_1', radar_sensor, radar_transform)
 
 #Create the 2nd RADAR sensors and start collecting data
 radar_blueprint2 = blueprint_library.find('sensor.other.radar')
 radar_transform2 = carla.Transform(carla.Location(x=96.17, y=75.19, z=1.72))
 radar_sensor2 = world.spawn_actor(radar_blueprint2, radar_transform2)
-radar_sensor2.listen(lambda data: save_data('RADAR', radar_transform2, data, 'radar_2'))
+radar_hub.register('radar_2', radar_sensor2, radar_transform2)
 
 #Create the 3rd RADAR sensors and start collecting data
 radar_blueprint3 = blueprint_library.find('sensor.other.radar')
 radar_transform3 = carla.Transform(carla.Location(x=96.17, y=75.19, z=1.72))
 radar_sensor3 = world.spawn_actor(radar_blueprint3, radar_transform3)
-radar_sensor3.listen(lambda data: save_data('RADAR', radar_transform3, data, 'radar_3'))
+radar_hub.register('radar_3', radar_sensor3, radar_transform3)
+
+radar_hub.start()
 
 #Creating the RGB camera to take pictures of the vehicles in the simulation
 camera_blueprint = blueprint_library.find('sensor.camera.rgb')  
@@ -103,7 +102,7 @@ camera_blueprint.set_attribute('image_size_y', '600')
 camera_blueprint.set_attribute('fov', '90')
 camera_transform = carla.Transform(carla.Location(x=100, y=50, z=3))
 camera_sensor = world.spawn_actor(camera_blueprint, camera_transform)
-camera_sensor.listen(lambda image: save_image(image))
+camera_sensor.listen(camera_capture)
 
 #Creating map 
 map = world.get_map()
@@ -169,12 +168,23 @@ try:
         
 finally: 
     # Stop the sensors and vehicles
-    #lidar_sensor.stop()
+    lidar_sensor.stop()
     radar_sensor.stop()
-
+    radar_sensor2.stop()
+    radar_sensor3.stop()
+    camera_sensor.stop()
+
+    world.remove_on_tick(tick_listener)
+    radar_hub.stop()
+    radar_hub.print_stats()
+    camera_capture.close()
+    camera_capture.print_stats()
+    lidar_ingest.close()
+    lidar_ingest.print_stats()
+    csv_writer.close()
     csv_file.close()
 
-    for vehicle in vehicles_list:
-        vehicle.destroy()
+    destroyed, errors = destroy_actors(client, [v for v in vehicles_list if v.is_alive])
+    report_errors('DESTROY', errors)
     
     
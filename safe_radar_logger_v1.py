@@ -1,6 +1,6 @@
 # safe_radar_logger.py (collect 120s of actual detection time with logging)
 
-import carla
+from carla_backend import carla
 import csv
 import time
 import os
@@ -9,36 +9,84 @@ import random
 import sys
 import traceback
 
+from actor_lifecycle import destroy_actors, report_errors, spawn_vehicles
+from async_writer import AsyncRowWriter
+from collection_metrics import CollectionMetrics, MetricsReporter
+from columnar_store import ColumnarWriter
+from ground_truth import GroundTruthRecorder
+from radar_association import ALTITUDE, AZIMUTH, VELOCITY, decode_measurement
+from spatial_index import ActorIndex, track_actors
+from sync_collection import SynchronousSession, check_world_free
+from tick_scheduler import TickScheduler
+
 # === Config ===
 LABEL = 'safe'
-OUTPUT_FILE = f'{LABEL}_radar_data.csv'
+OUTPUT_FORMAT = 'csv'  # 'csv' or 'columnar' (chunked .npz row groups, see columnar_store.py)
+OUTPUT_FILE = f'{LABEL}_radar_data.csv' if OUTPUT_FORMAT == 'csv' else f'{LABEL}_radar_data.columnar'
 SPAWN_INTERVAL = 4
+CLEANUP_INTERVAL = 10
+FLUSH_INTERVAL = 5
+PROGRESS_INTERVAL = 10
 MAX_ACTIVE_VEHICLES = 15
 RADAR_LOCATION = carla.Location(x=84, y=57, z=3)
 RADAR_ROTATION = carla.Rotation(yaw=0)
 SPAWN_LOCATION = carla.Location(x=148.38, y=57.09, z=2.5)
 TOTAL_RUNTIME = 120
+CARLA_HOST = 'localhost'
+CARLA_PORT = 2000
+TM_PORT = 8000  # traffic manager port; loggers running on the same machine need different ports
+OUTPUT_DIR = 'output'
 VEHICLE_CLEANUP_THRESHOLD = 100
+ASSOCIATION_GATE = 6.0
+SYNCHRONOUS_MODE = True  # drive world.tick() with a fixed step; TOTAL_RUNTIME is then simulated seconds
+DELTA_SECONDS = 0.05
+WRITER_POLICY = 'block'  # 'block', 'drop_oldest' or 'drop_newest' when the write queue is full
+ONLINE_SCORING = False  # flag unsafe drivers live with the SCORING_MODEL artifact (online_classifier.py)
+SCORING_MODEL = 'models/logistic_regression'  # written by logistic_regression.py
+METRICS_FILE = f'{LABEL}_metrics.json'  # snapshot in OUTPUT_DIR ('.prom' for Prometheus text), see collection_metrics.py
+GROUND_TRUTH_FILE = f'{LABEL}_ground_truth.columnar'  # per-tick vehicle state in OUTPUT_DIR (ground_truth.py); None disables
+METRICS_INTERVAL = 10  # all intervals are in simulated seconds (tick_scheduler.py)
 
 # === Global State ===
-detection_count = 0
+metrics = CollectionMetrics()  # thread-safe; updated from the sensor callbacks and the main loop
+scheduler = TickScheduler()  # periodic main loop tasks, fired by world ticks
 first_detection_time = None
+clock = time.time  # replaced by the simulated clock once the world is set up
+
+COLUMNS = ['timestamp', 'x', 'y', 'z', 'velocity', 'azimuth', 'sensor_id', 'vehicle_id', 'label']
+COLUMN_KINDS = {
+    'timestamp': 'float64', 'x': 'float32', 'y': 'float32', 'z': 'float32', 'velocity': 'float32',
+    'azimuth': 'float32', 'sensor_id': 'category', 'vehicle_id': 'int32', 'label': 'category',
+}
 
 # === Setup ===
 def setup_csv_writer(filename):
-    if not os.path.exists('output'):
-        os.makedirs('output')
-    path = os.path.join('output', filename)
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+    path = os.path.join(OUTPUT_DIR, filename)
     f = open(path, 'w', newline='')
     writer = csv.writer(f)
-    writer.writerow(['timestamp', 'x', 'y', 'z', 'velocity', 'azimuth', 'sensor_id', 'vehicle_id', 'label'])
+    writer.writerow(COLUMNS)
     print(f"[SETUP] CSV file created at {path}")
     return f, writer
 
+def setup_columnar_writer(filename):
+    path = os.path.join(OUTPUT_DIR, filename)
+    writer = ColumnarWriter(path, COLUMNS, COLUMN_KINDS)
+    print(f"[SETUP] Columnar dataset created at {path}")
+    return writer, writer
+
+def setup_online_scorer():
+    from online_classifier import OnlineDriverScorer
+    scorer = OnlineDriverScorer.from_artifact(SCORING_MODEL)
+    print(f"[SETUP] Online scorer loaded from {SCORING_MODEL}")
+    return scorer
+
 def setup_carla():
     print("[SETUP] Connecting to CARLA...")
-    client = carla.Client('localhost', 2000)
+    client = carla.Client(CARLA_HOST, CARLA_PORT)
     client.set_timeout(20.0)
+    check_world_free(client.get_world())  # before load_world, which would reset the other client's world
     world = client.load_world('Town01')
     print("[SETUP] CARLA world loaded")
     return client, world
@@ -47,11 +95,8 @@ def set_spectator(world, transform):
     world.get_spectator().set_transform(transform)
     print("[SETUP] Spectator positioned")
 
-def is_spawn_point_clear(spawn_point, vehicles, min_distance=8.0):
-    for v in vehicles:
-        if v.is_alive and v.get_transform().location.distance(spawn_point.location) < min_distance:
-            return False
-    return True
+def is_spawn_point_clear(spawn_point, vehicle_index, min_distance=8.0):
+    return not vehicle_index.within(spawn_point.location, min_distance)
 
 def create_radar_sensor(world, blueprint_library, transform, callback):
     radar_bp = blueprint_library.find('sensor.other.radar')
@@ -63,116 +108,146 @@ def create_radar_sensor(world, blueprint_library, transform, callback):
     print("[SETUP] Radar sensor created and listening")
     return radar
 
-def save_radar_data(radar_data, sensor_id, radar_transform, vehicles_list, writer):
-    global detection_count, first_detection_time
+def save_radar_data(radar_data, sensor_id, radar_transform, vehicle_index, writer, scorer=None):
+    global first_detection_time
+    start = time.perf_counter()
+    metrics.frames.update(sensor_id, radar_data.frame)
     if not radar_data:
         return
-    for detection in radar_data:
-        try:
-            x = detection.depth * np.cos(detection.azimuth)
-            y = detection.depth * np.sin(detection.azimuth)
-            z = detection.altitude
-            velocity = detection.velocity
-            azimuth = detection.azimuth
-            radar_loc = radar_transform.location + carla.Location(x=x, y=y)
-
-            for vehicle in vehicles_list:
-                if not vehicle.is_alive:
-                    continue
-                if radar_loc.distance(vehicle.get_transform().location) < 6.0:
-                    writer.writerow([time.time(), x, y, z, velocity, azimuth, sensor_id, vehicle.id, LABEL])
-                    detection_count += 1
-                    if first_detection_time is None:
-                        first_detection_time = time.time()
-                        print("[INFO] First detection timestamp recorded")
-                    if detection_count % 10 == 0:
-                        print(f"[INFO] Radar detections recorded: {detection_count}")
-                    break
-        except Exception as e:
-            print(f"[ERROR] Processing detection: {e}")
-
-def cleanup_distant_vehicles(vehicles_list, radar_location, threshold):
-    remaining = []
-    removed = 0
-    for v in vehicles_list:
-        try:
-            if not v.is_alive:
-                continue
-            if v.get_transform().location.distance(radar_location) > threshold:
-                print(f"[CLEANUP] Removing vehicle {v.id}")
-                v.destroy()
-                removed += 1
-            else:
-                remaining.append(v)
-        except:
-            pass
-    if removed:
+    try:
+        # One vectorized pass over the raw buffer: sensor rotation and altitude included
+        batch = decode_measurement(radar_data, radar_transform)
+        detections = batch.detections
+        x, y = batch.offsets[:, 0], batch.offsets[:, 1]
+
+        # Nearest vehicle per detection from the per-tick index (no RPCs)
+        matches, vehicles = vehicle_index.nearest(batch.points, ASSOCIATION_GATE)
+        matched = np.flatnonzero(matches >= 0)
+        if len(matched) == 0:
+            return
+
+        timestamp = batch.timestamp
+        writer.writerows(
+            [timestamp, x[i], y[i], detections[i, ALTITUDE], detections[i, VELOCITY], detections[i, AZIMUTH],
+             sensor_id, vehicles[matches[i]].id, LABEL]
+            for i in matched
+        )
+        if scorer is not None:
+            scorer.update(timestamp, [vehicles[m].id for m in matches[matched]], x[matched], y[matched],
+                          detections[matched, ALTITUDE], detections[matched, VELOCITY], detections[matched, AZIMUTH])
+        detection_count = metrics.detections.inc(len(matched), sensor=sensor_id)
+        previous_count = detection_count - len(matched)
+        if first_detection_time is None:
+            first_detection_time = clock()
+            scheduler.at(first_detection_time + TOTAL_RUNTIME, scheduler.stop, 'runtime')
+            print("[INFO] First detection timestamp recorded")
+        if detection_count // 10 > previous_count // 10:
+            print(f"[INFO] Radar detections recorded: {detection_count}")
+    except Exception as e:
+        print(f"[ERROR] Processing detections: {e}")
+    finally:
+        metrics.callback_seconds.observe(time.perf_counter() - start, sensor=sensor_id)
+
+def cleanup_distant_vehicles(client, vehicles_list, vehicle_index, radar_location, threshold):
+    distant = {v.id for v in vehicle_index.beyond(radar_location, threshold)}
+    alive = [v for v in vehicles_list if v.is_alive]
+    to_remove = [v for v in alive if v.id in distant]
+    if to_remove:
+        # One destroy batch for every distant vehicle
+        with metrics.rpc_seconds.time(call='destroy'):
+            removed, errors = destroy_actors(client, to_remove)
+        report_errors('CLEANUP', errors)
         print(f"[CLEANUP] Removed {removed} vehicles beyond {threshold}m")
-    return remaining
+    return [v for v in alive if v.id not in distant]
 
 def main():
-    global first_detection_time
+    global first_detection_time, clock
     vehicles_list = []
-    csv_file, radar_sensor = None, None
+    csv_file, csv_writer, radar_sensor, session, scorer = None, None, None, None, None
+    client, world, tick_listener, scheduler_listener, reporter = None, None, None, None, None
+    ground_truth = None
+    completed = False
     try:
         print("\n=== Starting CARLA Radar Logger ===")
-        csv_file, csv_writer = setup_csv_writer(OUTPUT_FILE)
+        if ONLINE_SCORING:
+            scorer = setup_online_scorer()
+        if OUTPUT_FORMAT == 'columnar':
+            csv_file, file_writer = setup_columnar_writer(OUTPUT_FILE)
+        else:
+            csv_file, file_writer = setup_csv_writer(OUTPUT_FILE)
+        csv_writer = AsyncRowWriter(file_writer, csv_file, policy=WRITER_POLICY)
+        reporter = MetricsReporter(metrics.registry, os.path.join(OUTPUT_DIR, METRICS_FILE), METRICS_INTERVAL, collect=[
+            lambda: metrics.sample_writer(csv_writer),
+            lambda: metrics.active_vehicles.set(len(vehicles_list)),
+        ])
         client, world = setup_carla()
         blueprint_library = world.get_blueprint_library()
         radar_transform = carla.Transform(RADAR_LOCATION, RADAR_ROTATION)
         set_spectator(world, radar_transform)
 
-        radar_sensor = create_radar_sensor(
-            world, blueprint_library, radar_transform,
-            lambda data: save_radar_data(data, 'radar_1', radar_transform, vehicles_list, csv_writer)
-        )
+        vehicle_index = ActorIndex()
+        tick_listener = track_actors(world, vehicle_index, vehicles_list)
+        if GROUND_TRUTH_FILE:
+            ground_truth = GroundTruthRecorder(os.path.join(OUTPUT_DIR, GROUND_TRUTH_FILE), vehicles_list).attach(world)
 
-        tm = client.get_trafficmanager()
+        tm = client.get_trafficmanager(TM_PORT)
         tm.set_global_distance_to_leading_vehicle(0.5)
         tm.set_synchronous_mode(False)
 
-        spawn_point = world.get_map().get_waypoint(SPAWN_LOCATION, project_to_road=True).transform
+        radar_callback = lambda data: save_radar_data(data, 'radar_1', radar_transform, vehicle_index, csv_writer, scorer)
+        if SYNCHRONOUS_MODE:
+            session = SynchronousSession(world, tm, DELTA_SECONDS).start()
+            clock = lambda: session.elapsed
+            radar_callback = session.frame_aligned(radar_callback)
+        else:
+            scheduler_listener = scheduler.attach(world)
+            clock = lambda: scheduler.time
+        radar_sensor = create_radar_sensor(world, blueprint_library, radar_transform, radar_callback)
 
-        print("\n=== Entering main loop ===")
-        main_start_time = time.time()
-        last_spawn = main_start_time
-        last_cleanup = main_start_time
-        last_flush = main_start_time
-        spawned_count = 0
+        spawn_point = world.get_map().get_waypoint(SPAWN_LOCATION, project_to_road=True).transform
         vehicle_bps = blueprint_library.filter('vehicle.*')
+        spawned_count = 0
 
-        while True:
-            now = time.time()
-            if first_detection_time and now - first_detection_time >= TOTAL_RUNTIME:
-                break
-
-            if len(vehicles_list) < MAX_ACTIVE_VEHICLES and now - last_spawn >= SPAWN_INTERVAL:
-                if is_spawn_point_clear(spawn_point, vehicles_list):
-                    bp = random.choice(vehicle_bps)
-                    vehicle = world.try_spawn_actor(bp, spawn_point)
-                    if vehicle:
-                        vehicle.set_autopilot(True, tm.get_port())
-                        vehicles_list.append(vehicle)
-                        spawned_count += 1
-                        print(f"[SPAWN] SAFE vehicle #{spawned_count} (active: {len(vehicles_list)})")
-                last_spawn = now
+        def spawn():
+            nonlocal spawned_count
+            if len(vehicles_list) >= MAX_ACTIVE_VEHICLES or not is_spawn_point_clear(spawn_point, vehicle_index):
+                return
+            bp = random.choice(vehicle_bps)
+            # Spawn and autopilot go to the server as one batch
+            with metrics.rpc_seconds.time(call='spawn'):
+                spawned, errors = spawn_vehicles(client, [(bp, spawn_point)], tm.get_port())
+            metrics.record_spawns(spawned, errors)
+            for vehicle in spawned:
+                vehicles_list.append(vehicle)
+                spawned_count += 1
+                print(f"[SPAWN] SAFE vehicle #{spawned_count} (active: {len(vehicles_list)})")
 
-            if now - last_cleanup >= 10:
-                vehicles_list = cleanup_distant_vehicles(vehicles_list, RADAR_LOCATION, VEHICLE_CLEANUP_THRESHOLD)
-                last_cleanup = now
+        def cleanup():
+            vehicles_list[:] = cleanup_distant_vehicles(client, vehicles_list, vehicle_index, RADAR_LOCATION, VEHICLE_CLEANUP_THRESHOLD)
 
-            if now - last_flush >= 5:
-                csv_file.flush()
-                last_flush = now
+        def progress():
+            if first_detection_time is not None:
+                elapsed = int(clock() - first_detection_time)
+                print(f"[PROGRESS] Elapsed: {elapsed}/{TOTAL_RUNTIME}s | Active vehicles: {len(vehicles_list)} | Total spawned: {spawned_count} | Total detections: {metrics.detections.total()}")
 
-            if first_detection_time:
-                elapsed = int(now - first_detection_time)
-                if elapsed % 10 == 0 and elapsed > 0:
-                    print(f"[PROGRESS] Elapsed: {elapsed}/{TOTAL_RUNTIME}s | Active vehicles: {len(vehicles_list)} | Total spawned: {spawned_count} | Total detections: {detection_count}")
+        scheduler.every(SPAWN_INTERVAL, spawn)
+        scheduler.every(CLEANUP_INTERVAL, cleanup)
+        scheduler.every(FLUSH_INTERVAL, csv_writer.flush, 'flush')
+        scheduler.every(PROGRESS_INTERVAL, progress)
+        scheduler.every(METRICS_INTERVAL, reporter.write, 'metrics')
 
-            time.sleep(0.1)
+        # Ticks drive the tasks: our own world.tick() in synchronous mode, the server's ticks otherwise
+        print("\n=== Entering main loop ===")
+        while scheduler.running:
+            if session:
+                with metrics.rpc_seconds.time(call='tick'):
+                    session.tick()
+                scheduler.run_due(session.elapsed)
+            else:
+                scheduler.run_due(scheduler.wait())
 
-        print(f"\n[INFO] Data collection complete: {detection_count} detections in {TOTAL_RUNTIME}s.")
+        print(f"\n[INFO] Data collection complete: {metrics.detections.total()} detections in {TOTAL_RUNTIME}s.")
+        completed = True
 
     except KeyboardInterrupt:
         print("\n[INTERRUPTED] User terminated the script.")
@@ -181,21 +256,43 @@ def main():
         print(traceback.format_exc())
     finally:
         print("\n=== Cleaning up resources ===")
+        if tick_listener is not None:
+            world.remove_on_tick(tick_listener)
+        if scheduler_listener is not None:
+            world.remove_on_tick(scheduler_listener)
+        if ground_truth:
+            try:
+                ground_truth.close()
+            except Exception as e:
+                print(f"[CLEANUP] Error saving ground truth: {e}")
         if radar_sensor:
             radar_sensor.stop()
             radar_sensor.destroy()
             print("[CLEANUP] Radar sensor destroyed")
-        for v in vehicles_list:
+        if session:
+            session.close()
+        if vehicles_list:
             try:
-                if v.is_alive:
-                    v.destroy()
-            except:
-                pass
+                destroyed, errors = destroy_actors(client, [v for v in vehicles_list if v.is_alive])
+                report_errors('CLEANUP', errors)
+                print(f"[CLEANUP] Destroyed {destroyed} vehicles")
+            except Exception as e:
+                print(f"[CLEANUP] Error destroying vehicles: {e}")
+        if scorer:
+            stats = scorer.stats()
+            print(f"[CLEANUP] Online scorer: {stats['flagged']} flagged, {stats['tracked']} tracked, {stats['evicted']} evicted")
+        if csv_writer:
+            csv_writer.close()
+            stats = csv_writer.stats()
+            print(f"[CLEANUP] Writer: {stats['written']}/{stats['enqueued']} rows written, {stats['dropped']} dropped")
         if csv_file:
-            csv_file.flush()
             csv_file.close()
             print("[CLEANUP] Output file closed")
-        print(f"[DONE] Data saved to output/{OUTPUT_FILE}")
+        if reporter:
+            reporter.stop()
+            print(f"[CLEANUP] Metrics saved to {reporter.path} (spawn success rate {metrics.spawn_success_rate():.0%})")
+        print(f"[DONE] Data saved to {os.path.join(OUTPUT_DIR, OUTPUT_FILE)}")
+    return completed
 
 if __name__ == '__main__':
-    main()
+    sys.exit(0 if main() else 1)
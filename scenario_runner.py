@@ -0,0 +1,250 @@
+# scenario_runner.py (run a list of collection scenarios back to back in one loaded world)
+#
+# A scenario is a JSON object with the settings the radar loggers hardcode
+# (spawn interval, vehicle cap, radar and spawn locations, traffic manager
+# aggressiveness, runtime, ...); missing keys take the DEFAULTS below, which
+# are the values of safe_radar_logger_v1.py. The map is loaded at most once
+# for the whole list (only if the server runs a different map), and between
+# scenarios the vehicles and the radar are destroyed in one batch instead of
+# reloading the world, so a sweep spends its time collecting.
+#
+# A "sweep" object expands one definition into every combination of its
+# values, e.g. {"name": "density", "sweep": {"max_active_vehicles": [5, 10, 20]}}
+# becomes density-max_active_vehicles=5, density-max_active_vehicles=10, ...
+#
+# Every scenario runs in synchronous mode (TOTAL_RUNTIME is simulated time)
+# and writes <output>/<scenario name>.csv with the logger columns plus a
+# scenario column; summary.json lists the per-scenario counts and timings.
+#
+# Usage:  python scenario_runner.py scenarios.json [--output scenario_runs/<timestamp>] [--host H --port P --tm-port T]
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from carla_backend import carla
+from actor_lifecycle import (
+    UNSAFE_TM_SETTINGS, clear_actors, configure_vehicles, destroy_actors, ensure_map,
+    report_errors, spawn_vehicles,
+)
+from async_writer import AsyncRowWriter
+from radar_association import ALTITUDE, AZIMUTH, VELOCITY, decode_measurement
+from spatial_index import ActorIndex, track_actors
+from sync_collection import SynchronousSession
+
+RUNS_DIR = 'scenario_runs'
+COLUMNS = ['timestamp', 'x', 'y', 'z', 'velocity', 'azimuth', 'sensor_id', 'vehicle_id', 'label', 'scenario']
+TM_PRESETS = {'safe': {}, 'unsafe': UNSAFE_TM_SETTINGS}
+CLEANUP_INTERVAL = 10  # simulated seconds between removals of vehicles that drove away
+
+DEFAULTS = {
+    'label': 'safe',
+    'map': 'Town01',
+    'spawn_interval': 4,
+    'max_active_vehicles': 15,
+    'radar_location': [84, 57, 3],
+    'radar_yaw': 0,
+    'spawn_location': [148.38, 57.09, 2.5],
+    'total_runtime': 120,
+    'tm_settings': 'safe',  # preset name from TM_PRESETS, or per-vehicle traffic manager settings
+    'distance_to_leading_vehicle': 0.5,
+    'cleanup_threshold': 100,
+    'association_gate': 6.0,
+    'spawn_clearance': 8.0,
+    'delta_seconds': 0.05,
+}
+
+
+# === Scenario definitions ===
+def expand_scenarios(definitions):
+    """Fill in DEFAULTS, expand "sweep" objects and check every scenario; returns the list to run"""
+    scenarios = []
+    for i, definition in enumerate(definitions):
+        definition = dict(definition)
+        sweep = definition.pop('sweep', {})
+        base_name = definition.get('name', f'scenario-{i:02d}')
+        names = list(sweep)
+        for values in itertools.product(*(sweep[n] for n in names)):
+            scenario = dict(DEFAULTS, **definition)
+            scenario.update(zip(names, values))
+            suffix = ','.join(f'{n}={v}' for n, v in zip(names, values))
+            scenario['name'] = f'{base_name}-{suffix}' if suffix else base_name
+            unknown = set(scenario) - set(DEFAULTS) - {'name'}
+            if unknown:
+                raise ValueError(f"Scenario '{scenario['name']}': unknown settings {sorted(unknown)}")
+            if isinstance(scenario['tm_settings'], str):
+                scenario['tm_settings'] = TM_PRESETS[scenario['tm_settings']]
+            scenarios.append(scenario)
+    names = [s['name'] for s in scenarios]
+    if len(set(names)) != len(names):
+        raise ValueError("Scenario names must be unique")
+    return scenarios
+
+
+def load_scenarios(path):
+    with open(path) as f:
+        definitions = json.load(f)
+    return expand_scenarios(definitions if isinstance(definitions, list) else [definitions])
+
+
+# === Collection ===
+class _RadarRecorder:
+    """Radar callback: matches detections to vehicles through the index and queues the rows"""
+
+    def __init__(self, scenario, radar_transform, vehicle_index, writer):
+        self.scenario = scenario
+        self.radar_transform = radar_transform
+        self.vehicle_index = vehicle_index
+        self.writer = writer
+        self.detections = 0
+
+    def __call__(self, radar_data):
+        if not radar_data:
+            return
+        batch = decode_measurement(radar_data, self.radar_transform)
+        detections = batch.detections
+        x, y = batch.offsets[:, 0], batch.offsets[:, 1]
+        matches, vehicles = self.vehicle_index.nearest(batch.points, self.scenario['association_gate'])
+        matched = np.flatnonzero(matches >= 0)
+        label, name = self.scenario['label'], self.scenario['name']
+        self.writer.writerows(
+            [batch.timestamp, x[i], y[i], detections[i, ALTITUDE], detections[i, VELOCITY],
+             detections[i, AZIMUTH], 'radar_1', vehicles[matches[i]].id, label, name]
+            for i in matched
+        )
+        self.detections += len(matched)
+
+
+def _location(values):
+    return carla.Location(x=values[0], y=values[1], z=values[2])
+
+
+def run_scenario(client, world, tm, scenario, output_dir):
+    """Collect one scenario in the loaded world and leave no actors behind; returns its stats"""
+    blueprint_library = world.get_blueprint_library()
+    vehicle_bps = blueprint_library.filter('vehicle.*')
+    radar_transform = carla.Transform(_location(scenario['radar_location']), carla.Rotation(yaw=scenario['radar_yaw']))
+    spawn_point = world.get_map().get_waypoint(_location(scenario['spawn_location']), project_to_road=True).transform
+    tm.set_global_distance_to_leading_vehicle(scenario['distance_to_leading_vehicle'])
+
+    path = os.path.join(output_dir, f"{scenario['name']}.csv")
+    csv_file = open(path, 'w', newline='')
+    file_writer = csv.writer(csv_file)
+    file_writer.writerow(COLUMNS)
+    writer = AsyncRowWriter(file_writer, csv_file)
+
+    vehicles = []
+    vehicle_index = ActorIndex()
+    tick_listener = track_actors(world, vehicle_index, vehicles)
+    session = SynchronousSession(world, tm, scenario['delta_seconds']).start()
+    recorder = _RadarRecorder(scenario, radar_transform, vehicle_index, writer)
+    radar = None
+    spawned_count = 0
+    started = time.perf_counter()
+    try:
+        radar_bp = blueprint_library.find('sensor.other.radar')
+        radar_bp.set_attribute('horizontal_fov', '90')
+        radar_bp.set_attribute('vertical_fov', '20')
+        radar_bp.set_attribute('range', '30')
+        radar = world.spawn_actor(radar_bp, radar_transform)
+        radar.listen(session.frame_aligned(recorder))
+
+        last_spawn = -scenario['spawn_interval']
+        last_cleanup = 0.0
+        while session.elapsed < scenario['total_runtime']:
+            session.tick()
+            now = session.elapsed
+            if len(vehicles) < scenario['max_active_vehicles'] and now - last_spawn >= scenario['spawn_interval']:
+                if not vehicle_index.within(spawn_point.location, scenario['spawn_clearance']):
+                    spawned, errors = spawn_vehicles(client, [(random.choice(vehicle_bps), spawn_point)], tm.get_port())
+                    configure_vehicles(tm, spawned, scenario['tm_settings'])
+                    report_errors('SPAWN', errors)
+                    vehicles.extend(spawned)
+                    spawned_count += len(spawned)
+                last_spawn = now
+            if now - last_cleanup >= CLEANUP_INTERVAL:
+                distant = {v.id for v in vehicle_index.beyond(radar_transform.location, scenario['cleanup_threshold'])}
+                if distant:
+                    removed, errors = destroy_actors(client, [v for v in vehicles if v.id in distant])
+                    report_errors('CLEANUP', errors)
+                vehicles[:] = [v for v in vehicles if v.id not in distant]
+                last_cleanup = now
+    finally:
+        # Reset for the next scenario: same world, no leftover actors, asynchronous settings restored
+        world.remove_on_tick(tick_listener)
+        if radar is not None:
+            radar.stop()
+        destroyed, errors = destroy_actors(client, vehicles + ([radar] if radar is not None else []))
+        report_errors('RESET', errors)
+        session.close()
+        writer.close()
+        csv_file.close()
+
+    return {
+        'name': scenario['name'],
+        'label': scenario['label'],
+        'simulated_seconds': session.elapsed,
+        'wall_seconds': time.perf_counter() - started,
+        'vehicles_spawned': spawned_count,
+        'detections': recorder.detections,
+        'rows_written': writer.stats()['written'],
+        'output': path,
+    }
+
+
+def run_scenarios(scenarios, output_dir, host='localhost', port=2000, tm_port=8000):
+    """Run every scenario in order in one world; returns the per-scenario stats"""
+    os.makedirs(output_dir, exist_ok=True)
+    client = carla.Client(host, port)
+    client.set_timeout(20.0)
+    started = time.perf_counter()
+    results = []
+    loaded_map = None
+    world = None
+    tm = client.get_trafficmanager(tm_port)
+    for i, scenario in enumerate(scenarios, 1):
+        if scenario['map'] != loaded_map:
+            world = ensure_map(client, scenario['map'])
+            loaded_map = scenario['map']
+        cleared, errors = clear_actors(client, world)
+        report_errors('RESET', errors)
+        if cleared:
+            print(f"[RESET] Removed {cleared} leftover actors")
+        print(f"[SCENARIO] {i}/{len(scenarios)} {scenario['name']} ({scenario['label']}, {scenario['total_runtime']}s)")
+        stats = run_scenario(client, world, tm, scenario, output_dir)
+        results.append(stats)
+        print(f"[SCENARIO] {scenario['name']}: {stats['detections']} detections, {stats['vehicles_spawned']} vehicles, "
+              f"{stats['simulated_seconds']:.0f}s simulated in {stats['wall_seconds']:.1f}s")
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"[DONE] {len(results)} scenarios in {time.perf_counter() - started:.1f}s, results under {output_dir}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run collection scenarios back to back in one loaded world')
+    parser.add_argument('scenarios', help='JSON file with a list of scenario definitions')
+    parser.add_argument('--output', default=None, help=f'output directory (default: {RUNS_DIR}/<timestamp>)')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=2000)
+    parser.add_argument('--tm-port', type=int, default=8000)
+    args = parser.parse_args()
+
+    try:
+        scenarios = load_scenarios(args.scenarios)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[ERROR] {args.scenarios}: {e}")
+        sys.exit(1)
+    output = args.output or os.path.join(RUNS_DIR, time.strftime('%Y%m%d-%H%M%S'))
+    run_scenarios(scenarios, output, args.host, args.port, args.tm_port)
+
+
+if __name__ == '__main__':
+    main()
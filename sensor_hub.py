@@ -0,0 +1,183 @@
+# sensor_hub.py (single ingestion point for many radars)
+#
+# Each registered radar gets a preallocated ring buffer. The sensor callback
+# only copies the frame's detections into its ring; a hub thread drains all
+# rings, merges the detections of every sensor ordered by simulation frame,
+# matches the whole batch against the per-tick vehicle index and does one
+# write for it. Work per cycle therefore no longer grows with
+# sensors x vehicles x detections.
+
+import threading
+import time
+
+import numpy as np
+
+from radar_association import detections_to_array, project_detections
+
+RING_CAPACITY = 16384  # detections buffered per sensor
+PROCESS_INTERVAL = 0.05
+
+
+class DetectionRing:
+    """Fixed-size ring of (N, 4) detections with the simulation frame and timestamp of each row"""
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self.data = np.empty((capacity, 4), dtype=np.float32)
+        self.frames = np.empty(capacity, dtype=np.int64)
+        self.times = np.empty(capacity, dtype=np.float64)
+        self.head = 0  # total rows ever written
+        self.tail = 0  # total rows ever read or overwritten
+        self.received_frames = 0
+        self.received = 0
+        self.overflow = 0
+        self._lock = threading.Lock()
+
+    def push(self, frame, timestamp, detections):
+        n = len(detections)
+        with self._lock:
+            self.received_frames += 1
+            self.received += n
+            if n > self.capacity:
+                self.overflow += n - self.capacity
+                detections = detections[-self.capacity:]
+                n = self.capacity
+            free = self.capacity - (self.head - self.tail)
+            if n > free:
+                # Oldest rows are overwritten
+                self.overflow += n - free
+                self.tail += n - free
+            idx = np.arange(self.head, self.head + n) % self.capacity
+            self.data[idx] = detections
+            self.frames[idx] = frame
+            self.times[idx] = timestamp
+            self.head += n
+
+    def drain(self):
+        """Copy out and release every buffered row"""
+        with self._lock:
+            idx = np.arange(self.tail, self.head) % self.capacity
+            self.tail = self.head
+            return self.data[idx], self.frames[idx], self.times[idx]
+
+    def __len__(self):
+        return self.head - self.tail
+
+
+class SensorHub:
+    """Registers N radars and turns their detections into associated rows once per cycle.
+
+    `format_rows(times, sensor_ids, detections, vehicles)` builds the output rows
+    for the matched detections (all arguments aligned, `vehicles` are the
+    matched actors) and its result is passed to `writer.writerows`.
+    """
+
+    def __init__(self, vehicle_index, writer, format_rows, gate, capacity=RING_CAPACITY):
+        self.vehicle_index = vehicle_index
+        self.writer = writer
+        self.format_rows = format_rows
+        self.gate = gate
+        self.capacity = capacity
+        self.sensor_ids = []
+        self.transforms = []
+        self.rings = []
+        self.processed = []
+        self.matched = []
+        self.started_at = time.time()
+        self._process_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, sensor_id, sensor, transform):
+        """Start routing `sensor`'s measurements into a new ring buffer"""
+        index = len(self.sensor_ids)
+        ring = DetectionRing(self.capacity)
+        self.sensor_ids.append(sensor_id)
+        self.transforms.append(transform)
+        self.rings.append(ring)
+        self.processed.append(0)
+        self.matched.append(0)
+        # The raw buffer is viewed, not decoded per detection, and copied once into the ring
+        sensor.listen(lambda data: ring.push(data.frame, data.timestamp, detections_to_array(data)))
+        print(f"[HUB] Registered {sensor_id} (sensor {index + 1})")
+        return ring
+
+    def process(self):
+        """Drain every ring, associate the merged batch and write the matched rows"""
+        with self._process_lock:
+            batches = [ring.drain() for ring in self.rings]
+            counts = [len(b[0]) for b in batches]
+            total = sum(counts)
+            if total == 0:
+                return 0
+
+            detections = np.concatenate([b[0] for b in batches])
+            frames = np.concatenate([b[1] for b in batches])
+            times = np.concatenate([b[2] for b in batches])
+            sensor_index = np.repeat(np.arange(len(batches)), counts)
+
+            # Project every sensor's slice of the batch with that sensor's transform
+            points = np.empty((total, 3))
+            start = 0
+            for transform, n in zip(self.transforms, counts):
+                points[start:start + n] = project_detections(detections[start:start + n], transform)
+                start += n
+
+            matches, vehicles = self.vehicle_index.nearest(points, self.gate)
+
+            hit = np.flatnonzero(matches >= 0)
+            hit = hit[np.argsort(frames[hit], kind='stable')]
+            if len(hit):
+                self.writer.writerows(self.format_rows(
+                    times[hit],
+                    [self.sensor_ids[i] for i in sensor_index[hit]],
+                    detections[hit],
+                    [vehicles[m] for m in matches[hit]],
+                ))
+
+            matched_counts = np.bincount(sensor_index[hit], minlength=len(batches))
+            for i, n in enumerate(counts):
+                self.processed[i] += n
+                self.matched[i] += int(matched_counts[i])
+            return len(hit)
+
+    def start(self, interval=PROCESS_INTERVAL):
+        """Process on a background thread every `interval` seconds"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name='SensorHub', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and process whatever is still buffered"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.process()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.process()
+            except Exception as e:
+                print(f"[HUB] Error processing detections: {e}")
+
+    def stats(self):
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        return {
+            sensor_id: {
+                'frames': ring.received_frames,
+                'received': ring.received,
+                'processed': self.processed[i],
+                'matched': self.matched[i],
+                'overflow': ring.overflow,
+                'buffered': len(ring),
+                'detections_per_second': ring.received / elapsed,
+            }
+            for i, (sensor_id, ring) in enumerate(zip(self.sensor_ids, self.rings))
+        }
+
+    def print_stats(self):
+        for sensor_id, s in self.stats().items():
+            print(f"[HUB] {sensor_id}: {s['received']} detections in {s['frames']} frames "
+                  f"({s['detections_per_second']:.0f}/s), {s['matched']} matched, {s['overflow']} overflowed")
@@ -0,0 +1,90 @@
+# spatial_index.py (per-tick KD-tree of tracked actor positions)
+#
+# The index is rebuilt once per world tick from the WorldSnapshot that
+# world.on_tick() delivers, so reading actor positions costs no RPCs.
+# Every proximity check (spawn point clearance, distant-vehicle cleanup,
+# radar detection association) then queries the tree instead of calling
+# get_transform() on every vehicle.
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class _IndexState:
+    __slots__ = ('frame', 'actors', 'positions', 'tree')
+
+    def __init__(self, frame, actors, positions, tree):
+        self.frame = frame
+        self.actors = actors
+        self.positions = positions
+        self.tree = tree
+
+
+class ActorIndex:
+    """Positions of a set of actors at one frame, with radius and nearest-neighbour queries.
+
+    `rebuild` swaps in a complete new state in one assignment, so readers on
+    other threads always see positions, actors and tree from the same frame.
+    """
+
+    def __init__(self):
+        self._state = _IndexState(None, [], np.empty((0, 3)), None)
+
+    @property
+    def frame(self):
+        return self._state.frame
+
+    @property
+    def actors(self):
+        return self._state.actors
+
+    def __len__(self):
+        return len(self._state.actors)
+
+    def rebuild(self, world_snapshot, actors):
+        """Index `actors` at the positions recorded in `world_snapshot`; actors missing from it are skipped"""
+        tracked = []
+        positions = []
+        for actor in list(actors):
+            actor_snapshot = world_snapshot.find(actor.id)
+            if actor_snapshot is None:
+                continue
+            loc = actor_snapshot.get_transform().location
+            tracked.append(actor)
+            positions.append((loc.x, loc.y, loc.z))
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        tree = cKDTree(positions) if len(positions) else None
+        self._state = _IndexState(world_snapshot.frame, tracked, positions, tree)
+
+    def nearest(self, points, max_distance):
+        """For each point, the index of the nearest actor closer than `max_distance` (or -1), plus the actor list"""
+        state = self._state
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        matches = np.full(len(points), -1, dtype=np.intp)
+        if state.tree is None or len(points) == 0:
+            return matches, state.actors
+        distance, found = state.tree.query(points, k=1, distance_upper_bound=max_distance)
+        hit = distance < max_distance
+        matches[hit] = found[hit]
+        return matches, state.actors
+
+    def within(self, location, radius):
+        """Actors closer than `radius` to a carla.Location"""
+        state = self._state
+        if state.tree is None:
+            return []
+        found = state.tree.query_ball_point((location.x, location.y, location.z), radius)
+        return [state.actors[i] for i in found]
+
+    def beyond(self, location, radius):
+        """Actors farther than `radius` from a carla.Location"""
+        state = self._state
+        if state.tree is None:
+            return []
+        distance = np.linalg.norm(state.positions - (location.x, location.y, location.z), axis=1)
+        return [state.actors[i] for i in np.flatnonzero(distance > radius)]
+
+
+def track_actors(world, index, actors):
+    """Rebuild `index` from every tick's snapshot; returns the on_tick id for world.remove_on_tick"""
+    return world.on_tick(lambda snapshot: index.rebuild(snapshot, actors))
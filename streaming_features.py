@@ -0,0 +1,133 @@
+# streaming_features.py (out-of-core acceleration / jerk features for logistic_regression.py)
+#
+# Produces the same dt, acceleration and jerk columns as
+# logistic_regression.compute_motion_features, but reads the logs in chunks
+# and only keeps a small per-vehicle carry-over state between chunks
+# (last timestamp, last velocity, last acceleration), so memory is bounded
+# by the chunk size and the number of vehicles rather than the log size.
+#
+# Rows of one vehicle must arrive in timestamp order across chunks, which is
+# how the loggers write them. A row that is not newer than the previous row
+# of its vehicle is dropped, just like the dt > 0 filter in the batch code.
+#
+# Usage:  python streaming_features.py <output_dir> safe_radar_data.csv:safe unsafe_radar_data.csv:unsafe
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import ColumnarWriter, infer_kind, is_columnar, iter_row_groups
+
+LABELS = {'safe': 0, 'unsafe': 1}
+CHUNK_ROWS = 1_000_000
+
+
+def iter_labeled_chunks(sources, chunksize=CHUNK_ROWS):
+    """Yield DataFrame chunks from (path, label) sources with the numeric label filled in"""
+    for path, label in sources:
+        if is_columnar(path):
+            chunks = iter_row_groups(path)
+        else:
+            chunks = pd.read_csv(path, chunksize=chunksize)
+        for chunk in chunks:
+            chunk['label'] = LABELS[label]
+            yield chunk
+
+
+def _shift_in_groups(values, starts, carried):
+    """Previous value within each vehicle run; run starts take the carried-over value"""
+    prev = np.empty(len(values))
+    prev[1:] = values[:-1]
+    prev[starts] = carried
+    return prev
+
+
+def _run_bounds(ids):
+    change = ids[1:] != ids[:-1]
+    return np.r_[True, change], np.r_[change, True]
+
+
+class MotionFeatureStream:
+    """Carry-over state for computing dt / acceleration / jerk chunk by chunk"""
+
+    def __init__(self):
+        self.last_timestamp = pd.Series(dtype=np.float64)
+        self.last_velocity = pd.Series(dtype=np.float64)
+        self.last_acceleration = pd.Series(dtype=np.float64)
+
+    def process(self, chunk):
+        """Return the rows of `chunk` that have finite acceleration and jerk, with the feature columns added"""
+        chunk = chunk.sort_values(['vehicle_id', 'timestamp'], kind='stable')
+        ids = chunk['vehicle_id'].to_numpy()
+        timestamps = chunk['timestamp'].to_numpy(dtype=np.float64)
+        velocity = chunk['velocity'].to_numpy(dtype=np.float64)
+        if len(ids) == 0:
+            return chunk.assign(dt=[], acceleration=[], jerk=[])
+
+        starts, ends = _run_bounds(ids)
+        prev_t = _shift_in_groups(timestamps, starts, self.last_timestamp.reindex(ids[starts]).to_numpy())
+        dt = timestamps - prev_t
+        self.last_timestamp = _replace(self.last_timestamp, ids[ends], timestamps[ends])
+
+        # Acceleration and jerk are differences between consecutive rows that pass the dt > 0 filter
+        kept = np.flatnonzero(dt > 0)
+        kept_ids = ids[kept]
+        kept_dt = dt[kept]
+        kept_velocity = velocity[kept]
+        if len(kept) == 0:
+            return chunk.iloc[:0].assign(dt=[], acceleration=[], jerk=[])
+
+        k_starts, k_ends = _run_bounds(kept_ids)
+        prev_v = _shift_in_groups(kept_velocity, k_starts, self.last_velocity.reindex(kept_ids[k_starts]).to_numpy())
+        acceleration = (kept_velocity - prev_v) / kept_dt
+        prev_a = _shift_in_groups(acceleration, k_starts, self.last_acceleration.reindex(kept_ids[k_starts]).to_numpy())
+        with np.errstate(invalid='ignore'):
+            jerk = (acceleration - prev_a) / kept_dt
+
+        self.last_velocity = _replace(self.last_velocity, kept_ids[k_ends], kept_velocity[k_ends])
+        self.last_acceleration = _replace(self.last_acceleration, kept_ids[k_ends], acceleration[k_ends])
+
+        out = chunk.iloc[kept].assign(dt=kept_dt, acceleration=acceleration, jerk=jerk)
+        return out[np.isfinite(acceleration) & np.isfinite(jerk)]
+
+
+def _replace(state, ids, values):
+    """Set state[ids] = values, adding vehicles that are new"""
+    update = pd.Series(values, index=ids)
+    return pd.concat([state[~state.index.isin(ids)], update])
+
+
+def stream_motion_features(chunks):
+    """Yield featurized chunks for an iterable of raw DataFrame chunks"""
+    stream = MotionFeatureStream()
+    for chunk in chunks:
+        features = stream.process(chunk)
+        if len(features):
+            yield features
+
+
+def featurize_to_columnar(sources, out_path, chunksize=CHUNK_ROWS):
+    """Stream (path, label) sources into a columnar dataset of featurized rows"""
+    writer = None
+    rows = 0
+    for features in stream_motion_features(iter_labeled_chunks(sources, chunksize)):
+        if writer is None:
+            kinds = {name: infer_kind(name, dtype) for name, dtype in features.dtypes.items()}
+            kinds.update(dt='float64', acceleration='float64', jerk='float64', label='int32')
+            writer = ColumnarWriter(out_path, list(features.columns), kinds)
+        writer.write_frame(features)
+        rows += len(features)
+    if writer is None:
+        raise ValueError("No rows with valid acceleration and jerk were produced")
+    writer.close()
+    return rows
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Usage: python streaming_features.py <output_dir> <path>:<safe|unsafe> [<path>:<label> ...]")
+        sys.exit(1)
+    sources = [tuple(arg.rsplit(':', 1)) for arg in sys.argv[2:]]
+    n = featurize_to_columnar(sources, sys.argv[1])
+    print(f"[DONE] {n} featurized rows written to {sys.argv[1]}")
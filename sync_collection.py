@@ -0,0 +1,103 @@
+# sync_collection.py (fixed-step synchronous collection driven by world.tick())
+
+import queue
+
+
+def check_world_free(world):
+    """Raise RuntimeError when another client is driving `world` in synchronous mode"""
+    if world.get_settings().synchronous_mode:
+        raise RuntimeError("The world is already in synchronous mode, another client is ticking it "
+                           "(run each logger against its own server, e.g. with collection_orchestrator.py)")
+
+
+class SynchronousSession:
+    """Run the world in fixed-step synchronous mode and hand out sensor data per tick.
+
+    The client owns the clock: every `tick()` advances the simulation by
+    exactly `delta_seconds`, so runtime is measured in simulated seconds and
+    collection runs as fast as the server can step. Sensor callbacks wrapped
+    with `frame_aligned` are queued by the sensor thread and replayed on the
+    caller's thread once the data for the ticked frame has arrived.
+
+    Only one client may drive a world's clock: start() refuses a world that
+    is already in synchronous mode (another logger, or a run that did not
+    restore its settings), so each logger needs its own server.
+    """
+
+    def __init__(self, world, traffic_manager=None, delta_seconds=0.05, sensor_timeout=2.0):
+        self.world = world
+        self.traffic_manager = traffic_manager
+        self.delta_seconds = delta_seconds
+        self.sensor_timeout = sensor_timeout
+        self.frame = None
+        self.ticks = 0
+        self.missed_sensor_frames = 0
+        self._original_settings = None
+        self._sensor_queues = []
+
+    @property
+    def elapsed(self):
+        """Simulated seconds since the session started"""
+        return self.ticks * self.delta_seconds
+
+    def start(self):
+        check_world_free(self.world)
+        self._original_settings = self.world.get_settings()
+        settings = self.world.get_settings()
+        settings.synchronous_mode = True
+        settings.fixed_delta_seconds = self.delta_seconds
+        self.world.apply_settings(settings)
+        if self.traffic_manager is not None:
+            self.traffic_manager.set_synchronous_mode(True)
+        print(f"[SETUP] Synchronous mode on (fixed step {self.delta_seconds}s)")
+        return self
+
+    def close(self):
+        if self._original_settings is None:
+            return
+        if self.traffic_manager is not None:
+            self.traffic_manager.set_synchronous_mode(False)
+        self.world.apply_settings(self._original_settings)
+        self._original_settings = None
+        print(f"[CLEANUP] Synchronous mode off after {self.ticks} ticks ({self.elapsed:.1f}s simulated)")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def frame_aligned(self, callback):
+        """Return a listen() callback that defers `callback` to the tick that produced the data"""
+        data_queue = queue.Queue()
+        self._sensor_queues.append([data_queue, callback, None])  # queue, callback, data held for a later tick
+        return data_queue.put
+
+    def tick(self):
+        """Advance one fixed step and deliver every registered sensor's data for that frame"""
+        self.frame = self.world.tick()
+        self.ticks += 1
+        for entry in self._sensor_queues:
+            data = self._wait_for_frame(entry)
+            if data is None:
+                self.missed_sensor_frames += 1
+                continue
+            entry[1](data)
+        return self.frame
+
+    def _wait_for_frame(self, entry):
+        data_queue = entry[0]
+        while True:
+            data, entry[2] = entry[2], None
+            if data is None:
+                try:
+                    data = data_queue.get(timeout=self.sensor_timeout)
+                except queue.Empty:
+                    print(f"[WARNING] No sensor data for frame {self.frame}")
+                    return None
+            if data.frame == self.frame:
+                return data
+            if data.frame > self.frame:
+                # This frame's data never came; keep the newer data for the tick that produced it
+                entry[2] = data
+                return None
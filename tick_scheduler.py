@@ -0,0 +1,135 @@
+# tick_scheduler.py (periodic collection tasks on simulation time, fired by world ticks)
+#
+# The loggers' periodic work (spawning, cleanup, flushing, progress and
+# metrics) is registered as tasks with a period in simulated seconds. The
+# tasks sit in a heap ordered by due time, so finding out that nothing is
+# due is one comparison however many tasks there are.
+#
+#   synchronous mode   the main loop calls session.tick() and then
+#                      run_due(session.elapsed): tasks fire on the exact
+#                      tick they are due
+#   asynchronous mode  attach(world) registers a world.on_tick() listener
+#                      that only records the tick's simulation time and
+#                      wakes the main thread when the earliest task is due;
+#                      wait() blocks until then, so an idle loop costs no
+#                      wakeups. The tasks themselves still run on the main
+#                      thread (never inside the simulator's callback thread)
+#
+# A task that fell behind (e.g. a slow spawn call) runs once and is then
+# rescheduled on its original grid, skipping the periods it missed.
+
+import heapq
+import itertools
+import math
+import threading
+
+TICK_TIMEOUT = 10.0  # wall seconds wait() allows between world ticks
+
+
+class Task:
+    __slots__ = ('name', 'fn', 'period', 'due', 'runs', 'skipped', 'cancelled')
+
+    def __init__(self, name, fn, period, due):
+        self.name = name
+        self.fn = fn
+        self.period = period
+        self.due = due
+        self.runs = 0
+        self.skipped = 0
+        self.cancelled = False
+
+
+class TickScheduler:
+    """Heap of tasks due at simulation times; `every` for periodic tasks, `at` for one-shots"""
+
+    def __init__(self, time=0.0):
+        self.time = time
+        self.running = True
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._next_due = math.inf
+
+    def every(self, period, fn, name=None, delay=None):
+        """Call fn() every `period` simulated seconds, first after `delay` (default: one period)"""
+        if period <= 0:
+            raise ValueError(f"Task period must be positive, got {period}")
+        return self._push(Task(name or fn.__name__, fn, period, self.time + (period if delay is None else delay)))
+
+    def at(self, when, fn, name=None):
+        """Call fn() once at simulation time `when`"""
+        return self._push(Task(name or fn.__name__, fn, None, when))
+
+    def cancel(self, task):
+        task.cancelled = True
+
+    def stop(self):
+        """End the main loop (`running` turns False) and release a waiting wait()"""
+        self.running = False
+        self._wake.set()
+
+    def _push(self, task):
+        # at() may be called from a sensor thread while the main thread runs tasks
+        with self._lock:
+            heapq.heappush(self._heap, (task.due, next(self._seq), task))
+            self._next_due = self._heap[0][0]
+            if self.time >= self._next_due:
+                self._wake.set()
+        return task
+
+    def run_due(self, now):
+        """Run every task due at or before `now`, in due order; returns how many ran"""
+        self.time = max(self.time, now)
+        ran = 0
+        while self.running:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    self._next_due = self._heap[0][0] if self._heap else math.inf
+                    self._wake.clear()
+                    if self.time >= self._next_due:
+                        self._wake.set()
+                    return ran
+                due, _, task = heapq.heappop(self._heap)
+            if task.cancelled:
+                continue
+            task.fn()
+            task.runs += 1
+            ran += 1
+            if task.period is not None and not task.cancelled:
+                missed = int((now - due) // task.period)
+                task.skipped += missed
+                task.due = due + (missed + 1) * task.period
+                self._push(task)
+        return ran
+
+    # === Asynchronous mode ===
+    def on_tick(self, world_snapshot):
+        """world.on_tick() listener: record the simulation time, wake the main thread if a task is due"""
+        self.time = world_snapshot.timestamp.elapsed_seconds
+        if self.time >= self._next_due:
+            self._wake.set()
+
+    def attach(self, world):
+        """Follow the world's own ticks; returns the on_tick id for world.remove_on_tick"""
+        self.time = world.get_snapshot().timestamp.elapsed_seconds
+        return world.on_tick(self.on_tick)
+
+    def wait(self, timeout=TICK_TIMEOUT):
+        """Block until a tick reaches the earliest due time (or stop()); returns the simulation time
+
+        Raises RuntimeError when the simulation time has not advanced for
+        `timeout` wall seconds, which means the simulator stopped.
+        """
+        last = self.time
+        while self.running and not self._wake.wait(timeout):
+            # A long wait is normal while the next task is far away; only a frozen clock is an error
+            if self.time == last:
+                raise RuntimeError(f"No world tick for {timeout:.0f}s (simulation time {self.time:.2f}s)")
+            last = self.time
+        return self.time
+
+    def tasks(self):
+        """[(name, runs, skipped)] of the tasks still scheduled"""
+        with self._lock:
+            return sorted((t.name, t.runs, t.skipped) for _, _, t in self._heap if not t.cancelled)
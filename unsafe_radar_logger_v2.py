@@ -1,6 +1,6 @@
 # unsafe_radar_logger.py (continuous spawning version)
 
-import carla
+from carla_backend import carla
 import csv
 import time
 import os
@@ -9,27 +9,62 @@ import random
 import sys
 import traceback
 
+from actor_lifecycle import (
+    UNSAFE_TM_SETTINGS, configure_vehicles, destroy_actors, spawn_vehicles,
+)
+from async_writer import AsyncRowWriter
+from collection_metrics import CollectionMetrics, MetricsReporter
+from columnar_store import ColumnarWriter
+from ground_truth import GroundTruthRecorder
+from radar_association import ALTITUDE, AZIMUTH, VELOCITY, decode_measurement
+from spatial_index import ActorIndex, track_actors
+from sync_collection import SynchronousSession, check_world_free
+from tick_scheduler import TickScheduler
+
 # === Config ===
 LABEL = 'unsafe'
-OUTPUT_FILE = f'{LABEL}_radar_data.csv'
+OUTPUT_FORMAT = 'csv'  # 'csv' or 'columnar' (dictionary-encoded .npz row groups, see columnar_store.py)
+OUTPUT_FILE = f'{LABEL}_radar_data.csv' if OUTPUT_FORMAT == 'csv' else f'{LABEL}_radar_data.columnar'
 SPAWN_INTERVAL = 4  # Time between spawn attempts
+CLEANUP_INTERVAL = 10  # Time between checks for vehicles that drove away
+FLUSH_INTERVAL = 5  # Time between output file flushes
+STATUS_INTERVAL = 10  # Time between progress lines
 MAX_ACTIVE_VEHICLES = 15  # Maximum number of vehicles active at once
 RADAR_LOCATION = carla.Location(x=84, y=57, z=3)
 RADAR_ROTATION = carla.Rotation(yaw=0)
 SPAWN_LOCATION = carla.Location(x=148.38, y=57.09, z=2.5)
 TOTAL_RUNTIME = 240  # Total runtime for the entire process
+CARLA_HOST = 'localhost'  # Simulator server to connect to
+CARLA_PORT = 2000
+TM_PORT = 8000  # Traffic manager port; loggers running on the same machine need different ports
+OUTPUT_DIR = 'output'  # Directory the output file is written to
 VEHICLE_CLEANUP_THRESHOLD = 100  # Distance threshold for removing vehicles that have gone too far
+SYNCHRONOUS_MODE = True  # Drive world.tick() ourselves; TOTAL_RUNTIME is then counted in simulated seconds
+DELTA_SECONDS = 0.05  # Fixed simulation step per tick
+WRITER_POLICY = 'block'  # Backpressure when the write queue is full: 'block', 'drop_oldest' or 'drop_newest'
+ASSOCIATION_GATE = 6.0  # Max distance (m) between a detection and the vehicle it is matched to
+ONLINE_SCORING = False  # Flag unsafe drivers live with the SCORING_MODEL artifact (online_classifier.py)
+SCORING_MODEL = 'models/logistic_regression'  # Written by logistic_regression.py
+METRICS_FILE = f'{LABEL}_metrics.json'  # Snapshot in OUTPUT_DIR ('.prom' for Prometheus text), see collection_metrics.py
+GROUND_TRUTH_FILE = f'{LABEL}_ground_truth.columnar'  # Per-tick vehicle state in OUTPUT_DIR (ground_truth.py); None disables
+METRICS_INTERVAL = 10  # Time between metrics snapshots (all intervals are simulated seconds, see tick_scheduler.py)
+
+COLUMNS = ['timestamp', 'x', 'y', 'z', 'velocity', 'azimuth', 'sensor_id', 'vehicle_id', 'label']
+COLUMN_KINDS = {
+    'timestamp': 'float64', 'x': 'float32', 'y': 'float32', 'z': 'float32', 'velocity': 'float32',
+    'azimuth': 'float32', 'sensor_id': 'category', 'vehicle_id': 'int32', 'label': 'category',
+}
 
 # === Setup ===
 def setup_csv_writer(filename):
     try:
-        if not os.path.exists('output'):
-            os.makedirs('output')
-        file_path = os.path.join('output', filename)
+        if not os.path.exists(OUTPUT_DIR):
+            os.makedirs(OUTPUT_DIR)
+        file_path = os.path.join(OUTPUT_DIR, filename)
         print(f"Creating output file: {file_path}")
         file = open(file_path, 'w', newline='')
         writer = csv.writer(file)
-        writer.writerow(['timestamp', 'x', 'y', 'z', 'velocity', 'azimuth', 'sensor_id', 'vehicle_id', 'label'])
+        writer.writerow(COLUMNS)
         print("CSV header written successfully")
         return file, writer
     except Exception as e:
@@ -37,11 +72,33 @@ def setup_csv_writer(filename):
         print(traceback.format_exc())
         raise
 
+def setup_columnar_writer(filename):
+    try:
+        if not os.path.exists(OUTPUT_DIR):
+            os.makedirs(OUTPUT_DIR)
+        path = os.path.join(OUTPUT_DIR, filename)
+        print(f"Creating columnar dataset: {path}")
+        writer = ColumnarWriter(path, COLUMNS, COLUMN_KINDS)
+        return writer, writer
+    except Exception as e:
+        print(f"ERROR in setup_columnar_writer: {e}")
+        print(traceback.format_exc())
+        raise
+
+def setup_online_scorer():
+    """Load the saved logistic regression for live scoring"""
+    from online_classifier import OnlineDriverScorer
+    print(f"Loading online scorer from {SCORING_MODEL}...")
+    scorer = OnlineDriverScorer.from_artifact(SCORING_MODEL)
+    print("Online scorer ready")
+    return scorer
+
 def setup_carla():
     try:
         print("Connecting to CARLA server...")
-        client = carla.Client('localhost', 2000)
+        client = carla.Client(CARLA_HOST, CARLA_PORT)
         client.set_timeout(20.0)  # Increased timeout
+        check_world_free(client.get_world())  # Before load_world, which would reset the other client's world
         print("Loading world...")
         world = client.load_world('Town01') 
         print("World loaded successfully")
@@ -60,14 +117,9 @@ def set_spectator(world, transform):
         print(f"ERROR in set_spectator: {e}")
         print(traceback.format_exc())
 
-def is_spawn_point_clear(spawn_point, vehicles, min_distance=8.0):
-    for v in vehicles:
-        try:
-            if v.is_alive and v.get_transform().location.distance(spawn_point.location) < min_distance:
-                return False
-        except Exception as e:
-            print(f"ERROR checking vehicle distance: {e}")
-    return True
+def is_spawn_point_clear(spawn_point, vehicle_index, min_distance=8.0):
+    # Positions come from the per-tick index, so this makes no RPCs
+    return not vehicle_index.within(spawn_point.location, min_distance)
 
 def create_radar_sensor(world, blueprint_library, transform, callback):
     try:
@@ -88,64 +140,70 @@ def create_radar_sensor(world, blueprint_library, transform, callback):
         print(traceback.format_exc())
         raise
 
-# Counter to track detection events
-detection_count = 0
+# Thread-safe counters and histograms, updated from the sensor callbacks and the main loop
+metrics = CollectionMetrics()
 
-def save_radar_data(radar_data, sensor_id, radar_transform, vehicles_list, writer):
-    global detection_count
+def save_radar_data(radar_data, sensor_id, radar_transform, vehicle_index, writer, scorer=None):
+    start = time.perf_counter()
     try:
+        metrics.frames.update(sensor_id, radar_data.frame)
         if not radar_data:
             return
-            
-        for detection in radar_data:
-            try:
-                x = detection.depth * np.cos(detection.azimuth)
-                y = detection.depth * np.sin(detection.azimuth)
-                z = detection.altitude
-                velocity = detection.velocity
-                azimuth = detection.azimuth
-                radar_loc = radar_transform.location + carla.Location(x=x, y=y)
-
-                match_found = False
-                for vehicle in vehicles_list:
-                    if not vehicle.is_alive:
-                        continue
-                        
-                    if radar_loc.distance(vehicle.get_transform().location) < 6.0:
-                        writer.writerow([time.time(), x, y, z, velocity, azimuth, sensor_id, vehicle.id, LABEL])
-                        match_found = True
-                        detection_count += 1
-                        
-                        # Print status update periodically
-                        if detection_count % 10 == 0:
-                            print(f"Radar detections recorded: {detection_count}")
-                        break
-            except Exception as e:
-                print(f"ERROR processing individual detection: {e}")
-                
+
+        # One vectorized pass over the raw buffer: sensor rotation and altitude included
+        batch = decode_measurement(radar_data, radar_transform)
+        detections = batch.detections
+        x, y = batch.offsets[:, 0], batch.offsets[:, 1]
+
+        # Match the whole batch against the per-tick vehicle index (no RPCs)
+        matches, vehicles = vehicle_index.nearest(batch.points, ASSOCIATION_GATE)
+        matched = np.flatnonzero(matches >= 0)
+        if len(matched) == 0:
+            return
+
+        timestamp = batch.timestamp
+        writer.writerows(
+            [timestamp, x[i], y[i], detections[i, ALTITUDE], detections[i, VELOCITY], detections[i, AZIMUTH],
+             sensor_id, vehicles[matches[i]].id, LABEL]
+            for i in matched
+        )
+        # Live scoring sees the same rows, one O(1) state update per detection
+        if scorer is not None:
+            scorer.update(timestamp, [vehicles[m].id for m in matches[matched]], x[matched], y[matched],
+                          detections[matched, ALTITUDE], detections[matched, VELOCITY], detections[matched, AZIMUTH])
+        detection_count = metrics.detections.inc(len(matched), sensor=sensor_id)
+        previous_count = detection_count - len(matched)
+
+        # Print status update periodically
+        if detection_count // 10 > previous_count // 10:
+            print(f"Radar detections recorded: {detection_count}")
+
     except Exception as e:
         print(f"ERROR in save_radar_data: {e}")
         print(traceback.format_exc())
+    finally:
+        metrics.callback_seconds.observe(time.perf_counter() - start, sensor=sensor_id)
 
-def cleanup_distant_vehicles(vehicles_list, radar_location, threshold_distance):
+def cleanup_distant_vehicles(client, vehicles_list, vehicle_index, radar_location, threshold_distance):
     """Remove vehicles that have gone too far from the radar"""
-    removed_count = 0
+    distant_ids = {v.id for v in vehicle_index.beyond(radar_location, threshold_distance)}
     remaining_vehicles = []
+    distant_vehicles = []
     
     for vehicle in vehicles_list:
-        try:
-            if not vehicle.is_alive:
-                continue
-                
-            distance = vehicle.get_transform().location.distance(radar_location)
-            if distance > threshold_distance:
-                print(f"Removing vehicle {vehicle.id} (distance: {distance:.1f}m)")
-                vehicle.destroy()
-                removed_count += 1
-            else:
-                remaining_vehicles.append(vehicle)
-        except Exception as e:
-            print(f"Error checking vehicle {vehicle.id}: {e}")
+        if not vehicle.is_alive:
+            continue
+        if vehicle.id in distant_ids:
+            print(f"Removing vehicle {vehicle.id} (beyond {threshold_distance}m)")
+            distant_vehicles.append(vehicle)
+        else:
+            remaining_vehicles.append(vehicle)
+    
+    # All distant vehicles are destroyed in a single command batch
+    with metrics.rpc_seconds.time(call='destroy'):
+        removed_count, errors = destroy_actors(client, distant_vehicles)
+    for vehicle_id, error in errors:
+        print(f"Error destroying vehicle {vehicle_id}: {error}")
     
     if removed_count > 0:
         print(f"Removed {removed_count} distant vehicles")
@@ -155,15 +213,39 @@ def cleanup_distant_vehicles(vehicles_list, radar_location, threshold_distance):
 def main():
     vehicles_list = []
     csv_file = None
+    csv_writer = None
     radar_sensor = None
+    session = None
+    client = None
+    world = None
+    scorer = None
+    tick_listener = None
+    scheduler_listener = None
+    ground_truth = None
+    reporter = None
+    completed = False
     
     try:
         print("\n=== Starting CARLA Radar Logger (Continuous Spawning) ===")
         global_start_time = time.time()
         
+        # Load the live scoring model before anything is spawned
+        if ONLINE_SCORING:
+            scorer = setup_online_scorer()
+
         # Setup CSV writer
-        print("\n[1/4] Setting up CSV writer...")
-        csv_file, csv_writer = setup_csv_writer(OUTPUT_FILE)
+        print("\n[1/4] Setting up output writer...")
+        if OUTPUT_FORMAT == 'columnar':
+            csv_file, file_writer = setup_columnar_writer(OUTPUT_FILE)
+        else:
+            csv_file, file_writer = setup_csv_writer(OUTPUT_FILE)
+        csv_writer = AsyncRowWriter(file_writer, csv_file, policy=WRITER_POLICY)
+
+        # Periodic metrics snapshots (writer queue depth and active vehicles are sampled at each one)
+        reporter = MetricsReporter(metrics.registry, os.path.join(OUTPUT_DIR, METRICS_FILE), METRICS_INTERVAL, collect=[
+            lambda: metrics.sample_writer(csv_writer),
+            lambda: metrics.active_vehicles.set(len(vehicles_list)),
+        ])
         
         # Setup CARLA
         print("\n[2/4] Connecting to CARLA and setting up world...")
@@ -175,19 +257,32 @@ def main():
         radar_transform = carla.Transform(RADAR_LOCATION, RADAR_ROTATION)
         set_spectator(world, radar_transform)
         
-        # Create radar sensor BEFORE spawning vehicles
-        print("\n[4/4] Setting up radar sensor...")
-        radar_sensor = create_radar_sensor(
-            world, blueprint_library, radar_transform,
-            lambda data: save_radar_data(data, 'radar_1', radar_transform, vehicles_list, csv_writer)
-        )
-        radar_start_time = time.time()
-        
-        
+        # Vehicle positions are indexed once per tick from the world snapshot
+        vehicle_index = ActorIndex()
+        tick_listener = track_actors(world, vehicle_index, vehicles_list)
+
+        # True position, velocity and acceleration of every spawned vehicle, read from the same snapshots
+        if GROUND_TRUTH_FILE:
+            ground_truth = GroundTruthRecorder(os.path.join(OUTPUT_DIR, GROUND_TRUTH_FILE), vehicles_list).attach(world)
+
         # Setup traffic manager with more aggressive settings
-        tm = client.get_trafficmanager()
+        tm = client.get_trafficmanager(TM_PORT)
         tm.set_global_distance_to_leading_vehicle(0.5)  # Closer following distance
-        tm.set_synchronous_mode(False)  # Use asynchronous mode
+        tm.set_synchronous_mode(False)  # Asynchronous unless the synchronous session takes over below
+
+        # Create radar sensor BEFORE spawning vehicles
+        print("\n[4/4] Setting up radar sensor...")
+        radar_callback = lambda data: save_radar_data(data, 'radar_1', radar_transform, vehicle_index, csv_writer, scorer)
+        scheduler = TickScheduler()
+        if SYNCHRONOUS_MODE:
+            # Fixed-step mode: sensor data is delivered per tick and time is simulated time
+            session = SynchronousSession(world, tm, DELTA_SECONDS).start()
+            radar_callback = session.frame_aligned(radar_callback)
+        else:
+            # The server ticks on its own; the scheduler follows its simulation time
+            scheduler_listener = scheduler.attach(world)
+        radar_sensor = create_radar_sensor(world, blueprint_library, radar_transform, radar_callback)
+        radar_start_time = scheduler.time
         
         try:
             spawn_point = world.get_map().get_waypoint(SPAWN_LOCATION, project_to_road=True).transform
@@ -197,77 +292,78 @@ def main():
             print("Using raw spawn location instead")
             spawn_point = carla.Transform(SPAWN_LOCATION, carla.Rotation())
             
-        # Start the main loop for the entire process duration
-        print(f"\n=== Starting main loop (continuous spawning for {TOTAL_RUNTIME} seconds) ===")
-        
-        main_start_time = time.time()
-        last_vehicle_spawn_time = main_start_time
-        last_cleanup_time = main_start_time
-        last_flush_time = main_start_time
-        detection_checkpoint = 0
         vehicle_bps = blueprint_library.filter('vehicle.*')
         spawned_count = 0
-        
-        # Main loop - runs for TOTAL_RUNTIME seconds
-        while time.time() - radar_start_time < TOTAL_RUNTIME:
-            current_time = time.time()
-            elapsed = int(current_time - radar_start_time)
-            
-            # Attempt to spawn a new vehicle if we're under MAX_ACTIVE_VEHICLES
-            if len(vehicles_list) < MAX_ACTIVE_VEHICLES and current_time - last_vehicle_spawn_time >= SPAWN_INTERVAL:
-                try:
-                    if is_spawn_point_clear(spawn_point, vehicles_list):
-                        bp = random.choice(vehicle_bps)
-                        vehicle = world.try_spawn_actor(bp, spawn_point)
-                        if vehicle:
-                            # Configure the vehicle with aggressive settings
-                            vehicle.set_autopilot(True, tm.get_port())
-                            tm.ignore_lights_percentage(vehicle, 0)
-                            tm.ignore_signs_percentage(vehicle, 100)
-                            tm.vehicle_percentage_speed_difference(vehicle, -40)  # Faster than normal
-                            tm.distance_to_leading_vehicle(vehicle, 0.5)
-                            tm.auto_lane_change(vehicle, True)
-
-                            vehicles_list.append(vehicle)
-                            spawned_count += 1
-                            print(f"Spawned UNSAFE vehicle #{spawned_count} (active: {len(vehicles_list)}/{MAX_ACTIVE_VEHICLES})")
-                        else:
-                            print("Spawn failed — retrying next interval")
+        detection_checkpoint = 0
+
+        # Attempt to spawn a new vehicle if we're under MAX_ACTIVE_VEHICLES
+        def spawn():
+            nonlocal spawned_count
+            if len(vehicles_list) >= MAX_ACTIVE_VEHICLES:
+                return
+            try:
+                if is_spawn_point_clear(spawn_point, vehicle_index):
+                    bp = random.choice(vehicle_bps)
+                    # Spawn + autopilot in one command batch, then the aggressive TM settings
+                    with metrics.rpc_seconds.time(call='spawn'):
+                        spawned, errors = spawn_vehicles(client, [(bp, spawn_point)], tm.get_port())
+                    metrics.record_spawns(spawned, errors)
+                    if spawned:
+                        vehicle = spawned[0]
+                        configure_vehicles(tm, spawned, UNSAFE_TM_SETTINGS)
+
+                        vehicles_list.append(vehicle)
+                        spawned_count += 1
+                        print(f"Spawned UNSAFE vehicle #{spawned_count} (active: {len(vehicles_list)}/{MAX_ACTIVE_VEHICLES})")
                     else:
-                        print("Spawn point blocked — waiting for next interval")
-                except Exception as e:
-                    print(f"ERROR during vehicle spawning: {e}")
-                    
-                last_vehicle_spawn_time = current_time
-            
-            # Clean up vehicles that have gone too far from the radar (every 10 seconds)
-            if current_time - last_cleanup_time >= 10:
-                print("\n--- Performing vehicle cleanup check ---")
-                vehicles_list = cleanup_distant_vehicles(vehicles_list, RADAR_LOCATION, VEHICLE_CLEANUP_THRESHOLD)
-                last_cleanup_time = current_time
-                
-            # Status update every 10 seconds
-            if elapsed % 10 == 0 and elapsed > 0:
-                new_detections = detection_count - detection_checkpoint
-                print(f"Progress: {elapsed}/{TOTAL_RUNTIME}s. " +
-                      f"Active vehicles: {len(vehicles_list)}/{MAX_ACTIVE_VEHICLES}. " +
-                      f"Total spawned: {spawned_count}. " +
-                      f"New detections: {new_detections} in last 10s. " +
-                      f"Total: {detection_count}")
-                detection_checkpoint = detection_count
-            
-            # Flush output file periodically
-            if current_time - last_flush_time > 5.0:
-                csv_file.flush()
-                last_flush_time = current_time
-                
-            time.sleep(0.1)  # Small sleep to prevent CPU overuse
+                        print(f"Spawn failed ({errors[0][1] if errors else 'unknown error'}) — retrying next interval")
+                else:
+                    print("Spawn point blocked — waiting for next interval")
+            except Exception as e:
+                print(f"ERROR during vehicle spawning: {e}")
+
+        # Clean up vehicles that have gone too far from the radar
+        def cleanup():
+            print("\n--- Performing vehicle cleanup check ---")
+            vehicles_list[:] = cleanup_distant_vehicles(client, vehicles_list, vehicle_index, RADAR_LOCATION, VEHICLE_CLEANUP_THRESHOLD)
+
+        def status():
+            nonlocal detection_checkpoint
+            detection_count = metrics.detections.total()
+            new_detections = detection_count - detection_checkpoint
+            print(f"Progress: {int(scheduler.time - radar_start_time)}/{TOTAL_RUNTIME}s. " +
+                  f"Active vehicles: {len(vehicles_list)}/{MAX_ACTIVE_VEHICLES}. " +
+                  f"Total spawned: {spawned_count}. " +
+                  f"New detections: {new_detections} in last {STATUS_INTERVAL}s. " +
+                  f"Total: {detection_count}")
+            detection_checkpoint = detection_count
+
+        # Periodic tasks run on simulation time, fired by the ticks instead of a polling loop
+        scheduler.every(SPAWN_INTERVAL, spawn)
+        scheduler.every(CLEANUP_INTERVAL, cleanup)
+        scheduler.every(STATUS_INTERVAL, status)
+        scheduler.every(FLUSH_INTERVAL, csv_writer.flush, 'flush')
+        scheduler.every(METRICS_INTERVAL, reporter.write, 'metrics')
+        scheduler.at(radar_start_time + TOTAL_RUNTIME, scheduler.stop, 'runtime')
+
+        # Start the main loop for the entire process duration
+        print(f"\n=== Starting main loop (continuous spawning for {TOTAL_RUNTIME} seconds) ===")
+        while scheduler.running:
+            if session:
+                with metrics.rpc_seconds.time(call='tick'):
+                    session.tick()
+                scheduler.run_due(session.elapsed)
+            else:
+                scheduler.run_due(scheduler.wait())
             
         # Final data status
         total_elapsed = time.time() - global_start_time
         print(f"\nData collection complete in {total_elapsed:.1f} seconds.")
+        if session:
+            print(f"Simulated time: {session.elapsed:.1f} seconds ({session.elapsed / total_elapsed:.1f}x real time)")
         print(f"Total vehicles spawned: {spawned_count}")
-        print(f"Total radar detections: {detection_count}")
+        print(f"Total radar detections: {metrics.detections.total()}")
+        completed = True
             
     except KeyboardInterrupt:
         print("\nData collection interrupted by user")
@@ -277,6 +373,16 @@ def main():
     finally:
         print("\n=== Cleaning up resources ===")
         
+        if tick_listener is not None:
+            world.remove_on_tick(tick_listener)
+        if scheduler_listener is not None:
+            world.remove_on_tick(scheduler_listener)
+        if ground_truth:
+            try:
+                ground_truth.close()
+            except Exception as e:
+                print(f"Error saving ground truth: {e}")
+
         # Clean up radar
         if radar_sensor:
             try:
@@ -286,38 +392,55 @@ def main():
                 print("Radar sensor destroyed")
             except Exception as e:
                 print(f"Error destroying radar sensor: {e}")
+
+        # Restore asynchronous world settings
+        if session:
+            try:
+                session.close()
+            except Exception as e:
+                print(f"Error restoring world settings: {e}")
         
         # Clean up vehicles
         if vehicles_list:
             try:
                 print(f"Destroying {len(vehicles_list)} vehicles...")
-                alive_count = 0
-                for v in vehicles_list:
-                    try:
-                        if v.is_alive:
-                            alive_count += 1
-                            v.destroy()
-                    except:
-                        pass
-                print(f"Destroyed {alive_count} active vehicles")
+                destroyed, errors = destroy_actors(client, [v for v in vehicles_list if v.is_alive])
+                for vehicle_id, error in errors:
+                    print(f"Error destroying vehicle {vehicle_id}: {error}")
+                print(f"Destroyed {destroyed} active vehicles")
             except Exception as e:
                 print(f"Error destroying vehicles: {e}")
         
+        if scorer:
+            stats = scorer.stats()
+            print(f"Online scorer: {stats['flagged']} vehicles flagged, {stats['tracked']} tracked, {stats['evicted']} evicted")
+
+        # Drain the writer queue before closing the file
+        if csv_writer:
+            try:
+                print("Draining writer queue...")
+                csv_writer.close()
+                stats = csv_writer.stats()
+                print(f"Rows written: {stats['written']}/{stats['enqueued']} ({stats['dropped']} dropped)")
+            except Exception as e:
+                print(f"Error draining writer queue: {e}")
+
         # Close CSV file
         if csv_file:
             try:
                 print("Closing output file...")
-                csv_file.flush()  # Ensure all data is written
                 csv_file.close()
                 print(f"Output file closed")
                 
                 # Verify file was created and has data
-                file_path = os.path.join('output', OUTPUT_FILE)
-                if os.path.exists(file_path):
+                file_path = os.path.join(OUTPUT_DIR, OUTPUT_FILE)
+                if os.path.isdir(file_path):
+                    print(f"[DONE] {len(csv_file.row_groups)} row groups saved to {file_path}")
+                elif os.path.exists(file_path):
                     size = os.path.getsize(file_path)
                     print(f"Output file size: {size} bytes")
                     if size > 100:  # Assuming at least a header and some data
-                        print(f"[DONE] Data saved to output/{OUTPUT_FILE}")
+                        print(f"[DONE] Data saved to {file_path}")
                     else:
                         print(f"[WARNING] Output file exists but may be empty or contain only headers")
                 else:
@@ -325,5 +448,11 @@ def main():
             except Exception as e:
                 print(f"Error closing CSV file: {e}")
 
+        if reporter:
+            reporter.stop()
+            print(f"Metrics saved to {reporter.path} (spawn success rate {metrics.spawn_success_rate():.0%})")
+
+    return completed
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
\ No newline at end of file
@@ -0,0 +1,176 @@
+# window_features.py (per-vehicle sliding-window motion features for logistic_regression.py)
+#
+# Instead of one noisy row per detection, every vehicle's track is cut into
+# overlapping windows of consecutive rows: one window ends every STRIDE rows,
+# and for every length in WINDOW_LENGTHS the window covers the rows up to
+# that end (e.g. the last 10 and the last 30 rows). Each window gets the
+# mean position, mean / variance of velocity, acceleration and azimuth, the
+# velocity range (max - min) and the variance and maximum |jerk|.
+#
+# Acceleration and jerk are taken between rows that advance in time inside
+# each vehicle's run, as in logistic_regression.compute_motion_features, so
+# dt is always positive and no value needs to be filtered afterwards. The
+# window statistics are vectorized kernels over the whole table, without a
+# Python loop per window or per vehicle:
+#
+#   mean / variance   differences of cumulative sums (values centred per
+#                     vehicle first, so E[x^2] - E[x]^2 does not cancel)
+#   max / min         sliding maxima from O(log length) np.maximum passes
+#                     over shifted views of the same array
+#
+# Usage:  python window_features.py <output_dir> safe_radar_data.csv:safe unsafe_radar_data.csv:unsafe
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import ColumnarWriter, infer_kind
+from dataset_cache import load_log
+from feature_store import _column, _diff_in_segments
+
+WINDOW_LENGTHS = (10, 30)  # rows per window; one set of features per length
+STRIDE = 5  # rows between the ends of consecutive windows
+LABELS = {'safe': 0, 'unsafe': 1}
+WINDOW_STATS = {
+    'x': ['mean'],
+    'y': ['mean'],
+    'z': ['mean'],
+    'velocity': ['mean', 'var', 'range'],
+    'acceleration': ['mean', 'var'],
+    'jerk': ['var', 'max_abs'],
+    'azimuth': ['mean', 'var'],
+}
+
+
+def window_feature_names(lengths=WINDOW_LENGTHS):
+    return [f'{signal}_{stat}_{length}' for length in lengths for signal, stats in WINDOW_STATS.items() for stat in stats]
+
+
+WINDOW_FEATURES = window_feature_names()
+
+
+# === Kernels ===
+def _cumulative(values):
+    """Cumulative sums with a leading 0, so sum(values[a:b]) = c[b] - c[a]"""
+    out = np.zeros(len(values) + 1)
+    np.cumsum(values, out=out[1:])
+    return out
+
+
+def sliding_max(values, length):
+    """out[i] = max(values[i:i + length]) for every full window
+
+    After k passes out[i] is the maximum of 2**k values; two overlapping
+    blocks of that size then cover any length.
+    """
+    out, span = values, 1
+    while span * 2 <= length:
+        out = np.maximum(out[:-span], out[span:])
+        span *= 2
+    return np.maximum(out[:len(values) - length + 1], out[length - span:])
+
+
+def window_ends(run_start, run_length, length, stride):
+    """Last row of every window of `length` rows taken every `stride` rows inside each run, and its run"""
+    count = np.maximum((run_length - length) // stride + 1, 0)
+    run = np.repeat(np.arange(len(count)), count)
+    rank = np.arange(len(run)) - np.repeat(np.cumsum(count) - count, count)
+    return run_start[run] + length - 1 + rank * stride, run
+
+
+# === Features ===
+def window_features(df, lengths=WINDOW_LENGTHS, stride=STRIDE, by=('vehicle_id',), keep=()):
+    """One row per window: the `by` columns, t_start / t_end, window_feature_names(lengths) and `keep` columns
+
+    `keep` columns take their value at the window's last row. Vehicles with
+    fewer than max(lengths) + 2 rows that advance in time yield no windows.
+    """
+    by = list(by)
+    lengths = sorted(set(int(length) for length in lengths))
+    if not lengths or lengths[0] < 1 or stride < 1:
+        raise ValueError(f"Window lengths and stride must be positive, got {lengths} and {stride}")
+    df = df[df['vehicle_id'].notna()]
+    columns = ['t_start', 't_end'] + window_feature_names(lengths)
+    if len(df) == 0:
+        return pd.DataFrame(columns=by + columns + list(keep))
+
+    codes = [pd.factorize(df[name])[0] for name in by]
+    segment = np.ravel_multi_index(codes, [c.max() + 1 for c in codes])
+    t = df[_column(df, 'timestamp', 'Timestamp')].to_numpy(np.float64)
+    order = np.lexsort((t, segment))
+    segment, t = segment[order], t[order]
+
+    # Keep the rows that advance in time, then the rows with a defined jerk
+    # (the first two of each run have no previous velocity / acceleration)
+    dt = _diff_in_segments(t, segment)
+    kept = np.flatnonzero(dt > 0)
+    order, segment, t, dt = order[kept], segment[kept], t[kept], dt[kept]
+    velocity = df['velocity'].to_numpy(np.float64)[order]
+    acceleration = _diff_in_segments(velocity, segment) / dt
+    jerk = _diff_in_segments(acceleration, segment) / dt
+    defined = np.r_[False, False, segment[2:] == segment[:-2]]
+    order, segment, t = order[defined], segment[defined], t[defined]
+    signals = {axis: df[axis].to_numpy(np.float64)[order] for axis in ('x', 'y', 'z')}
+    signals['velocity'] = velocity[defined]
+    signals['acceleration'] = acceleration[defined]
+    signals['jerk'] = jerk[defined]
+    signals['azimuth'] = df[_column(df, 'azimuth', 'y')].to_numpy(np.float64)[order]
+
+    # Runs of consecutive rows of one vehicle and the windows inside them
+    run_start = np.flatnonzero(np.r_[True, segment[1:] != segment[:-1]])
+    run_length = np.diff(np.r_[run_start, len(segment)])
+    ends, run = window_ends(run_start, run_length, lengths[-1], stride)
+    if len(ends) == 0:
+        return pd.DataFrame(columns=by + columns + list(keep))
+    run_rows = np.repeat(np.arange(len(run_start)), run_length)
+
+    table = {name: df[name].to_numpy()[order[run_start]][run] for name in by}
+    table['t_start'] = t[ends - lengths[-1] + 1]
+    table['t_end'] = t[ends]
+    for signal, values in signals.items():
+        stats = WINDOW_STATS[signal]
+        if 'mean' in stats or 'var' in stats:
+            run_mean = np.add.reduceat(values, run_start) / run_length
+            centred = values - run_mean[run_rows]
+            sums = _cumulative(centred)
+            squares = _cumulative(centred * centred)
+        for length in lengths:
+            first = ends - length + 1
+            if 'mean' in stats or 'var' in stats:
+                mean = (sums[ends + 1] - sums[first]) / length
+                if 'mean' in stats:
+                    table[f'{signal}_mean_{length}'] = mean + run_mean[run]
+                if 'var' in stats:
+                    var = (squares[ends + 1] - squares[first]) / length - mean * mean
+                    table[f'{signal}_var_{length}'] = np.maximum(var, 0.0)
+            if 'range' in stats:
+                table[f'{signal}_range_{length}'] = sliding_max(values, length)[first] + sliding_max(-values, length)[first]
+            if 'max_abs' in stats:
+                table[f'{signal}_max_abs_{length}'] = sliding_max(np.abs(values), length)[first]
+    for name in keep:
+        table[name] = df[name].to_numpy()[order[ends]]
+    return pd.DataFrame(table, columns=by + columns + list(keep))
+
+
+def labeled_windows(sources, lengths=WINDOW_LENGTHS, stride=STRIDE):
+    """Windows of several (path, 'safe' | 'unsafe') logs; runs are split by label as well as vehicle"""
+    frames = []
+    for path, label in sources:
+        df = load_log(path)
+        df['label'] = LABELS[label]
+        frames.append(df)
+    return window_features(pd.concat(frames, ignore_index=True), lengths, stride, by=['label', 'vehicle_id'])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Usage: python window_features.py <output_dir> <path>:<safe|unsafe> [<path>:<label> ...]")
+        sys.exit(1)
+    windows = labeled_windows([tuple(arg.rsplit(':', 1)) for arg in sys.argv[2:]])
+    kinds = {name: infer_kind(name, dtype) for name, dtype in windows.dtypes.items()}
+    kinds.update(t_start='float64', t_end='float64')
+    writer = ColumnarWriter(sys.argv[1], list(windows.columns), kinds)
+    writer.write_frame(windows)
+    writer.close()
+    print(f"[DONE] {len(windows)} windows written to {sys.argv[1]}")